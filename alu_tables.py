@@ -0,0 +1,186 @@
+"""
+Precomputed ALU and flag tables.
+
+ADC and SBC are tabulated for every (carry, A, operand) in both binary and
+decimal mode. Each entry packs the 8-bit result in the low byte and the new
+N/V/Z/C bits, already in their status register positions, in the high byte:
+
+    entry = adc_table[(carry << 16) | (a << 8) | operand]
+    sr = (sr & ~ARITHMETIC_FLAGS) | (entry >> 8)
+    a = entry & 0xFF
+
+The tables are generated from the reference functions below, which follow
+the NMOS 6502 (flags in decimal mode come from the binary ALU result, as the
+real chip does). check_against_decimal_test() runs 6502_decimal_test.bin on
+a CPU that uses the tables.
+
+nz_flags gives the N and Z bits of an NZ code (any byte, or NZ_BOTH) and
+nz_codes the NZ code for the N and Z bits of a status byte.
+"""
+from array import array
+from typing import List, Tuple
+
+NEGATIVE_FLAG = 0b10000000
+OVERFLOW_FLAG = 0b01000000
+ZERO_FLAG = 0b00000010
+CARRY_FLAG = 0b00000001
+
+ARITHMETIC_FLAGS = NEGATIVE_FLAG | OVERFLOW_FLAG | ZERO_FLAG | CARRY_FLAG
+NZ_FLAGS = NEGATIVE_FLAG | ZERO_FLAG
+CV_FLAGS = CARRY_FLAG | OVERFLOW_FLAG
+
+# Status register masks that keep everything except the named flags
+KEEP_NZ_FLAGS = 0xFF ^ NZ_FLAGS
+KEEP_CV_FLAGS = 0xFF ^ CV_FLAGS
+KEEP_CARRY_FLAG = 0xFF ^ CARRY_FLAG
+KEEP_OVERFLOW_FLAG = 0xFF ^ OVERFLOW_FLAG
+
+# Lazy N/Z: the CPU keeps the last result (an "NZ code") instead of the two
+# flags. A byte stands for its own N and Z; NZ_BOTH stands for N and Z both
+# set, which no byte gives but PLP, BIT and decimal ADC/SBC can. Z is set when
+# the low byte of the code is zero and N when either mask bit is set.
+NZ_BOTH = 0x100
+LAZY_ZERO_MASK = 0xFF
+LAZY_NEGATIVE_MASK = 0x180
+
+DECIMAL_TEST_LOAD_ADDRESS = 0x0200
+DECIMAL_TEST_DONE_ADDRESS = 0x024B
+DECIMAL_TEST_ERROR_ADDRESS = 0x000B
+
+
+def adc_reference(a: int, operand: int, carry: int, decimal: bool) -> Tuple[int, int]:
+    """(result, N/V/Z/C flags) of ADC"""
+    if decimal:
+        halfcarry = 0
+        decimalcarry = 0
+        adjust0 = 0
+        adjust1 = 0
+        nibble0 = (operand & 0xf) + (a & 0xf) + carry
+        if nibble0 > 9:
+            adjust0 = 6
+            halfcarry = 1
+        nibble1 = ((operand >> 4) & 0xf) + ((a >> 4) & 0xf) + halfcarry
+        if nibble1 > 9:
+            adjust1 = 6
+            decimalcarry = 1
+
+        # the ALU outputs are not decimally adjusted
+        nibble0 = nibble0 & 0xf
+        nibble1 = nibble1 & 0xf
+        aluresult = (nibble1 << 4) + nibble0
+
+        # the final A contents will be decimally adjusted
+        nibble0 = (nibble0 + adjust0) & 0xf
+        nibble1 = (nibble1 + adjust1) & 0xf
+
+        flags = ZERO_FLAG if aluresult == 0 else aluresult & NEGATIVE_FLAG
+        if decimalcarry == 1:
+            flags |= CARRY_FLAG
+        if (~(a ^ operand) & (a ^ aluresult)) & NEGATIVE_FLAG:
+            flags |= OVERFLOW_FLAG
+        return (nibble1 << 4) + nibble0, flags
+
+    result = a + operand + carry
+    flags = 0
+    if (~(a ^ operand) & (a ^ result)) & NEGATIVE_FLAG:
+        flags |= OVERFLOW_FLAG
+    if result > 0xFF:
+        flags |= CARRY_FLAG
+        result &= 0xFF
+    flags |= ZERO_FLAG if result == 0 else result & NEGATIVE_FLAG
+    return result, flags
+
+
+def sbc_reference(a: int, operand: int, carry: int, decimal: bool) -> Tuple[int, int]:
+    """(result, N/V/Z/C flags) of SBC"""
+    if decimal:
+        halfcarry = 1
+        decimalcarry = 0
+        adjust0 = 0
+        adjust1 = 0
+
+        nibble0 = (a & 0xf) + (~operand & 0xf) + carry
+        if nibble0 <= 0xf:
+            halfcarry = 0
+            adjust0 = 10
+        nibble1 = ((a >> 4) & 0xf) + ((~operand >> 4) & 0xf) + halfcarry
+        if nibble1 <= 0xf:
+            adjust1 = 10 << 4
+
+        # the ALU outputs are not decimally adjusted
+        aluresult = a + (~operand & 0xFF) + carry
+
+        if aluresult > 0xFF:
+            decimalcarry = 1
+        aluresult &= 0xFF
+
+        # but the final result will be adjusted
+        nibble0 = (aluresult + adjust0) & 0xf
+        nibble1 = ((aluresult + adjust1) >> 4) & 0xf
+
+        flags = ZERO_FLAG if aluresult == 0 else aluresult & NEGATIVE_FLAG
+        if decimalcarry == 1:
+            flags |= CARRY_FLAG
+        if ((a ^ operand) & (a ^ aluresult)) & NEGATIVE_FLAG:
+            flags |= OVERFLOW_FLAG
+        return (nibble1 << 4) + nibble0, flags
+
+    result = a + (~operand & 0xFF) + carry
+    flags = 0
+    if ((a ^ operand) & (a ^ result)) & NEGATIVE_FLAG:
+        flags |= OVERFLOW_FLAG
+    if result > 0xFF:
+        flags |= CARRY_FLAG
+    result &= 0xFF
+    flags |= ZERO_FLAG if result == 0 else result & NEGATIVE_FLAG
+    return result, flags
+
+
+def table_index(a: int, operand: int, carry: int) -> int:
+    return (carry << 16) | (a << 8) | operand
+
+
+def build_arithmetic_table(reference, decimal: bool) -> array:
+    table = array("H", bytes(2 * 0x20000))
+    for carry in (0, 1):
+        for a in range(256):
+            base = table_index(a=a, operand=0, carry=carry)
+            for operand in range(256):
+                result, flags = reference(a, operand, carry, decimal)
+                table[base + operand] = (flags << 8) | result
+    return table
+
+
+def build_nz_table() -> bytes:
+    return bytes(ZERO_FLAG if value == 0 else value & NEGATIVE_FLAG for value in range(256)) + bytes((NZ_FLAGS,))
+
+
+def build_nz_code_table() -> List[int]:
+    codes = {0: 0x01, ZERO_FLAG: 0x00, NEGATIVE_FLAG: NEGATIVE_FLAG, NZ_FLAGS: NZ_BOTH}
+    return [codes[status & NZ_FLAGS] for status in range(256)]
+
+
+adc_binary_table = build_arithmetic_table(reference=adc_reference, decimal=False)
+adc_decimal_table = build_arithmetic_table(reference=adc_reference, decimal=True)
+sbc_binary_table = build_arithmetic_table(reference=sbc_reference, decimal=False)
+sbc_decimal_table = build_arithmetic_table(reference=sbc_reference, decimal=True)
+nz_flags = build_nz_table()
+nz_codes = build_nz_code_table()
+
+
+def check_against_decimal_test(program: bytes) -> int:
+    """
+    Run 6502_decimal_test.bin, which exercises ADC and SBC over every
+    operand pair and carry in decimal mode, on the table-driven CPU and
+    return its ERROR byte (0 when every result and flag matched).
+    """
+    from cpu6502 import CPU6502, ENGINE_TRANSLATED
+    from simple_memory_space import SimpleMemorySpace
+
+    memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+    memspace.set_data(start_address=DECIMAL_TEST_LOAD_ADDRESS, data=program)
+    cpu = CPU6502(mem_space=memspace)
+    cpu.reset(initial_program_counter=DECIMAL_TEST_LOAD_ADDRESS)
+    cpu.run_until(pc=DECIMAL_TEST_DONE_ADDRESS, engine=ENGINE_TRANSLATED)
+
+    return memspace.read_byte(address=DECIMAL_TEST_ERROR_ADDRESS)
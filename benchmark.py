@@ -0,0 +1,304 @@
+"""
+Emulator benchmarks.
+
+Each workload runs a fixed program to a fixed end, on each engine asked for,
+and reports the emulated cycles and instructions per second (and so the
+emulated MHz, against the C64's 0.985 MHz) and the peak memory of the process.
+Every measurement is made in a process of its own, so peak memory belongs to
+one workload on one engine and nothing is warmed up by the run before it.
+Results are written as JSON, and two result files can be compared:
+
+    python benchmark.py --engines fused translated --output after.json
+    python benchmark.py --compare before.json after.json
+
+Workloads:
+    functional  Klaus Dormann's 6502 functional test, to its success trap
+    decimal     Bruce Clark's decimal mode test, every ADC and SBC operand pair
+    c64_boot    a C64 cold start, up to the READY prompt
+    diag        the 586220 diagnostic cartridge, through its RAM and ROM tests
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from alu_tables import DECIMAL_TEST_DONE_ADDRESS, DECIMAL_TEST_ERROR_ADDRESS, DECIMAL_TEST_LOAD_ADDRESS
+from cpu6502 import CPU6502, ENGINE_FUSED, ENGINE_TICK, ENGINE_TRANSLATED, PAL_FRAME_CYCLES, STOP_PC, STOP_TRAP
+from simple_memory_space import SimpleMemorySpace, map_image
+
+ROOT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+TEST_DIRECTORY = os.path.join(ROOT_DIRECTORY, "test")
+C64_DIRECTORY = os.path.join(ROOT_DIRECTORY, "c64")
+
+ENGINES = (ENGINE_TICK, ENGINE_FUSED, ENGINE_TRANSLATED)
+DEFAULT_ENGINES = (ENGINE_FUSED, ENGINE_TRANSLATED)
+C64_CLOCK_HZ = 985_248  # PAL
+
+FUNCTIONAL_TEST_LOAD_ADDRESS = 0x000A
+FUNCTIONAL_TEST_START_ADDRESS = 0x0400
+FUNCTIONAL_TEST_SUCCESS_ADDRESS = 0x3469
+
+C64_SCREEN_RAM = 0x0400
+C64_SCREEN_SIZE = 1000
+DIAG_CARTRIDGE_FILE = os.path.join(C64_DIRECTORY, "Diag_586220", "diag-c64_586220.bin")
+
+
+def screen_codes(text: str) -> bytes:
+    """text as C64 screen codes, for looking for it in screen RAM"""
+    return bytes(ord(character) - 0x40 if "A" <= character <= "Z" else ord(character) for character in text)
+
+
+@dataclass
+class Workload:
+    name: str
+    setup: Callable[[], CPU6502]
+    # runs the set up CPU to the workload's end, or for at most max_cycles;
+    # returns cycles, instructions and whether the end was reached and correct
+    run: Callable[[CPU6502, str, int], Tuple[int, int, bool]]
+    max_cycles: int  # so a broken build cannot run for ever
+
+
+@dataclass
+class BenchmarkResult:
+    workload: str
+    engine: str
+    completed: bool
+    cycles: int
+    instructions: int
+    seconds: float
+    cycles_per_second: float
+    instructions_per_second: float
+    emulated_mhz: float
+    c64_speed: float  # as a fraction of a real PAL C64
+    peak_memory_kb: Optional[int]
+
+
+def _setup_functional() -> CPU6502:
+    memspace = SimpleMemorySpace(memspace_size=1024 * 64, fill_vals=0x00)
+    memspace.set_data(start_address=FUNCTIONAL_TEST_LOAD_ADDRESS,
+                      data=map_image(file_name=os.path.join(TEST_DIRECTORY, "6502_functional.bin")))
+    cpu = CPU6502(mem_space=memspace)
+    cpu.reset(initial_program_counter=FUNCTIONAL_TEST_START_ADDRESS)
+    return cpu
+
+
+def _run_functional(cpu: CPU6502, engine: str, max_cycles: int) -> Tuple[int, int, bool]:
+    result = cpu.run(cycles=max_cycles, engine=engine)
+    return result.cycles, result.instructions, \
+        result.reason == STOP_TRAP and cpu.PC == FUNCTIONAL_TEST_SUCCESS_ADDRESS
+
+
+def _setup_decimal() -> CPU6502:
+    memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+    memspace.set_data(start_address=DECIMAL_TEST_LOAD_ADDRESS,
+                      data=map_image(file_name=os.path.join(TEST_DIRECTORY, "6502_decimal_test.bin")))
+    cpu = CPU6502(mem_space=memspace)
+    cpu.reset(initial_program_counter=DECIMAL_TEST_LOAD_ADDRESS)
+    return cpu
+
+
+def _run_decimal(cpu: CPU6502, engine: str, max_cycles: int) -> Tuple[int, int, bool]:
+    result = cpu.run_until(pc=DECIMAL_TEST_DONE_ADDRESS, max_cycles=max_cycles, engine=engine)
+    return result.cycles, result.instructions, \
+        result.reason == STOP_PC and cpu.mem_space.read_byte(address=DECIMAL_TEST_ERROR_ADDRESS) == 0
+
+
+@contextmanager
+def _in_c64_directory():
+    # the ROM paths in rom_memory_map are relative to the c64 directory
+    cwd = os.getcwd()
+    os.chdir(C64_DIRECTORY)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def _make_c64(cartridge: Optional[str] = None) -> CPU6502:
+    from c64.c64_pla import C64PLA
+    from c64.cia import CIA
+    from c64.pla_logic import PLA_LOGIC_FILE
+    from c64.sid import SID
+    from c64.vic import VIC
+
+    with _in_c64_directory():
+        memspace = C64PLA(memspace_size=1024 * 64, fill_vals=0x00, verbose=False,
+                          vic=VIC(name="VIC"), cia1=CIA(name="CIA1"), cia2=CIA(name="CIA2"), sid=SID(name="SID"),
+                          pla_logic_file=PLA_LOGIC_FILE)
+    cpu = CPU6502(mem_space=memspace)
+    memspace.register_with_cpu(cpu=cpu)
+
+    if cartridge is None:
+        memspace.EXROM = 1
+        memspace.GAME = 1
+    else:
+        # an 8K cartridge at $8000, started by the KERNAL from its CBM80 signature
+        memspace.map_cartridge(low=map_image(file_name=cartridge))
+        memspace.EXROM = 0
+        memspace.GAME = 1
+    cpu.reset()
+    return cpu
+
+
+def _run_c64_until_screen_shows(cpu: CPU6502, engine: str, max_cycles: int, text: str) -> Tuple[int, int, bool]:
+    """Run a frame at a time until text appears in screen RAM"""
+    wanted = screen_codes(text=text)
+    ram = cpu.mem_space.memory_data_ram
+    cycles = 0
+    instructions = 0
+    while cycles < max_cycles:
+        result = cpu.run_frames(frames=1, engine=engine)
+        cycles += result.cycles
+        instructions += result.instructions
+        if wanted in ram[C64_SCREEN_RAM:C64_SCREEN_RAM + C64_SCREEN_SIZE]:
+            return cycles, instructions, True
+    return cycles, instructions, False
+
+
+def _run_c64_boot(cpu: CPU6502, engine: str, max_cycles: int) -> Tuple[int, int, bool]:
+    return _run_c64_until_screen_shows(cpu=cpu, engine=engine, max_cycles=max_cycles, text="READY.")
+
+
+def _run_diag(cpu: CPU6502, engine: str, max_cycles: int) -> Tuple[int, int, bool]:
+    # the last of the tests that can pass without a harness plugged in
+    return _run_c64_until_screen_shows(cpu=cpu, engine=engine, max_cycles=max_cycles, text="CHARAC ROM   OK")
+
+
+WORKLOADS: Dict[str, Workload] = {
+    workload.name: workload for workload in (
+        Workload(name="functional", setup=_setup_functional, run=_run_functional, max_cycles=200_000_000),
+        Workload(name="decimal", setup=_setup_decimal, run=_run_decimal, max_cycles=100_000_000),
+        Workload(name="c64_boot", setup=lambda: _make_c64(), run=_run_c64_boot, max_cycles=500 * PAL_FRAME_CYCLES),
+        Workload(name="diag", setup=lambda: _make_c64(cartridge=DIAG_CARTRIDGE_FILE), run=_run_diag,
+                 max_cycles=3000 * PAL_FRAME_CYCLES),
+    )
+}
+
+
+def peak_memory_kb() -> Optional[int]:
+    """Peak resident set size of this process, where the platform reports one"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(workload: Workload, engine: str, max_cycles: Optional[int] = None) -> BenchmarkResult:
+    """Run workload in this process; setting it up is not timed"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine [{engine}]")
+
+    cpu = workload.setup()
+    start = time.perf_counter()
+    cycles, instructions, completed = workload.run(cpu, engine, max_cycles or workload.max_cycles)
+    seconds = time.perf_counter() - start
+
+    return BenchmarkResult(workload=workload.name, engine=engine, completed=completed,
+                           cycles=cycles, instructions=instructions, seconds=round(seconds, 3),
+                           cycles_per_second=round(cycles / seconds),
+                           instructions_per_second=round(instructions / seconds),
+                           emulated_mhz=round(cycles / seconds / 1e6, 4),
+                           c64_speed=round(cycles / seconds / C64_CLOCK_HZ, 4),
+                           peak_memory_kb=peak_memory_kb())
+
+
+def measure_in_subprocess(workload: str, engine: str, max_cycles: Optional[int] = None) -> BenchmarkResult:
+    command = [sys.executable, os.path.abspath(__file__), "--measure", workload, engine]
+    if max_cycles is not None:
+        command += ["--max-cycles", str(max_cycles)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True, cwd=ROOT_DIRECTORY).stdout
+    return BenchmarkResult(**json.loads(output))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True,
+                              cwd=ROOT_DIRECTORY).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(workloads: List[str], engines: List[str], repeat: int = 1,
+                   max_cycles: Optional[int] = None) -> dict:
+    """Every workload on every engine, keeping the fastest of repeat runs"""
+    results = []
+    for name in workloads:
+        for engine in engines:
+            runs = [measure_in_subprocess(workload=name, engine=engine, max_cycles=max_cycles) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run.seconds)
+            print(f"{name:<12} {engine:<11} {best.emulated_mhz:>8.3f} MHz  {best.instructions_per_second:>10,} ips  "
+                  f"{best.peak_memory_kb or 0:>8,} KB  {'' if best.completed else 'INCOMPLETE'}", file=sys.stderr)
+            results.append(asdict(best))
+
+    return {
+        "commit": _git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare_results(before: dict, after: dict) -> List[Tuple[str, str, float, float, float, bool]]:
+    """
+    (workload, engine, MHz before, MHz after, speedup, same work) for every
+    run in both result sets. The work differs when the two runs took
+    different numbers of cycles, as when one stopped short or timing changed.
+    """
+    before_runs = {(run["workload"], run["engine"]): run for run in before["results"]}
+    comparison = []
+    for run in after["results"]:
+        key = (run["workload"], run["engine"])
+        if key in before_runs:
+            old = before_runs[key]
+            comparison.append((*key, old["emulated_mhz"], run["emulated_mhz"],
+                               run["cycles_per_second"] / old["cycles_per_second"],
+                               (old["cycles"], old["completed"]) == (run["cycles"], run["completed"])))
+    return comparison
+
+
+def _format_comparison(before: dict, after: dict) -> str:
+    lines = [f"{'workload':<12} {'engine':<11} {before.get('commit') or 'before':>10} "
+             f"{after.get('commit') or 'after':>10}  speedup"]
+    for workload, engine, old, new, speedup, same_work in compare_results(before=before, after=after):
+        lines.append(f"{workload:<12} {engine:<11} {old:>10.3f} {new:>10.3f}  {speedup:>6.2f}x"
+                     f"{'' if same_work else '  (different work)'}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure emulated cycles and instructions per second")
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(DEFAULT_ENGINES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each, the fastest kept")
+    parser.add_argument("--max-cycles", type=int, default=None,
+                        help="stop every workload after this many cycles, for a quick comparison")
+    parser.add_argument("--output", default=None, help="JSON file for the results (stdout if not given)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    parser.add_argument("--measure", nargs=2, metavar=("WORKLOAD", "ENGINE"), help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.measure:
+        workload_name, engine_name = arguments.measure
+        print(json.dumps(asdict(measure(workload=WORKLOADS[workload_name], engine=engine_name,
+                                        max_cycles=arguments.max_cycles))))
+    elif arguments.compare:
+        with open(arguments.compare[0]) as before_file, open(arguments.compare[1]) as after_file:
+            print(_format_comparison(before=json.load(before_file), after=json.load(after_file)))
+    else:
+        report = run_benchmarks(workloads=arguments.workloads, engines=arguments.engines, repeat=arguments.repeat,
+                                max_cycles=arguments.max_cycles)
+        if arguments.output is None:
+            print(json.dumps(report, indent=2))
+        else:
+            with open(arguments.output, "w") as file:
+                json.dump(report, file, indent=2)
@@ -0,0 +1,57 @@
+diag_jmp_table = {
+    0x97B8: "output timer values					",
+    0x83C5: "output \"BAD\" at corresponding ramchip ",
+    0x828D: "screen ram (0400) test                ",
+    0x830D: "do ram test 1                         ",
+    0x8528: "do RAM TEST2                          ",
+    0x8765: "do PLA TEST                           ",
+    0x8888: "COLOR RAM test                        ",
+    0x890E: "KERNAL/BASIC/CHARAC ROM test          ",
+    0x8A44: "CASSETTE test                         ",
+    0x8B0F: "KEYBOARD                              ",
+    0x8BC3: "CONTROL PORT (joystick)               ",
+    0x8CFB: "SERIAL PORT TEST                      ",
+    0x8DCD: "USER PORT TEST                        ",
+    0x8F7C: "TIMER 1A                              ",
+    0x8FCA: " B                                    ",
+    0x9018: "TIMER 2A ... jani                     ",
+    0x9066: " B                                    ",
+    0x9242: "INTERRUPT                             ",
+    0x9593: "SOUND TEST                            ",
+    0x1857: "PRINT BAD                           ",
+    0x8348: "fill mem                            ",
+    0x8389: "delay                            ",
+    0x8366: "do test                           ",
+    0x83AA: "ram test 1 \"BAD\"                         ",
+    0x84BC: "U21 \"BAD\"                         ",
+    0x9492: "6526 U2 \"BAD\"                         ",
+    0x94A4: "6526 U1 \"BAD\"                         ",
+
+}
+
+diag_jmp_table2 = {
+    0x814A: "test stack memory",
+    0x1334: "PLA test",
+    0x1336: "PLA test",
+    0x9916: "RED ERROR BORDER",
+    0x80F2: "mem test pattern",
+    0x8218: "ram test",
+    0x821A: "ram test 1",
+    0x1255: "ram test 2",
+    0x932D: "update timer AM        ",
+    0x83EF: "color ram test         ",
+    0x83F1: "color ram test         ",
+    0x843B: "rom check test         ",
+    0x843E: "rom check test         ",
+    0x84AD: "casette test           ",
+    0x8529: "key port test          ",
+    0x85DE: "control port test      ",
+    0x86E1: "serial port test       ",
+    0x8772: "user port test         ",
+    0x88A0: "timer 1 a test         ",
+    0x88E0: "timer 1 b test         ",
+    0x8920: "timer 2 a test         ",
+    0x8960: "timer 2 b test         ",
+    0x8AAA: "interrupt test         ",
+    0x9299: "sound test             ",
+}
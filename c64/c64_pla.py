@@ -1,7 +1,8 @@
 from c64.cia import CIA
+from c64.pla_logic import SOURCE_IO, SOURCE_RAM, SOURCE_ROMH, load_bank_map
 from c64.sid import SID
-from c64.vic import VIC
-from simple_memory_space import AddressDecoder
+from c64.vic import VIC, VIC_REGISTERS_SIZE
+from simple_memory_space import AddressDecoder, map_image
 
 rom_memory_map = {
     "page0_15": {
@@ -102,6 +103,17 @@ screen_map = {
 }
 
 
+# LORAM, HIRAM and CHAREN from the CPU port, GAME and EXROM from the expansion port
+BANK_MODES = 32
+PAGE_SIZE = 0x100
+
+# The I/O area and the colour RAM inside it get stores of their own size
+IO_START = 0xD000
+IO_SIZE = 0x1000
+COLOUR_RAM_START = 0xD800
+COLOUR_RAM_SIZE = 0x400
+
+
 def read_binary_file(file_name: str):
     file = open(file_name, "rb")
     binary_data = file.read()
@@ -112,29 +124,99 @@ def read_binary_file(file_name: str):
 class C64PLA(AddressDecoder):
 
     def __init__(self, memspace_size, fill_vals=0x00, verbose=True,
-                 vic=None, cia1=None, cia2=None, sid=None):
+                 vic=None, cia1=None, cia2=None, sid=None, pla_logic_file=None):
+        super().__init__()
         self.verbose = verbose
+        # Banking from the 82S100 truth table when given one, else bank_target()
+        self.pla_bank_map = None if pla_logic_file is None else load_bank_map(file_name=pla_logic_file)
         self.cpu = None
 
         self.cpu_port_byte = 0b11111
-        self.memory_data_ram = ([fill_vals] * memspace_size)
-        self.memory_data_rom = ([fill_vals] * memspace_size)
-        self.memory_data_io = ([fill_vals] * memspace_size)
+        self.memory_data_ram = bytearray((fill_vals,)) * memspace_size
+        self.ram_pages = self._pages(memory=self.memory_data_ram)
+        # Chip registers for $D000-$DFFF, indexed from IO_START
+        self.memory_data_io = bytearray((fill_vals,)) * IO_SIZE
+        # Colour RAM is 1K x 4 bits, one nibble per byte, indexed from COLOUR_RAM_START
+        self.colour_ram = bytearray((fill_vals & 0x0F,)) * COLOUR_RAM_SIZE
+        # Zero page and stack are RAM in every banking mode
+        self.direct_ram = self.memory_data_ram
+
+        # ROM is read straight out of the memory-mapped images, a 256-byte view
+        # per page; pages with no image behind them read as fill_vals
+        self.rom_images = {}
+        self.open_bus_page = memoryview(bytes((fill_vals,)) * 256)
+        self.rom_pages = [self.open_bus_page] * 256
+        # ROMH of a cartridge, seen at $A000 or, in Ultimax mode, at $E000
+        self.cartridge_high_pages = [self.open_bus_page] * 0x20
+
+        self.io_pages = [self.open_bus_page] * 256
+        for offset, view in enumerate(self._pages(memory=self.memory_data_io)):
+            self.io_pages[(IO_START >> 8) + offset] = view
 
         self.vic = vic
         if self.vic is not None:
             self.vic.addressable_memory = self.memory_data_ram
+            self.vic.registers = memoryview(self.memory_data_io)[:VIC_REGISTERS_SIZE]
         self.cia1 = cia1
         self.cia2 = cia2
         self.sid = sid
-        self.EXROM = 1
-        self.GAME = 1
+
+        self._exrom = 1
+        self._game = 1
+
+        # Per-page read and write targets for every banking mode, built once;
+        # bank_switched() picks the active set when $0001, GAME or EXROM change
+        self.bank_read_tables = None
+        self.bank_write_tables = None
+        self.bank_read_handler_tables = None
+        self.bank_write_handler_tables = None
+        self.bank_mode = None
+        self.read_pages = None
+        self.write_pages = None
+        self.read_handlers = None
+        self.write_handlers = None
+
+        # The chips' registers repeat through their I/O ranges. Until a chip
+        # registers handlers of its own its registers are kept in
+        # memory_data_io, and it is synchronised before every access.
+        for device_id, device, mirror in (("VICII", vic, 0x40), ("SID", sid, 0x20),
+                                          ("CIA1", cia1, 0x10), ("CIA2", cia2, 0x10)):
+            if device is not None:
+                self.register_io_handler(start=io_memory_map[device_id]["start"], end=io_memory_map[device_id]["end"],
+                                         read=self._chip_reader(device=device), write=self._chip_writer(device=device),
+                                         mirror=mirror)
+        self.register_io_handler(start=io_memory_map["colour_ram"]["start"], end=io_memory_map["colour_ram"]["end"],
+                                 read=self.read_colour_ram, write=self.write_colour_ram)
 
         for mem_space_id, mem_space in rom_memory_map.items():
             if "file" in mem_space:
-                data = read_binary_file(file_name=mem_space["file"])
-                start = mem_space["start"]
-                self.memory_data_rom[start:start + len(data)] = data
+                self.map_rom(name=mem_space_id, start=mem_space["start"], image=map_image(file_name=mem_space["file"]))
+
+        self.build_bank_tables()
+        self.select_bank_mode()
+
+    @staticmethod
+    def _pages(memory: bytearray):
+        view = memoryview(memory)
+        return [view[page * PAGE_SIZE:(page + 1) * PAGE_SIZE] for page in range(len(memory) // PAGE_SIZE)]
+
+    @property
+    def GAME(self) -> int:
+        return self._game
+
+    @GAME.setter
+    def GAME(self, value: int) -> None:
+        self._game = value
+        self.bank_switched()
+
+    @property
+    def EXROM(self) -> int:
+        return self._exrom
+
+    @EXROM.setter
+    def EXROM(self, value: int) -> None:
+        self._exrom = value
+        self.bank_switched()
 
     def register_with_cpu(self, cpu):
         self.cpu = cpu
@@ -142,6 +224,168 @@ class C64PLA(AddressDecoder):
         self.write_byte(address=0x0001, byte=0b111)  # set the C64 output port defaults
         self.cpu_port_byte = self.memory_data_ram[0x0001]
 
+        # the chips run off the CPU's event scheduler rather than a per-cycle tick
+        for device in (self.vic, self.cia1, self.cia2, self.sid):
+            if device is not None:
+                device.attach_scheduler(scheduler=cpu.scheduler)
+
+    def map_rom(self, name: str, start: int, image: memoryview) -> None:
+        """Use image, e.g. from map_image(), as the ROM from start onwards"""
+        self.rom_images[name] = image
+        for offset in range(0, len(image) - len(image) % 256, 256):
+            self.rom_pages[(start + offset) >> 8] = image[offset:offset + 256]
+        if self.bank_read_tables is not None:
+            self.build_bank_tables()
+            self.bank_mode = None
+            self.select_bank_mode()
+        self.invalidate_code(start=start, end=start + len(image))
+
+    def map_cartridge(self, low=None, high=None) -> None:
+        """Plug in cartridge ROML ($8000) and ROMH images; banked by GAME and EXROM"""
+        if high is not None:
+            self.rom_images["cartridge_high"] = high
+            for offset in range(0, min(len(high), 0x2000) // 256 * 256, 256):
+                self.cartridge_high_pages[offset >> 8] = high[offset:offset + 256]
+            self.invalidate_code(start=0xA000, end=0xC000)
+            self.invalidate_code(start=0xE000, end=0x10000)
+        if low is not None:
+            self.map_rom(name="cartridge_low", start=0x8000, image=low)
+        elif self.bank_read_tables is not None:
+            self.build_bank_tables()
+            self.bank_mode = None
+            self.select_bank_mode()
+
+    def build_bank_tables(self) -> None:
+        if self.pla_bank_map is not None:
+            self.build_bank_tables_from_pla()
+            return
+
+        self.bank_read_tables = []
+        self.bank_write_tables = []
+        self.bank_read_handler_tables = []
+        self.bank_write_handler_tables = []
+        for mode in range(BANK_MODES):
+            read_pages = []
+            write_pages = []
+            read_handlers = []
+            write_handlers = []
+            for page in range(256):
+                target, readonly = self.bank_target(control_port=mode, address=page * PAGE_SIZE)
+                if target is self.rom_pages:
+                    view = self.rom_pages[page]
+                elif target is self.memory_data_io:
+                    view = self.io_pages[page]
+                else:
+                    view = self.ram_pages[page]
+                read_pages.append(view)
+                write_pages.append(None if readonly else view)
+                io = target is self.memory_data_io
+                read_handlers.append(self.page_read_handlers[page] if io else None)
+                write_handlers.append(self.page_write_handlers[page] if io else None)
+
+            self.bank_read_tables.append(read_pages)
+            self.bank_write_tables.append(write_pages)
+            self.bank_read_handler_tables.append(read_handlers)
+            self.bank_write_handler_tables.append(write_handlers)
+
+    def _source_page(self, source, page):
+        if source == SOURCE_RAM:
+            return self.ram_pages[page]
+        if source == SOURCE_IO:
+            return self.io_pages[page]
+        if source == SOURCE_ROMH:
+            return self.cartridge_high_pages[page & 0x1F]
+        if source is None:
+            return self.open_bus_page
+        return self.rom_pages[page]  # BASIC, KERNAL, character ROM and ROML sit at their own addresses
+
+    def build_bank_tables_from_pla(self) -> None:
+        self.bank_read_tables = []
+        self.bank_write_tables = []
+        self.bank_read_handler_tables = []
+        self.bank_write_handler_tables = []
+        for mode in range(BANK_MODES):
+            read_pages = []
+            write_pages = []
+            read_handlers = []
+            write_handlers = []
+            for page in range(256):
+                read_source, write_source = self.pla_bank_map[mode][page >> 4]
+                read_pages.append(self._source_page(source=read_source, page=page))
+                # writes that select a ROM, or nothing, are lost
+                write_pages.append(self._source_page(source=write_source, page=page)
+                                   if write_source in (SOURCE_RAM, SOURCE_IO) else None)
+                read_handlers.append(self.page_read_handlers[page] if read_source == SOURCE_IO else None)
+                write_handlers.append(self.page_write_handlers[page] if write_source == SOURCE_IO else None)
+
+            self.bank_read_tables.append(read_pages)
+            self.bank_write_tables.append(write_pages)
+            self.bank_read_handler_tables.append(read_handlers)
+            self.bank_write_handler_tables.append(write_handlers)
+
+    def io_handlers_changed(self) -> None:
+        if self.bank_read_tables is not None:
+            self.build_bank_tables()
+            self.bank_mode = None
+            self.select_bank_mode()
+
+    def _chip_reader(self, device):
+        registers = self.memory_data_io
+        # the VIC's raster counter is not in its register storage, so it answers reads itself
+        read_byte = device.read_byte if isinstance(device, VIC) else None
+
+        def read(address):
+            device.sync()
+            if self.verbose:
+                device.read_register(address=address)
+            if read_byte is not None:
+                return read_byte(address=address)
+            return registers[address - IO_START]
+
+        return read
+
+    def _chip_writer(self, device):
+        registers = self.memory_data_io
+
+        def write(address, byte):
+            device.sync()
+            registers[address - IO_START] = byte
+            if self.verbose:
+                device.write_register(address=address, word=byte)
+
+        return write
+
+    def read_io_register(self, address) -> int:
+        """The stored value of the chip register at address, without touching the chip"""
+        return self.memory_data_io[address - IO_START]
+
+    def write_io_register(self, address, byte) -> None:
+        self.memory_data_io[address - IO_START] = byte
+
+    def read_colour_ram(self, address) -> int:
+        return self.colour_ram[address - COLOUR_RAM_START]
+
+    def write_colour_ram(self, address, byte) -> None:
+        # only the low nibble of colour RAM is fitted
+        self.colour_ram[address - COLOUR_RAM_START] = byte & 0x0F
+
+    def colour_ram_view(self, start: int, end: int) -> memoryview:
+        """A live view of colour RAM [start, end), addresses from $D800"""
+        return memoryview(self.colour_ram)[start - COLOUR_RAM_START:end - COLOUR_RAM_START]
+
+    def select_bank_mode(self) -> bool:
+        """Switch to the page tables for the current control port; True if they changed"""
+        mode = self.control_port()
+        if mode == self.bank_mode:
+            return False
+
+        self.bank_mode = mode
+        self.read_pages = self.bank_read_tables[mode]
+        self.write_pages = self.bank_write_tables[mode]
+        self.read_handlers = self.bank_read_handler_tables[mode]
+        self.write_handlers = self.bank_write_handler_tables[mode]
+        return True
+
     def set_data(self, start_address, data):
         pass
 
@@ -156,76 +400,6 @@ class C64PLA(AddressDecoder):
         else:
             pass
 
-    def _check_device(self, address, read_or_write, word=None):
-
-        # in_VICII_range = io_memory_map['VICII']['start'] <= address <= io_memory_map['VICII']['end']
-        # if in_VICII_range:
-        #     if read_or_write == "write":
-        #         self.vic.write_register(address=address, word=word)
-        #     else:
-        #         self.vic.read_register(address=address)
-        #
-        #     return
-        #
-        # in_CIA1_range = io_memory_map['CIA1']['start'] <= address <= io_memory_map['CIA1']['end']
-        # if in_CIA1_range:
-        #     if read_or_write == "write":
-        #         self.cia1.write_register(address=address, word=word)
-        #     else:
-        #         self.cia1.read_register(address=address)
-        #
-        #     return
-        #
-        # in_CIA2_range = io_memory_map['CIA2']['start'] <= address <= io_memory_map['CIA2']['end']
-        # if in_CIA2_range:
-        #     if read_or_write == "write":
-        #         self.cia2.write_register(address=address, word=word)
-        #     else:
-        #         self.cia2.read_register(address=address)
-        #
-        #     return
-        #
-        # in_SID_range = io_memory_map['SID']['start'] <= address <= io_memory_map['SID']['end']
-        # if in_SID_range:
-        #     if read_or_write == "write":
-        #         self.sid.write_register(address=address, word=word)
-        #     else:
-        #         self.sid.read_register(address=address)
-        #
-        #     return
-        #
-        # if io_memory_map['IO1']['start'] <= address <= io_memory_map['IO1']['end']:
-        #     if address in io1_map:
-        #         print(f"{read_or_write} IO 1 {io1_map[address]} ")
-        #     else:
-        #         print(f"{read_or_write} IO 1 {hex(address)} ")
-        #
-        #     return
-        #
-        # elif io_memory_map['IO2']['start'] <= address <= io_memory_map['IO2']['end']:
-        #     if address in io2_map:
-        #         print(f"{read_or_write} IO 2 {io2_map[address]} ")
-        #     else:
-        #         print(f"{read_or_write} IO 2 {hex(address)} ")
-        #
-        #     return
-
-        if io_memory_map['colour_ram']['start'] <= address <= io_memory_map['colour_ram']['end']:
-            if address in color_ram_map:
-                print(f"{read_or_write} color RAM {color_ram_map[address]} ")
-            else:
-                print(f"{read_or_write} color RAM {hex(address)} ")
-
-            return
-
-        elif io_memory_map['SCREEN']['start'] <= address <= io_memory_map['SCREEN']['end']:
-            if address in screen_map:
-                print(f"{read_or_write} SCREEN {screen_map[address]} ")
-            else:
-                print(f"{read_or_write} SCREEN {hex(address)} ")
-
-            return
-
     #
     # def readdy(self, address):
     #     kBaseAddrBasic = 0xa000
@@ -304,7 +478,7 @@ class C64PLA(AddressDecoder):
 
 
 
-    def mem_select(self, address):
+    def control_port(self) -> int:
         control_port = self.memory_data_ram[0x0001] & 0x07
         if self.GAME == 1:
             control_port |= (1 << 3)
@@ -316,6 +490,12 @@ class C64PLA(AddressDecoder):
         else:
             control_port &= ~ (1 << 4)
 
+        return control_port
+
+    def mem_select(self, address):
+        return self.bank_target(control_port=self.control_port(), address=address)
+
+    def bank_target(self, control_port, address):
         #print(f"read: control_port [{control_port}]")
 
         # control_port &= ~ (1 << 3)
@@ -339,7 +519,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 2:
             if in_char_or_io_range or in_kernal_range or in_basic_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -347,7 +527,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 3:
             if in_char_or_io_range or in_kernal_range or in_basic_range or in_cart_low_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -363,7 +543,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 6:
             if in_kernal_range or in_basic_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             elif in_char_or_io_range:
                 target = self.memory_data_io
@@ -374,7 +554,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 7:
             if in_kernal_range or in_basic_range or in_cart_low_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             elif in_char_or_io_range:
                 target = self.memory_data_io
@@ -385,7 +565,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 9 or control_port == 25:
             if in_char_or_io_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -393,7 +573,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 10 or control_port == 26:
             if in_char_or_io_range or in_kernal_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -401,7 +581,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 11:
             if in_kernal_range or in_basic_range or in_char_or_io_range or in_cart_low_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -412,7 +592,7 @@ class C64PLA(AddressDecoder):
                 target = self.memory_data_io
                 readonly = False
             elif in_kernal_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -423,7 +603,7 @@ class C64PLA(AddressDecoder):
                 target = self.memory_data_io
                 readonly = False
             elif in_kernal_range or in_basic_range or in_cart_low_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -438,7 +618,7 @@ class C64PLA(AddressDecoder):
                 target = self.memory_data_io
                 readonly = False
             elif in_kernal_range or in_cart_low_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -446,7 +626,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 27:
             if in_basic_range or in_char_or_io_range or in_kernal_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -458,7 +638,7 @@ class C64PLA(AddressDecoder):
                 target = self.memory_data_io
                 readonly = False
             elif in_kernal_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             else:
                 target = self.memory_data_ram
@@ -466,7 +646,7 @@ class C64PLA(AddressDecoder):
 
         elif control_port == 31:
             if in_basic_range or in_kernal_range:
-                target = self.memory_data_rom
+                target = self.rom_pages
                 readonly = True
             elif in_char_or_io_range:
                 target = self.memory_data_io
@@ -481,11 +661,12 @@ class C64PLA(AddressDecoder):
         return target, readonly
 
     def read_byte(self, address):
-
-
-        #print(f"read: control_port [{control_port}]")
-        target, readonly = self.mem_select(address=address)
-        return target[address]
+        handlers = self.read_handlers[address >> 8]
+        if handlers is not None:
+            handler = handlers[address & 0xFF]
+            if handler is not None:
+                return handler(address)
+        return self.read_pages[address >> 8][address & 0xFF]
 
         # kLORAM = 1 << 0
         # kHIRAM = 1 << 1
@@ -530,12 +711,48 @@ class C64PLA(AddressDecoder):
         #
         # return self.memory_data_ram[address]
 
-    def write_byte(self, address, byte) -> None:
+    def bank_switched(self) -> None:
+        if self.bank_read_tables is None:
+            return
+
+        old_read_pages, old_read_handlers = self.read_pages, self.read_handlers
+        if not self.select_bank_mode():
+            return
 
-        #print(f"write: control_port [{byte}]")
-        target, readonly = self.mem_select(address=address)
-        if not readonly:
-            target[address] = byte
+        # Ultimax mode changes $1000-$7FFF too, so compare every page rather than assume a range
+        start = None
+        for page in range(0x101):
+            changed = page < 0x100 and (self.read_pages[page] is not old_read_pages[page]
+                                        or self.read_handlers[page] is not old_read_handlers[page])
+            if changed and start is None:
+                start = page
+            elif not changed and start is not None:
+                self.invalidate_code(start=start << 8, end=page << 8)
+                start = None
+
+    def write_byte(self, address, byte) -> None:
+        page = address >> 8
+        handlers = self.write_handlers[page]
+        if handlers is not None:
+            handler = handlers[address & 0xFF]
+            if handler is not None:
+                handler(address, byte)
+                return
+
+        target = self.write_pages[page]
+        if target is None:
+            return  # ROM
+
+        offset = address & 0xFF
+        if address == 0x0001:
+            if target[offset] != byte:
+                target[offset] = byte
+                self.bank_switched()
+        elif self.code_pages[page] and target[offset] != byte:
+            target[offset] = byte
+            self.code_invalidator(address, address + 1)
+        else:
+            target[offset] = byte
 
         # kLORAM = 1 << 0
         # kHIRAM = 1 << 1
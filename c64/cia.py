@@ -1,3 +1,5 @@
+from scheduler import CatchUpDevice
+
 
 cia_register_lookup = {
     0xDC00: "Data Port A",
@@ -36,9 +38,10 @@ cia_register_lookup = {
 }
 
 
-class CIA:
+class CIA(CatchUpDevice):
 
     def __init__(self, name: str):
+        super().__init__()
         self.name = name
 
     def tick(self):
@@ -1,222 +1,300 @@
-from dataclasses import dataclass
-
-
-@dataclass
-class PLAInputs:
-    CAS = 0
-    LORAM = 0
-    HIRAM = 0
-    CHAREN = 0
-    VA14 = 0
-    A15 = 0
-    A14 = 0
-    A13 = 0
-    A12 = 0
-    BA = 0
-    AEC = 0
-    R_W = 0
-    EXROM = 0
-    GAME = 0
-    VA13 = 0
-    VA12 = 0
-
-
-def BASIC(pla_inputs: PLAInputs):
-    return not pla_inputs.LORAM or not pla_inputs.HIRAM or not pla_inputs.A15 or pla_inputs.A14 or\
-           not pla_inputs.A13 or \
-           pla_inputs.AEC or not pla_inputs.R_W or not pla_inputs.GAME
-
-
-def KERNAL(pla_inputs: PLAInputs):
-    return ((not pla_inputs.HIRAM or not pla_inputs.A15 or not pla_inputs.A14 or not pla_inputs.A13 or pla_inputs.AEC or
-             not pla_inputs.R_W or not pla_inputs.GAME) and
-            (not pla_inputs.HIRAM or not pla_inputs.A15 or not pla_inputs.A14 or not pla_inputs.A13 or pla_inputs.AEC or
-             not pla_inputs.R_W or pla_inputs.EXROM or pla_inputs.GAME))
-
-
-def CHAROM(pla_inputs: PLAInputs):
-    return ((not pla_inputs.HIRAM or pla_inputs.CHAREN or not pla_inputs.A15 or not pla_inputs.A14 or pla_inputs.A13 or
-             not pla_inputs.A12 or pla_inputs.AEC or not pla_inputs.R_W or not pla_inputs.GAME) and
-            (not pla_inputs.LORAM or pla_inputs.CHAREN or not pla_inputs.A15 or not pla_inputs.A14 or pla_inputs.A13 or
-             not pla_inputs.A12 or pla_inputs.AEC or not pla_inputs.R_W or not pla_inputs.GAME) and
-            (not pla_inputs.HIRAM or pla_inputs.CHAREN or not pla_inputs.A15 or not pla_inputs.A14 or pla_inputs.A13 or
-             not pla_inputs.A12 or pla_inputs.AEC or not pla_inputs.R_W or pla_inputs.EXROM or pla_inputs.GAME) and
-            (not pla_inputs.VA14 or not pla_inputs.AEC or not pla_inputs.GAME or pla_inputs.VA13 or
-             not pla_inputs.VA12) and
-            (not pla_inputs.VA14 or not pla_inputs.AEC or pla_inputs.EXROM or pla_inputs.GAME or pla_inputs.VA13 or
-             not pla_inputs.VA12))
-
-
-def Ival(b, i_):
-    return ~~(i_ & (1 << b))
+import hashlib
+import inspect
+import os
+import sys
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Next to this module whatever the working directory. The module imports nothing else from the repo, so
+# python c64/pla_logic.py works as well as python -m c64.pla_logic
+PLA_LOGIC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "c64_pla_logic.bin")
+
+# Inputs: bit positions in the truth table index, which set each input's Signal rows in input_signal()
+PLA_VA12 = 1 << 0
+PLA_CAS = 1 << 1
+PLA_LORAM = 1 << 2
+PLA_HIRAM = 1 << 3
+PLA_CHAREN = 1 << 4
+PLA_VA14 = 1 << 5
+PLA_A15 = 1 << 6
+PLA_A14 = 1 << 7
+PLA_AEC = 1 << 8
+PLA_R_W = 1 << 9
+PLA_VA13 = 1 << 10
+PLA_EXROM = 1 << 11
+PLA_A13 = 1 << 12
+PLA_BA = 1 << 13
+PLA_A12 = 1 << 14
+PLA_GAME = 1 << 15
+
+# Outputs: bits of a truth table entry, all active low
+PLA_ROML = 1 << 0
+PLA_IO = 1 << 1
+PLA_GRW = 1 << 2
+PLA_CHAROM = 1 << 3
+PLA_KERNAL = 1 << 4
+PLA_BASIC = 1 << 5
+PLA_CASRAM = 1 << 6
+PLA_ROMH = 1 << 7
+
+# What a CPU access ends up at, as decoded from the outputs
+SOURCE_RAM = "ram"
+SOURCE_IO = "io"
+SOURCE_BASIC = "basic"
+SOURCE_KERNAL = "kernal"
+SOURCE_CHAROM = "charom"
+SOURCE_ROML = "roml"
+SOURCE_ROMH = "romh"
+
+BankMap = Tuple[Tuple[Tuple[Optional[str], Optional[str]], ...], ...]
+
+
+def pla_index(bank_mode: int, address: int, read: bool) -> int:
+    """
+    Truth table index of a CPU access (VIC-II off the bus, no bad line) to
+    address in a bank mode: LORAM, HIRAM, CHAREN, GAME and EXROM in bits 0-4
+    """
+    index = PLA_BA
+    for bit, line in enumerate((PLA_LORAM, PLA_HIRAM, PLA_CHAREN, PLA_GAME, PLA_EXROM)):
+        if bank_mode & (1 << bit):
+            index |= line
+    for bit, line in zip((15, 14, 13, 12), (PLA_A15, PLA_A14, PLA_A13, PLA_A12)):
+        if address & (1 << bit):
+            index |= line
+    if read:
+        index |= PLA_R_W
+    return index
+
+
+def pla_source(outputs: int) -> Optional[str]:
+    """The chip selected by a truth table entry, or None for open bus"""
+    for line, source in ((PLA_IO, SOURCE_IO), (PLA_BASIC, SOURCE_BASIC), (PLA_KERNAL, SOURCE_KERNAL),
+                         (PLA_CHAROM, SOURCE_CHAROM), (PLA_ROML, SOURCE_ROML), (PLA_ROMH, SOURCE_ROMH),
+                         (PLA_CASRAM, SOURCE_RAM)):
+        if not outputs & line:
+            return source
+    return None
+
+
+@lru_cache(maxsize=None)
+def load_bank_map(file_name: str = PLA_LOGIC_FILE) -> BankMap:
+    """
+    (read, write) source of every 4K block in all 32 bank modes, decoded from
+    the truth table. Loaded once per file and shared by every C64PLA.
+    """
+    with open(file_name, "rb") as file:
+        truth_table = file.read()
+    return tuple(
+        tuple((pla_source(outputs=truth_table[pla_index(bank_mode=mode, address=block << 12, read=True)]),
+               pla_source(outputs=truth_table[pla_index(bank_mode=mode, address=block << 12, read=False)]))
+              for block in range(16))
+        for mode in range(32))
+
+
+TRUTH_TABLE_INPUTS = 1 << 16
+_ALL_ROWS = (1 << TRUTH_TABLE_INPUTS) - 1
+
+
+class Signal:
+    """
+    One PLA signal over every input combination at once: bit i is the
+    signal's level for truth table row i. &, | and ~ evaluate a term for all
+    65,536 rows in one big-integer operation, with the same precedence as
+    and, or and not.
+    """
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: int):
+        self.rows = rows
+
+    def __and__(self, other: "Signal") -> "Signal":
+        return Signal(self.rows & other.rows)
+
+    def __or__(self, other: "Signal") -> "Signal":
+        return Signal(self.rows | other.rows)
+
+    def __invert__(self) -> "Signal":
+        return Signal(self.rows ^ _ALL_ROWS)
+
+
+def input_signal(line: int) -> Signal:
+    """The rows in which an input line (one of the PLA_* input bits) is high"""
+    bit = line.bit_length() - 1
+    if bit < 3:
+        pattern = bytes(((0xAA, 0xCC, 0xF0)[bit],)) * (TRUTH_TABLE_INPUTS // 8)
+    else:
+        run = 1 << (bit - 3)
+        pattern = (bytes(run) + b"\xff" * run) * (TRUTH_TABLE_INPUTS // 8 // (2 * run))
+    return Signal(int.from_bytes(pattern, "little"))
+
+
+def pla_outputs(CAS_, LORAM_, HIRAM_, CHAREN_, VA14_, A15, A14, A13, A12, BA, AEC_, R_W_, EXROM_, GAME_,
+                VA13, VA12):
+    """The 82S100 equations; returns (F0 CASRAM_, F1 BASIC_, ... F7 ROMH_)"""
+
+    # /* CASRAM_ */
+    F0 = ((LORAM_ & HIRAM_ & A15 & ~A14 & A13 &
+           ~AEC_ & R_W_ & GAME_) |
+          (HIRAM_ & A15 & A14 & A13 &
+           ~AEC_ & R_W_ & GAME_) |
+          (HIRAM_ & A15 & A14 & A13 &
+           ~AEC_ & R_W_ & ~EXROM_ & ~GAME_) |
+          (HIRAM_ & ~CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & R_W_ & GAME_) |
+          (LORAM_ & ~CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & R_W_ & GAME_) |
+          (HIRAM_ & ~CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & R_W_ & ~EXROM_ & ~GAME_) |
+          (VA14_ & AEC_ & GAME_ & ~VA13 & VA12) |
+          (VA14_ & AEC_ & ~EXROM_ & ~GAME_ & ~VA13 & VA12) |
+          (HIRAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & BA & ~AEC_ & R_W_ & GAME_) |
+          (HIRAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & ~R_W_ & GAME_) |
+          (LORAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & BA & ~AEC_ & R_W_ & GAME_) |
+          (LORAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & ~R_W_ & GAME_) |
+          (HIRAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & BA & ~AEC_ & R_W_ & ~EXROM_ & ~GAME_) |
+          (HIRAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & ~R_W_ & ~EXROM_ & ~GAME_) |
+          (LORAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & BA & ~AEC_ & R_W_ & ~EXROM_ & ~GAME_) |
+          (LORAM_ & CHAREN_ & A15 & A14 & ~A13 &
+           A12 & ~AEC_ & ~R_W_ & ~EXROM_ & ~GAME_) |
+          (A15 & A14 & ~A13 & A12 & BA &
+           ~AEC_ & R_W_ & EXROM_ & ~GAME_) |
+          (A15 & A14 & ~A13 & A12 &
+           ~AEC_ & ~R_W_ & EXROM_ & ~GAME_) |
+          (LORAM_ & HIRAM_ & A15 & ~A14 & ~A13 &
+           ~AEC_ & R_W_ & ~EXROM_) |
+          (A15 & ~A14 & ~A13 & ~AEC_ & EXROM_ & ~GAME_) |
+          (HIRAM_ & A15 & ~A14 & A13 & ~AEC_ &
+           R_W_ & ~EXROM_ & ~GAME_) |
+          (A15 & A14 & A13 & ~AEC_ & EXROM_ & ~GAME_) |
+          (AEC_ & EXROM_ & ~GAME_ & VA13 & VA12) |
+          (~A15 & ~A14 & A12 & EXROM_ & ~GAME_) |
+          (~A15 & ~A14 & A13 & EXROM_ & ~GAME_) |
+          (~A15 & A14 & EXROM_ & ~GAME_) |
+          (A15 & ~A14 & A13 & EXROM_ & ~GAME_) |
+          (A15 & A14 & ~A13 & ~A12 & EXROM_ & ~GAME_) |
+          CAS_)
+
+    # /* BASIC_ */
+    F1 = (~LORAM_ | ~HIRAM_ | ~A15 | A14 | ~A13 | AEC_ | ~R_W_ | ~GAME_)
+
+    # /* KERNAL_ */
+    F2 = ((~HIRAM_ | ~A15 | ~A14 | ~A13 | AEC_ |
+           ~R_W_ | ~GAME_) &
+          (~HIRAM_ | ~A15 | ~A14 | ~A13 | AEC_ |
+           ~R_W_ | EXROM_ | GAME_))
+
+    # /* CHAROM_ */
+    F3 = ((~HIRAM_ | CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | ~R_W_ | ~GAME_) &
+          (~LORAM_ | CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | ~R_W_ | ~GAME_) &
+          (~HIRAM_ | CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | ~R_W_ | EXROM_ | GAME_) &
+          (~VA14_ | ~AEC_ | ~GAME_ | VA13 | ~VA12) &
+          (~VA14_ | ~AEC_ | EXROM_ | GAME_ | VA13 | ~VA12))
+
+    # /* GR/W */
+    F4 = (CAS_ | ~A15 | ~A14 | A13 | ~A12 | AEC_ | R_W_)
+
+    # /* I_O_ */
+    F5 = ((~HIRAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | ~BA | AEC_ | ~R_W_ | ~GAME_) &
+          (~HIRAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | R_W_ | ~GAME_) &
+          (~LORAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | ~BA | AEC_ | ~R_W_ | ~GAME_) &
+          (~LORAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | R_W_ | ~GAME_) &
+          (~HIRAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | ~BA | AEC_ | ~R_W_ | EXROM_ |
+           GAME_) &
+          (~HIRAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | R_W_ | EXROM_ | GAME_) &
+          (~LORAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | ~BA | AEC_ | ~R_W_ | EXROM_ |
+           GAME_) &
+          (~LORAM_ | ~CHAREN_ | ~A15 | ~A14 | A13 |
+           ~A12 | AEC_ | R_W_ | EXROM_ | GAME_) &
+          (~A15 | ~A14 | A13 | ~A12 | ~BA |
+           AEC_ | ~R_W_ | ~EXROM_ | GAME_) &
+          (~A15 | ~A14 | A13 | ~A12 | AEC_ |
+           R_W_ | ~EXROM_ | GAME_))
+
+    # /* ROML_ */
+    F6 = ((~LORAM_ | ~HIRAM_ | ~A15 | A14 | A13 |
+           AEC_ | ~R_W_ | EXROM_) &
+          (~A15 | A14 | A13 | AEC_ | ~EXROM_ | GAME_))
+
+    # /* ROMH_ */
+    F7 = ((~HIRAM_ | ~A15 | A14 | ~A13 |
+           AEC_ | ~R_W_ | EXROM_ | GAME_) &
+          (~A15 | ~A14 | ~A13 | AEC_ | ~EXROM_ | GAME_) &
+          (~AEC_ | ~EXROM_ | GAME_ | ~VA13 | ~VA12))
+
+    return F0, F1, F2, F3, F4, F5, F6, F7
+
+
+# Truth table entry bit of each of F0-F7
+OUTPUT_LINES = (PLA_CASRAM, PLA_BASIC, PLA_KERNAL, PLA_CHAROM, PLA_GRW, PLA_IO, PLA_ROML, PLA_ROMH)
+
+
+def generate_truth_table() -> bytes:
+    """
+    Every output for every input combination, one byte per row. The extra
+    last byte repeats row 0, as in the original generator's output file.
+    """
+    outputs = pla_outputs(CAS_=input_signal(PLA_CAS), LORAM_=input_signal(PLA_LORAM),
+                          HIRAM_=input_signal(PLA_HIRAM), CHAREN_=input_signal(PLA_CHAREN),
+                          VA14_=input_signal(PLA_VA14), A15=input_signal(PLA_A15), A14=input_signal(PLA_A14),
+                          A13=input_signal(PLA_A13), A12=input_signal(PLA_A12), BA=input_signal(PLA_BA),
+                          AEC_=input_signal(PLA_AEC), R_W_=input_signal(PLA_R_W), EXROM_=input_signal(PLA_EXROM),
+                          GAME_=input_signal(PLA_GAME), VA13=input_signal(PLA_VA13), VA12=input_signal(PLA_VA12))
+
+    # Turn the row bits of each output into its bit of every row's byte:
+    # spread[v] has bit j of v in byte j, then shifted up to the output's bit
+    spread = [int.from_bytes(bytes((value >> j) & 1 for j in range(8)), "little") for value in range(256)]
+    table = 0
+    for signal, line in zip(outputs, OUTPUT_LINES):
+        rows = signal.rows.to_bytes(TRUTH_TABLE_INPUTS // 8, "little")
+        expanded = b"".join(spread[value].to_bytes(8, "little") for value in rows)
+        table |= int.from_bytes(expanded, "little") * line
+
+    table = table.to_bytes(TRUTH_TABLE_INPUTS, "little")
+    return table + table[:1]
+
+
+def equations_hash() -> str:
+    """Hash of the equations, to tell whether a written table is still current"""
+    return hashlib.sha256(inspect.getsource(pla_outputs).encode()).hexdigest()
+
+
+def write_truth_table(file_name: str = PLA_LOGIC_FILE, force: bool = False) -> bool:
+    """
+    Write the truth table to file_name and the equations' hash next to it,
+    unless the file already matches the equations. Returns True if written.
+    """
+    hash_file_name = file_name + ".sha256"
+    current = equations_hash()
+    if not force and os.path.exists(file_name) and os.path.exists(hash_file_name):
+        with open(hash_file_name) as file:
+            if file.read().strip() == current:
+                return False
+
+    with open(file_name, "wb") as file:
+        file.write(generate_truth_table())
+    with open(hash_file_name, "w") as file:
+        file.write(current + "\n")
+    load_bank_map.cache_clear()
+    return True
 
 
 if __name__ == '__main__':
-
-    # /** The input combination, at least 16 bits */
-
-    i = -1
-
-    initial = True
-
-    logic_array = []
-
-    while True:
-        i += 1
-
-        CAS_ = Ival(1, i)
-        LORAM_ = Ival(2, i)
-        HIRAM_ = Ival(3, i)
-        CHAREN_ = Ival(4, i)
-        VA14_ = Ival(5, i)
-        A15 = Ival(6, i)
-        A14 = Ival(7, i)
-        A13 = Ival(12, i)
-        A12 = Ival(14, i)
-        BA = Ival(13, i)
-        AEC_ = Ival(8, i)
-        R_W_ = Ival(9, i)
-        EXROM_ = Ival(11, i)
-        GAME_ = Ival(15, i)
-        VA13 = Ival(10, i)
-        VA12 = Ival(0, i)
-
-        # /** @name The output signals. */
-
-        # /* CASRAM_ */
-        F0 = ((LORAM_ and HIRAM_ and A15 and not A14 and A13 and
-               not AEC_ and R_W_ and GAME_) or
-              (HIRAM_ and A15 and A14 and A13 and
-               not AEC_ and R_W_ and GAME_) or
-              (HIRAM_ and A15 and A14 and A13 and
-               not AEC_ and R_W_ and not EXROM_ and not GAME_) or
-              (HIRAM_ and not CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and R_W_ and GAME_) or
-              (LORAM_ and not CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and R_W_ and GAME_) or
-              (HIRAM_ and not CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and R_W_ and not EXROM_ and not GAME_) or
-              (VA14_ and AEC_ and GAME_ and not VA13 and VA12) or
-              (VA14_ and AEC_ and not EXROM_ and not GAME_ and not VA13 and VA12) or
-              (HIRAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and BA and not AEC_ and R_W_ and GAME_) or
-              (HIRAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and not R_W_ and GAME_) or
-              (LORAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and BA and not AEC_ and R_W_ and GAME_) or
-              (LORAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and not R_W_ and GAME_) or
-              (HIRAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and BA and not AEC_ and R_W_ and not EXROM_ and not GAME_) or
-              (HIRAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and not R_W_ and not EXROM_ and not GAME_) or
-              (LORAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and BA and not AEC_ and R_W_ and not EXROM_ and not GAME_) or
-              (LORAM_ and CHAREN_ and A15 and A14 and not A13 and
-               A12 and not AEC_ and not R_W_ and not EXROM_ and not GAME_) or
-              (A15 and A14 and not A13 and A12 and BA and
-               not AEC_ and R_W_ and EXROM_ and not GAME_) or
-              (A15 and A14 and not A13 and A12 and
-               not AEC_ and not R_W_ and EXROM_ and not GAME_) or
-              (LORAM_ and HIRAM_ and A15 and not A14 and not A13 and
-               not AEC_ and R_W_ and not EXROM_) or
-              (A15 and not A14 and not A13 and not AEC_ and EXROM_ and not GAME_) or
-              (HIRAM_ and A15 and not A14 and A13 and not AEC_ and
-               R_W_ and not EXROM_ and not GAME_) or
-              (A15 and A14 and A13 and not AEC_ and EXROM_ and not GAME_) or
-              (AEC_ and EXROM_ and not GAME_ and VA13 and VA12) or
-              (not A15 and not A14 and A12 and EXROM_ and not GAME_) or
-              (not A15 and not A14 and A13 and EXROM_ and not GAME_) or
-              (not A15 and A14 and EXROM_ and not GAME_) or
-              (A15 and not A14 and A13 and EXROM_ and not GAME_) or
-              (A15 and A14 and not A13 and not A12 and EXROM_ and not GAME_) or
-              CAS_)
-
-        # /* BASIC_ */
-
-        F1 = (not LORAM_ or not HIRAM_ or not A15 or A14 or not A13 or AEC_ or not R_W_ or not GAME_)
-
-        # /* KERNAL_ */
-        F2 = ((not HIRAM_ or not A15 or not A14 or not A13 or AEC_ or
-               not R_W_ or not GAME_) and
-              (not HIRAM_ or not A15 or not A14 or not A13 or AEC_ or
-               not R_W_ or EXROM_ or GAME_))
-
-        # /* CHAROM_ */
-        F3 = ((not HIRAM_ or CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or not R_W_ or not GAME_) and
-              (not LORAM_ or CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or not R_W_ or not GAME_) and
-              (not HIRAM_ or CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or not R_W_ or EXROM_ or GAME_) and
-              (not VA14_ or not AEC_ or not GAME_ or VA13 or not VA12) and
-              (not VA14_ or not AEC_ or EXROM_ or GAME_ or VA13 or not VA12))
-
-        # /* GR/W */
-        F4 = (CAS_ or not A15 or not A14 or A13 or not A12 or AEC_ or R_W_)
-
-        # /* I_O_ */
-        F5 = ((not HIRAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or not BA or AEC_ or not R_W_ or not GAME_) and
-              (not HIRAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or R_W_ or not GAME_) and
-              (not LORAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or not BA or AEC_ or not R_W_ or not GAME_) and
-              (not LORAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or R_W_ or not GAME_) and
-              (not HIRAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or not BA or AEC_ or not R_W_ or EXROM_ or
-               GAME_) and
-              (not HIRAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or R_W_ or EXROM_ or GAME_) and
-              (not LORAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or not BA or AEC_ or not R_W_ or EXROM_ or
-               GAME_) and
-              (not LORAM_ or not CHAREN_ or not A15 or not A14 or A13 or
-               not A12 or AEC_ or R_W_ or EXROM_ or GAME_) and
-              (not A15 or not A14 or A13 or not A12 or not BA or
-               AEC_ or not R_W_ or not EXROM_ or GAME_) and
-              (not A15 or not A14 or A13 or not A12 or AEC_ or
-               R_W_ or not EXROM_ or GAME_))
-
-        # /* ROML_ */
-        F6 = ((not LORAM_ or not HIRAM_ or not A15 or A14 or A13 or
-               AEC_ or not R_W_ or EXROM_) and
-              (not A15 or A14 or A13 or AEC_ or not EXROM_ or GAME_))
-
-        # /* ROMH_ */
-        F7 = ((not HIRAM_ or not A15 or A14 or not A13 or
-               AEC_ or not R_W_ or EXROM_ or GAME_) and
-              (not A15 or not A14 or not A13 or AEC_ or not EXROM_ or GAME_) and
-              (not AEC_ or not EXROM_ or GAME_ or not VA13 or not VA12))
-
-        o = 0
-
-        if F0:
-            o |= 1 << 6
-        if F1:
-            o |= 1 << 5
-        if F2:
-            o |= 1 << 4
-        if F3:
-            o |= 1 << 3
-        if F4:
-            o |= 1 << 2
-        if F5:
-            o |= 1 << 1
-        if F6:
-            o |= 1 << 0
-        if F7:
-            o |= 1 << 7
-
-        # print(o)
-        logic_array.append(o)
-        if i & 0xffff == 0 and not initial:
-            break
-        print(f"{i & 0xffff} {o}")
-
-        initial = False
-
-    file = open("c64_pla_logic.bin", "wb")
-    file.write(bytearray(logic_array))
-    file.close()
+    written = write_truth_table(force="--force" in sys.argv)
+    print(f"{PLA_LOGIC_FILE} {'written' if written else 'up to date'}")
@@ -87,8 +87,8 @@ class C64Screen:
         return starting_address + y * 40 + x
 
     def update(self):
-        background_color_code = self.mem_space.memory_data_io[53281]
-        border_color_code = self.mem_space.memory_data_io[53280]
+        background_color_code = self.mem_space.read_io_register(address=0xD021)
+        border_color_code = self.mem_space.read_io_register(address=0xD020)
 
         background_color = get_color(background_color_code)
         border_color = get_color(border_color_code)
@@ -104,14 +104,17 @@ class C64Screen:
 
         font = pygame.font.Font('C64_Pro_Mono-STYLE.ttf', 16)
 
+        # take the whole screen and colour RAM in one go rather than a cell at a time
+        screen_ram = self.mem_space.memory_data_ram[1024:1024 + 40 * 25]
+        colour_ram = self.mem_space.colour_ram_view(start=0xD800, end=0xD800 + 40 * 25)
+
         for x in range(40):
             for y in range(25):
-                mem_loc = self.screen_location_to_memory_location(x=x, y=y, starting_address=1024)
-                coloar_mem_loc = self.screen_location_to_memory_location(x=x, y=y, starting_address=0xD800)
-                screen_code = self.mem_space.memory_data_ram[mem_loc]
+                mem_loc = self.screen_location_to_memory_location(x=x, y=y, starting_address=0)
+                screen_code = screen_ram[mem_loc]
                 letter = self.screen_code_to_character(screen_code=screen_code)
 
-                color_code = self.mem_space.memory_data_io[coloar_mem_loc]
+                color_code = colour_ram[mem_loc]
                 color = get_color(color_code)
 
                 let = font.render(letter, True, color)
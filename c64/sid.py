@@ -1,4 +1,4 @@
-
+from scheduler import CatchUpDevice
 
 
 sid_register_lookup = {
@@ -42,9 +42,10 @@ sid_register_lookup = {
 }
 
 
-class SID:
+class SID(CatchUpDevice):
 
     def __init__(self, name: str):
+        super().__init__()
         self.name = name
 
     def tick(self):
@@ -1,5 +1,17 @@
 from enum import Enum
 
+from scheduler import CatchUpDevice
+
+PAL_RASTER_LINES = 312
+PAL_CYCLES_PER_LINE = 63
+
+VIC_BASE = 0xD000
+VIC_REGISTERS_SIZE = 0x40
+
+RASTER_REGISTER = 0xD012
+CONTROL_REGISTER_1 = 0xD011
+CONTROL_REGISTER_2 = 0xD016
+
 vicii_register_lookup = {
     0xD000: "Sprite 0 X-position",
     0xD001: "Sprite 0 Y-position",
@@ -71,16 +83,47 @@ class GraphicMode(Enum):
     IllegalMode = 5
 
 
-class VIC:
+class VIC(CatchUpDevice):
 
     def __init__(self, name: str, addressable_memory=None):
+        super().__init__()
         self.name = name
         self.addressable_memory = addressable_memory
         self.graphic_mode = GraphicMode.CharMode
+        # Register storage from VIC_BASE on, set by the PLA. It holds what the CPU wrote, so $D012 and
+        # bit 7 of $D011 are the raster compare latch; the raster counter is kept apart and only read back
+        self.registers = None
+        self.raster_line = 0
+        self.raster_cycle = 0
 
     def tick(self):
         pass
 
+    def catch_up(self, cycles: int) -> None:
+        lines, self.raster_cycle = divmod(self.raster_cycle + cycles, PAL_CYCLES_PER_LINE)
+        if lines:
+            self.raster_line = (self.raster_line + lines) % PAL_RASTER_LINES
+
+    def register(self, address: int) -> int:
+        """The stored value of the register at address ($D000-$D03F)"""
+        return self.registers[address - VIC_BASE]
+
+    def read_byte(self, address: int) -> int:
+        """What the CPU reads at address ($D000-$D03F): the raster counter in $D012 and bit 7 of $D011"""
+        if address == RASTER_REGISTER:
+            return self.raster_line & 0xFF
+        if address == CONTROL_REGISTER_1:
+            return (self.register(address=CONTROL_REGISTER_1) & 0x7F) | ((self.raster_line >> 1) & 0x80)
+        return self.register(address=address)
+
+    @property
+    def raster_compare(self) -> int:
+        """The line the raster interrupt is compared against, as written to $D012 and bit 7 of $D011"""
+        return self.register(address=RASTER_REGISTER) | ((self.register(address=CONTROL_REGISTER_1) & 0x80) << 1)
+
+    def set_register(self, address: int, byte: int) -> None:
+        self.registers[address - VIC_BASE] = byte
+
     def read_register(self, address):
         pass
 
@@ -111,9 +154,9 @@ class VIC:
 
     def set_graphic_mode(self):
 
-        ecm = ((self.addressable_memory[0xD011] & (1 << 6)) != 0)
-        bmm = ((self.addressable_memory[0xD011] & (1 << 5)) != 0)
-        mcm = ((self.addressable_memory[0xD016] & (1 << 4)) != 0)
+        ecm = ((self.register(address=CONTROL_REGISTER_1) & (1 << 6)) != 0)
+        bmm = ((self.register(address=CONTROL_REGISTER_1) & (1 << 5)) != 0)
+        mcm = ((self.register(address=CONTROL_REGISTER_2) & (1 << 4)) != 0)
 
         if not ecm and not bmm and not mcm:
             self.graphic_mode = GraphicMode.CharMode
@@ -1,21 +1,126 @@
+import struct
+import sys
 from copy import copy
-from typing import List, Callable
-
-from simple_memory_space import AddressDecoder
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from alu_tables import CV_FLAGS, KEEP_CARRY_FLAG, KEEP_CV_FLAGS, KEEP_NZ_FLAGS, KEEP_OVERFLOW_FLAG, \
+    LAZY_NEGATIVE_MASK, LAZY_ZERO_MASK, adc_binary_table, adc_decimal_table, nz_codes, nz_flags, sbc_binary_table, \
+    sbc_decimal_table
+from fused_engine import build_fused_table
+from profiler import CallProfiler, CycleProfiler
+from scheduler import EventScheduler
+from simple_memory_space import AddressDecoder, Watchpoint
+from trace_recorder import DEFAULT_CHUNK_RECORDS, DEFAULT_RING_CHUNKS, TraceRecorder, TraceWriter
+from translator import BlockTranslator
+
+
+CycleTasks = Tuple[Callable, ...]
+# called by the fused run loop with (cpu, pc, opcode) before each instruction
+# and (cpu, pc, opcode, cycles) after it
+InstructionHook = Callable[["CPU6502", int, int], None]
+FinishedHook = Callable[["CPU6502", int, int, int], None]
+
+# Cycles injected after the current instruction's own cycles (branch page
+# crossings, interrupt sequences). An interrupt sequence is five cycles, so this
+# leaves room for one queued behind a page-crossing branch.
+INJECTED_CYCLE_QUEUE_SIZE = 8
+
+ENGINE_TICK = "tick"
+ENGINE_FUSED = "fused"
+ENGINE_TRANSLATED = "translated"
+
+STOP_CYCLES = "cycles"
+STOP_PC = "pc"
+STOP_TRAP = "trap"
+STOP_BREAKPOINT = "breakpoint"
+STOP_WATCHPOINT = "watchpoint"
+
+# C64 PAL: 312 raster lines of 63 cycles
+PAL_FRAME_CYCLES = 312 * 63
+
+RW_READ = 1
+RW_WRITE = 0
+
+NEGATIVE_FLAG = 0b10000000
+OVERFLOW_FLAG = 0b01000000
+UNUSED_FLAG = 0b00100000
+BREAK_FLAG = 0b00010000
+DEC_MODE_FLAG = 0b00001000
+INT_DIS_FLAG = 0b00000100
+ZERO_FLAG = 0b00000010
+CARRY_FLAG = 0b00000001
+
+BYTE_MASK = 0xFF
+ADDR_MASK = 0xFFFF
+ADDR_HIGH_MASK = 0xFF00
+STACK_PAGE = 0x100
+
+# Fixed layout of CPU6502.export_state(): version, PC, A, X, Y, SP, SR, DB,
+# AB, temp address low/high, indirect address low/high, RW, jammed
+CPU_STATE_VERSION = 1
+CPU_STATE_RECORD = struct.Struct("<BHBBBBBHHBBBBBB")
+
+
+@dataclass
+class RunResult:
+    cycles: int
+    instructions: int
+    reason: str
+    # the Breakpoint or Watchpoint behind STOP_BREAKPOINT / STOP_WATCHPOINT
+    trigger: Optional[object] = None
+
+
+@dataclass(eq=False)
+class Breakpoint:
+    """Stop before the instruction at address, whenever condition(cpu), if given, holds"""
+    address: int
+    condition: Optional[Callable[["CPU6502"], bool]] = None
+    hits: int = 0
+
+    def hit(self, cpu: "CPU6502") -> bool:
+        if self.condition is not None and not self.condition(cpu):
+            return False
+        self.hits += 1
+        return True
+
+
+class CPUJammed(Exception):
+    """Raised when a KIL/JAM opcode locks up the CPU. Only reset() recovers it."""
+
+    def __init__(self, address: int, opcode: int):
+        super().__init__(f"CPU jammed by opcode [{hex(opcode)}] at [{hex(address)}]")
+        self.address = address
+        self.opcode = opcode
 
 
 class CPU6502:
-    RW_READ: int = 1
-    RW_WRITE: int = 0
-
-    NEGATIVE_FLAG = 0b10000000
-    OVERFLOW_FLAG = 0b01000000
-    UNUSED_FLAG = 0b00100000
-    BREAK_FLAG = 0b00010000
-    DEC_MODE_FLAG = 0b00001000
-    INT_DIS_FLAG = 0b00000100
-    ZERO_FLAG = 0b00000010
-    CARRY_FLAG = 0b00000001
+    __slots__ = (
+        "name", "reset_vector", "interrupt_vector", "NMI_vector",
+        "A", "X", "Y", "PC", "SP", "_sr", "_nz", "DB", "AB", "RW",
+        "program_counter_low_byte", "program_counter_high_byte",
+        "_temp_address_low_byte", "_temp_address_high_byte", "ind_eff_addr_low_byte", "ind_eff_addr_high_byte",
+        "_instruction_tick_counter", "current_instruction", "_instruction_cycles", "_cycle_index",
+        "_injected_cycles", "_injected_head", "_injected_count",
+        "external_devices", "scheduler", "mem_space", "translator", "pause", "jammed",
+        "breakpoints", "stop_trigger", "trace_recorder", "profiler", "call_profiler", "interrupts_taken"
+    )
+
+    RW_READ: int = RW_READ
+    RW_WRITE: int = RW_WRITE
+
+    NEGATIVE_FLAG = NEGATIVE_FLAG
+    OVERFLOW_FLAG = OVERFLOW_FLAG
+    UNUSED_FLAG = UNUSED_FLAG
+    BREAK_FLAG = BREAK_FLAG
+    DEC_MODE_FLAG = DEC_MODE_FLAG
+    INT_DIS_FLAG = INT_DIS_FLAG
+    ZERO_FLAG = ZERO_FLAG
+    CARRY_FLAG = CARRY_FLAG
+
+    byte_mask: int = BYTE_MASK
+    addr_mask: int = ADDR_MASK
+    addr_high_mask: int = ADDR_HIGH_MASK
 
     def __init__(self, mem_space: AddressDecoder):
         super().__init__()
@@ -29,15 +134,18 @@ class CPU6502:
         self.Y: int = 0x00  # Y register
         self.PC: int = 0x0000
         self.SP: int = 0xFF
-        self.stack = []
+        self.RW: int = RW_READ
 
         self.program_counter_low_byte: int = 0x00
         self.program_counter_high_byte: int = 0x00
 
         self._instruction_tick_counter: int = 0
         self.current_instruction = 0xEA
-        self._instruction_operand_address = [0x00, 0x00]
-        self._instruction_tasks: List[List[Callable]] = []
+        self._instruction_cycles: Tuple[CycleTasks, ...] = ()
+        self._cycle_index: int = 0
+        self._injected_cycles: List[CycleTasks] = [()] * INJECTED_CYCLE_QUEUE_SIZE
+        self._injected_head: int = 0
+        self._injected_count: int = 0
 
         self.DB: int = 0x00
         self.AB: int = 0x0000
@@ -46,50 +154,79 @@ class CPU6502:
         self.ind_eff_addr_low_byte: int = 0x00
         self.ind_eff_addr_high_byte: int = 0x00
 
-        self.byte_mask: int = ((1 << 8) - 1)
-        self.addr_mask: int = ((1 << 16) - 1)
-        self.addr_high_mask: int = (self.byte_mask << 8)
-
-        self.SR: int = 0b00000000  # status register
+        # Status register. N and Z are kept lazily as the last result (_nz, an
+        # NZ code from alu_tables), everything else in _sr; SR puts them together.
+        self._sr: int = 0b00000000
+        self._nz: int = 0x01
 
         self.external_devices = []
+        self.scheduler = EventScheduler()
 
         self.mem_space = mem_space
+        self.translator: Optional[BlockTranslator] = None
 
         self.pause = False
+        self.jammed = False
+
+        # PC breakpoints by address. Watchpoints live in the memory space;
+        # one that fires leaves itself in stop_trigger for the run loop.
+        self.breakpoints: Dict[int, Breakpoint] = {}
+        self.stop_trigger: Optional[Watchpoint] = None
+
+        self.trace_recorder: Optional[TraceRecorder] = None
+        self.profiler: Optional[CycleProfiler] = None
+        self.call_profiler: Optional[CallProfiler] = None
+        self.interrupts_taken = 0  # IRQ and NMI sequences run
 
     def register_external_device(self, external_device):
+        """
+        Call external_device.tick() on every cycle. This disables the fast paths
+        of the run loops; devices that only need to run at known cycles should
+        use the scheduler instead.
+        """
         self.external_devices.append(external_device)
 
     def irq(self):
-        self._instruction_tasks.append([push_program_counter_low_byte_to_stack,
-                                        decrement_stack_pointer])
-        self._instruction_tasks.append([push_program_counter_high_byte_to_stack,
-                                        decrement_stack_pointer])
-        self._instruction_tasks.append([push_proc_status_after_irq_to_stack, decrement_stack_pointer])
-
-        self._instruction_tasks.append([set_program_counter_to_interrupt_vector])  # WRONG this should take more cycles
-
-        self._instruction_tasks.append([set_flags_after_interrupt])
-
-        return
+        for cycle_tasks in irq_cycles:
+            self.inject_cycle(cycle_tasks=cycle_tasks)
 
     def nmi(self) -> None:
-        self._instruction_tasks.append([push_program_counter_low_byte_to_stack,
-                                        decrement_stack_pointer])
-        self._instruction_tasks.append([push_program_counter_high_byte_to_stack,
-                                        decrement_stack_pointer])
-        self._instruction_tasks.append([push_proc_status_after_irq_to_stack, decrement_stack_pointer])
-
-        self._instruction_tasks.append([set_program_counter_to_nmi_vector])  # WRONG this should take more cycles
-
-        self._instruction_tasks.append([set_flags_after_interrupt])
-
-        return
+        for cycle_tasks in nmi_cycles:
+            self.inject_cycle(cycle_tasks=cycle_tasks)
+
+    def inject_cycle(self, cycle_tasks: CycleTasks) -> None:
+        """
+        Queue an extra cycle to run once the current instruction's own cycles
+        are done.
+        """
+        if self._injected_count == INJECTED_CYCLE_QUEUE_SIZE:
+            raise OverflowError("injected cycle queue is full")
+
+        tail = (self._injected_head + self._injected_count) % INJECTED_CYCLE_QUEUE_SIZE
+        self._injected_cycles[tail] = cycle_tasks
+        self._injected_count += 1
+        if self._instruction_tick_counter != 0:
+            self._instruction_tick_counter += 1
+
+    def _pop_injected_cycle(self) -> CycleTasks:
+        cycle_tasks = self._injected_cycles[self._injected_head]
+        self._injected_cycles[self._injected_head] = ()
+        self._injected_head = (self._injected_head + 1) % INJECTED_CYCLE_QUEUE_SIZE
+        self._injected_count -= 1
+        return cycle_tasks
+
+    def _run_injected_cycles(self) -> int:
+        cycles = 0
+        while self._injected_count:
+            for cycle_task in self._pop_injected_cycle():
+                cycle_task(self)
+            cycles += 1
+        return cycles
 
     def reset(self, initial_program_counter=None) -> None:
+        self.jammed = False
         self.SP = 0xFF
-        self.SR = self.BREAK_FLAG | self.UNUSED_FLAG
+        self.SR = BREAK_FLAG | UNUSED_FLAG
 
         if initial_program_counter is None:
             self.PC = self.reset_vector
@@ -99,6 +236,67 @@ class CPU6502:
         else:
             self.PC = initial_program_counter
 
+    def jam(self) -> None:
+        """
+        KIL/JAM: the CPU stops on the opcode and raises CPUJammed on every
+        further step until reset()
+        """
+        self.PC = (self.PC - 1) & ADDR_MASK
+        self.jammed = True
+        self._instruction_tick_counter = 0
+        self._cycle_index = 0
+        raise CPUJammed(address=self.PC, opcode=self.mem_space.read_byte(address=self.PC))
+
+    def _raise_jammed(self) -> None:
+        """Refuse to fetch anything more once jammed, whatever PC or an interrupt has done since"""
+        raise CPUJammed(address=self.PC, opcode=self.mem_space.peek_byte(address=self.PC))
+
+    @property
+    def SR(self) -> int:
+        return self._sr | nz_flags[self._nz]
+
+    @SR.setter
+    def SR(self, value: int) -> None:
+        self._sr = value & KEEP_NZ_FLAGS
+        self._nz = nz_codes[value & 0xFF]
+
+    def export_state(self) -> bytes:
+        """
+        The register file as a CPU_STATE_RECORD. Only taken between
+        instructions, as cycles still to run cannot be recorded.
+        """
+        if self._instruction_tick_counter or self._injected_count:
+            raise RuntimeError("cannot export CPU state in the middle of an instruction")
+
+        return CPU_STATE_RECORD.pack(CPU_STATE_VERSION, self.PC, self.A, self.X, self.Y, self.SP, self.SR,
+                                     self.DB & BYTE_MASK, self.AB & ADDR_MASK,
+                                     self._temp_address_low_byte, self._temp_address_high_byte,
+                                     self.ind_eff_addr_low_byte, self.ind_eff_addr_high_byte,
+                                     self.RW, self.jammed)
+
+    def import_state(self, record: bytes) -> None:
+        """
+        Restore a record from export_state(). Anything left of the current
+        instruction, and any cycles queued by irq() or nmi(), is dropped.
+        """
+        (version, pc, a, x, y, sp, sr, db, ab, temp_address_low_byte, temp_address_high_byte,
+         ind_eff_addr_low_byte, ind_eff_addr_high_byte, rw, jammed) = CPU_STATE_RECORD.unpack(record)
+        if version != CPU_STATE_VERSION:
+            raise ValueError(f"Unsupported CPU state version [{version}]")
+
+        self.PC, self.A, self.X, self.Y, self.SP, self.SR, self.DB, self.AB = pc, a, x, y, sp, sr, db, ab
+        self._temp_address_low_byte = temp_address_low_byte
+        self._temp_address_high_byte = temp_address_high_byte
+        self.ind_eff_addr_low_byte = ind_eff_addr_low_byte
+        self.ind_eff_addr_high_byte = ind_eff_addr_high_byte
+        self.RW = rw
+        self.jammed = bool(jammed)
+        self._instruction_tick_counter = 0
+        self._cycle_index = 0
+        self._injected_cycles = [()] * INJECTED_CYCLE_QUEUE_SIZE
+        self._injected_head = 0
+        self._injected_count = 0
+
     def get_cpu_status_flag(self, flag) -> int:
         if (self.SR & flag) > 0:
             return 1
@@ -126,16 +324,411 @@ class CPU6502:
             if cycle_counter == 0:
                 return total_cycles
 
+    def step(self) -> int:
+        """
+        Execute one whole instruction with the fused engine and return the
+        number of cycles it took. Equivalent to tick_complete() but without the
+        per-cycle scheduling. Cycles still pending from tick() or an interrupt
+        are finished on the tick path first.
+        """
+        if self.jammed:
+            self._raise_jammed()
+
+        if self._instruction_tick_counter != 0:
+            cycles = 0
+            while self._instruction_tick_counter != 0:
+                self.tick()
+                cycles += 1
+            return cycles
+
+        self.RW = RW_READ
+
+        instruction = self.mem_space.read_byte(address=self.PC)
+        self.current_instruction = ins_table[instruction]
+        self.PC += 1
+        cycles = fused_ins_table[instruction](self)
+        if self._injected_count:
+            cycles += self._run_injected_cycles()
+
+        scheduler = self.scheduler
+        scheduler.now += cycles
+        if scheduler.now >= scheduler.next_deadline:
+            scheduler.run_due()
+
+        if self.external_devices:
+            for ext_dev in self.external_devices:
+                for _ in range(cycles):
+                    ext_dev.tick()
+
+        return cycles
+
+    def step_block(self) -> int:
+        """
+        Execute the translated basic block starting at PC and return the number
+        of cycles it took. Blocks are translated on first use and cached until
+        the memory space reports a write over them.
+        """
+        if self.jammed:
+            self._raise_jammed()
+
+        if self._instruction_tick_counter != 0 or self._injected_count:
+            return self.step()
+
+        block = self._get_translator().lookup(address=self.PC)
+        if block is None:
+            return self.step()
+
+        self.RW = RW_READ
+        cycles = block.function(self)
+        if self._injected_count:
+            cycles += self._run_injected_cycles()
+
+        scheduler = self.scheduler
+        scheduler.now += cycles
+        if scheduler.now >= scheduler.next_deadline:
+            scheduler.run_due()
+
+        if self.external_devices:
+            for ext_dev in self.external_devices:
+                for _ in range(cycles):
+                    ext_dev.tick()
+
+        return cycles
+
+    def _get_translator(self) -> BlockTranslator:
+        if self.translator is None:
+            self.translator = BlockTranslator(mem_space=self.mem_space, instructions=ins_dict, namespace=globals())
+            for address in self.breakpoints:
+                self.translator.add_stop_address(address=address)
+        return self.translator
+
+    def add_breakpoint(self, address: int, condition: Optional[Callable[["CPU6502"], bool]] = None) -> Breakpoint:
+        """
+        Stop run(), run_until() and run_frames() before the instruction at
+        address, with reason STOP_BREAKPOINT, whenever condition(cpu) holds.
+        A breakpoint at the PC a run starts from is passed over, so a run that
+        stopped on one can be resumed. Replaces any breakpoint at address.
+        """
+        breakpoint = Breakpoint(address=address, condition=condition)
+        self.breakpoints[address] = breakpoint
+        if self.translator is not None:
+            self.translator.add_stop_address(address=address)
+        return breakpoint
+
+    def remove_breakpoint(self, breakpoint: Breakpoint) -> None:
+        if self.breakpoints.get(breakpoint.address) is breakpoint:
+            del self.breakpoints[breakpoint.address]
+            if self.translator is not None:
+                self.translator.remove_stop_address(address=breakpoint.address)
+
+    def add_watchpoint(self, start: int, end: Optional[int] = None, read: bool = False, write: bool = True,
+                       condition: Optional[Callable[[int, int], bool]] = None) -> Watchpoint:
+        """
+        Stop a run, with reason STOP_WATCHPOINT, after the instruction that
+        reads or writes [start, end] (start alone without end) and for which
+        condition(address, value), if given, holds. The translated engine
+        stops at the end of the block.
+        """
+        return self.mem_space.add_watchpoint(start=start, end=end, read=read, write=write, condition=condition,
+                                             callback=self._watchpoint_hit)
+
+    def remove_watchpoint(self, watchpoint: Watchpoint) -> None:
+        self.mem_space.remove_watchpoint(watchpoint=watchpoint)
+
+    def _watchpoint_hit(self, watchpoint: Watchpoint) -> None:
+        # the run loops only look at stop_trigger when a deadline comes due,
+        # so an empty event is scheduled for now to make one
+        if self.stop_trigger is None:
+            self.stop_trigger = watchpoint
+            self.scheduler.schedule(cycle=self.scheduler.now, callback=_no_event)
+
+    def start_trace(self, file_name: Optional[str] = None, chunk_records: int = DEFAULT_CHUNK_RECORDS,
+                    ring_chunks: int = DEFAULT_RING_CHUNKS) -> TraceRecorder:
+        """
+        Record every instruction run by run(), run_until() and run_frames()
+        from now on, streamed to file_name if given. While tracing, those run
+        instruction by instruction on the fused engine whatever engine is asked for.
+        """
+        self.stop_trace()
+        writer = None if file_name is None else TraceWriter(file_name=file_name)
+        self.trace_recorder = TraceRecorder(chunk_records=chunk_records, ring_chunks=ring_chunks, writer=writer)
+        return self.trace_recorder
+
+    def stop_trace(self) -> Optional[TraceRecorder]:
+        """Detach the recorder, writing out and closing its file"""
+        recorder, self.trace_recorder = self.trace_recorder, None
+        if recorder is not None:
+            recorder.close()
+        return recorder
+
+    def start_profile(self) -> CycleProfiler:
+        """
+        Count the cycles spent at every PC in run(), run_until() and
+        run_frames() from now on
+        """
+        self.profiler = CycleProfiler()
+        return self.profiler
+
+    def stop_profile(self) -> Optional[CycleProfiler]:
+        profiler, self.profiler = self.profiler, None
+        return profiler
+
+    def start_call_profile(self) -> CallProfiler:
+        """
+        Follow calls and returns in run(), run_until() and run_frames() from
+        now on, the current PC standing for the outermost routine. While
+        profiling calls, those run instruction by instruction on the fused
+        engine whatever engine is asked for.
+        """
+        self.call_profiler = CallProfiler(pc=self.PC, now=self.scheduler.now, interrupts_taken=self.interrupts_taken,
+                                          peek_byte=self.mem_space.peek_byte)
+        return self.call_profiler
+
+    def stop_call_profile(self) -> Optional[CallProfiler]:
+        """Detach the call profiler, closing the frames still open at the current cycle"""
+        call_profiler, self.call_profiler = self.call_profiler, None
+        if call_profiler is not None:
+            call_profiler.finish(end=self.scheduler.now)
+        return call_profiler
+
+    def _stop_at(self, pc: int, stop_pc: Optional[int], cycles: int, instructions: int) -> Optional[RunResult]:
+        """The RunResult for arriving at one of the run's stop addresses, or None to carry on"""
+        if pc == stop_pc:
+            return RunResult(cycles=cycles, instructions=instructions, reason=STOP_PC)
+
+        breakpoint = self.breakpoints.get(pc)
+        if cycles and breakpoint is not None and breakpoint.hit(cpu=self):
+            return RunResult(cycles=cycles, instructions=instructions, reason=STOP_BREAKPOINT, trigger=breakpoint)
+        return None
+
+    def _watchpoint_stop(self, cycles: int, instructions: int) -> RunResult:
+        trigger, self.stop_trigger = self.stop_trigger, None
+        return RunResult(cycles=cycles, instructions=instructions, reason=STOP_WATCHPOINT, trigger=trigger)
+
+    def run(self, cycles: int, engine: str = ENGINE_FUSED, stop_on_trap: bool = True) -> RunResult:
+        """
+        Run for at least the given number of cycles. Stops early, with reason
+        STOP_TRAP, on an instruction that jumps or branches to itself.
+        """
+        return self._run(max_cycles=cycles, stop_pc=None, engine=engine, stop_on_trap=stop_on_trap)
+
+    def run_until(self, pc: int, max_cycles: Optional[int] = None, engine: str = ENGINE_FUSED,
+                  stop_on_trap: bool = True) -> RunResult:
+        """Run until the next instruction to execute is at pc"""
+        if engine != ENGINE_TRANSLATED:
+            return self._run(max_cycles=max_cycles, stop_pc=pc, engine=engine, stop_on_trap=stop_on_trap)
+
+        translator = self._get_translator()
+        translator.add_stop_address(address=pc)
+        try:
+            return self._run(max_cycles=max_cycles, stop_pc=pc, engine=engine, stop_on_trap=stop_on_trap)
+        finally:
+            if pc not in self.breakpoints:
+                translator.remove_stop_address(address=pc)
+
+    def run_frames(self, frames: int, cycles_per_frame: int = PAL_FRAME_CYCLES, engine: str = ENGINE_FUSED,
+                   stop_on_trap: bool = True) -> RunResult:
+        return self.run(cycles=frames * cycles_per_frame, engine=engine, stop_on_trap=stop_on_trap)
+
+    def _run(self, max_cycles: Optional[int], stop_pc: Optional[int], engine: str,
+             stop_on_trap: bool) -> RunResult:
+        if max_cycles is None:
+            max_cycles = sys.maxsize
+
+        # run_until's address and the breakpoints, the one check made before every instruction
+        stops = set(self.breakpoints)
+        if stop_pc is not None:
+            stops.add(stop_pc)
+        self.stop_trigger = None
+
+        if engine not in (ENGINE_TICK, ENGINE_FUSED, ENGINE_TRANSLATED):
+            raise ValueError(f"Unknown engine [{engine}]")
+        # a jam raises out of the loops, so a run can only start jammed
+        if self.jammed:
+            self._raise_jammed()
+        # the tracer and the call profiler need to see every instruction, so take the fused engine
+        watchers = [watcher for watcher in (self.trace_recorder, self.call_profiler) if watcher is not None]
+        if watchers or engine == ENGINE_FUSED:
+            return self._run_fused(max_cycles=max_cycles, stop_pc=stop_pc, stops=stops, stop_on_trap=stop_on_trap,
+                                   profile=None if self.profiler is None else self.profiler.cycles,
+                                   started=[watcher.instruction_started for watcher in watchers],
+                                   finished=[watcher.instruction_finished for watcher in watchers])
+        if engine == ENGINE_TRANSLATED:
+            return self._run_translated(max_cycles=max_cycles, stop_pc=stop_pc, stops=stops,
+                                        stop_on_trap=stop_on_trap)
+
+        # a check per instruction is lost in the cost of ticking each cycle
+        profile = None if self.profiler is None else self.profiler.cycles
+        cycles = 0
+        instructions = 0
+        while cycles < max_cycles:
+            pc = self.PC
+            if pc in stops:
+                stopped = self._stop_at(pc=pc, stop_pc=stop_pc, cycles=cycles, instructions=instructions)
+                if stopped is not None:
+                    return stopped
+
+            instruction_cycles = self.tick_complete()
+            cycles += instruction_cycles
+            instructions += 1
+            if profile is not None:
+                profile[pc] += instruction_cycles
+
+            if self.stop_trigger is not None:
+                return self._watchpoint_stop(cycles=cycles, instructions=instructions)
+            if stop_on_trap and self.PC == pc:
+                return RunResult(cycles=cycles, instructions=instructions, reason=STOP_TRAP)
+
+        return RunResult(cycles=cycles, instructions=instructions, reason=STOP_CYCLES)
+
+    def _run_fused(self, max_cycles: int, stop_pc: Optional[int], stops: set, stop_on_trap: bool,
+                   profile: Optional[List[int]] = None, started: Sequence[InstructionHook] = (),
+                   finished: Sequence[FinishedHook] = ()) -> RunResult:
+        """
+        The fused engine's run loop, for run() and for the tracer and
+        profilers: profile, if given, has each instruction's cycles added at
+        its PC, and started and finished are called either side of every
+        instruction. Instructions go through step() when it has cycles to
+        finish from tick() or devices to tick, and are fused in line otherwise.
+        """
+        read_byte = self.mem_space.read_byte
+        peek_byte = self.mem_space.peek_byte
+        scheduler = self.scheduler
+
+        cycles = 0
+        instructions = 0
+        while cycles < max_cycles:
+            pc = self.PC
+            if pc in stops:
+                stopped = self._stop_at(pc=pc, stop_pc=stop_pc, cycles=cycles, instructions=instructions)
+                if stopped is not None:
+                    return stopped
+
+            if self._instruction_tick_counter or self.external_devices:
+                # step() fetches the opcode itself, so the hooks only peek at it
+                instruction = peek_byte(address=pc) if started or finished else None
+                for hook in started:
+                    hook(self, pc, instruction)
+                instruction_cycles = self.step()
+            else:
+                instruction = read_byte(address=pc)
+                if started:
+                    for hook in started:
+                        hook(self, pc, instruction)
+                self.RW = RW_READ
+                self.current_instruction = ins_table[instruction]
+                self.PC = pc + 1
+                instruction_cycles = fused_ins_table[instruction](self)
+                if self._injected_count:
+                    instruction_cycles += self._run_injected_cycles()
+                scheduler.now += instruction_cycles
+                if scheduler.now >= scheduler.next_deadline:
+                    scheduler.run_due()
+            cycles += instruction_cycles
+            instructions += 1
+
+            if profile is not None:
+                profile[pc] += instruction_cycles
+            if finished:
+                for hook in finished:
+                    hook(self, pc, instruction, instruction_cycles)
+
+            if self.stop_trigger is not None:
+                return self._watchpoint_stop(cycles=cycles, instructions=instructions)
+            if stop_on_trap and self.PC == pc:
+                return RunResult(cycles=cycles, instructions=instructions, reason=STOP_TRAP)
+
+        return RunResult(cycles=cycles, instructions=instructions, reason=STOP_CYCLES)
+
+    def _run_translated(self, max_cycles: int, stop_pc: Optional[int], stops: set,
+                        stop_on_trap: bool) -> RunResult:
+        translator = self._get_translator()
+        blocks = translator.blocks
+        scheduler = self.scheduler
+        # counted a block at a time, so one check per block
+        profile = None if self.profiler is None else self.profiler.cycles
+
+        cycles = 0
+        instructions = 0
+        while cycles < max_cycles:
+            pc = self.PC
+            if pc in stops:
+                stopped = self._stop_at(pc=pc, stop_pc=stop_pc, cycles=cycles, instructions=instructions)
+                if stopped is not None:
+                    return stopped
+
+            block = blocks.get(pc)
+            if block is None:
+                block = translator.lookup(address=pc)
+
+            if block is None:
+                instruction_cycles = self.step()
+                cycles += instruction_cycles
+                instructions += 1
+                if profile is not None:
+                    profile[pc] += instruction_cycles
+                if self.stop_trigger is not None:
+                    return self._watchpoint_stop(cycles=cycles, instructions=instructions)
+                if stop_on_trap and self.PC == pc:
+                    return RunResult(cycles=cycles, instructions=instructions, reason=STOP_TRAP)
+                continue
+
+            if self._instruction_tick_counter or self._injected_count or self.external_devices:
+                block_cycles = self.step_block()
+                cycles += block_cycles
+                if profile is not None:
+                    profile[pc] += block_cycles
+                if self.stop_trigger is not None:
+                    return self._watchpoint_stop(cycles=cycles, instructions=instructions + block.instruction_count)
+            else:
+                self.RW = RW_READ
+                block_cycles = block.function(self)
+                if self._injected_count:
+                    block_cycles += self._run_injected_cycles()
+                cycles += block_cycles
+                if profile is not None:
+                    profile[pc] += block_cycles
+                scheduler.now += block_cycles
+                if scheduler.now >= scheduler.next_deadline:
+                    scheduler.run_due()
+                    if self.stop_trigger is not None:
+                        return self._watchpoint_stop(cycles=cycles,
+                                                     instructions=instructions + block.instruction_count)
+            instructions += block.instruction_count
+
+            # the block's last instruction left PC pointing back at itself
+            if stop_on_trap and self.PC == block.last_instruction:
+                return RunResult(cycles=cycles, instructions=instructions, reason=STOP_TRAP)
+
+        return RunResult(cycles=cycles, instructions=instructions, reason=STOP_CYCLES)
+
     def tick(self) -> int:
         if self._instruction_tick_counter == 0:
+            if self.jammed:
+                self._raise_jammed()
             self._load_instruction()
         else:
-            next_cycle_tasks = self._instruction_tasks.pop(0)
+            instruction_cycles = self._instruction_cycles
+            cycle_index = self._cycle_index
+
+            if cycle_index < len(instruction_cycles):
+                next_cycle_tasks = instruction_cycles[cycle_index]
+                self._cycle_index = cycle_index + 1
+            elif self._injected_count:
+                next_cycle_tasks = self._pop_injected_cycle()
+            else:
+                next_cycle_tasks = ()
 
             for cycle_task in next_cycle_tasks:
                 cycle_task(self)
 
-            self._instruction_tick_counter = len(self._instruction_tasks)
+            # inject_cycle() bumps the counter for anything queued meanwhile
+            self._instruction_tick_counter -= 1
+
+        scheduler = self.scheduler
+        scheduler.now += 1
+        if scheduler.now >= scheduler.next_deadline:
+            scheduler.run_due()
 
         for ext_dev in self.external_devices:
             ext_dev.tick()
@@ -143,23 +736,24 @@ class CPU6502:
         return self._instruction_tick_counter
 
     def _load_instruction(self):
-        self.RW = CPU6502.RW_READ
+        self.RW = RW_READ
 
         instruction = self.mem_space.read_byte(address=self.PC)
         # self.ControlLines.DB = instruction
 
-        if instruction in ins_dict:
-            self.current_instruction = ins_dict[instruction]
-            self._instruction_tasks = copy(ins_dict[instruction]["instructions"])
-            self._instruction_tick_counter = len(self._instruction_tasks)
-            self.PC += 1
+        instruction_cycles = tick_ins_table[instruction]
 
-            return instruction
+        self.current_instruction = ins_table[instruction]
+        self._instruction_cycles = instruction_cycles
+        self._cycle_index = 0
+        self._instruction_tick_counter = len(instruction_cycles) + self._injected_count
+        self.PC += 1
 
-        else:
-            print_cpu_status(cpu=self)
-            print(f"Operation not found [{hex(instruction)}]")
-            input("Press Enter to continue.")
+        return instruction
+
+
+def _no_event(cycle: int) -> None:
+    pass
 
 
 def print_cpu_status(cpu: CPU6502):
@@ -168,57 +762,79 @@ def print_cpu_status(cpu: CPU6502):
         f"{cpu.current_instruction['syn']}, "
         f"A: {hex(cpu.A)}, "
         f"X: {hex(cpu.X)}, Y: {hex(cpu.Y)}, AB: {hex(cpu.AB)}, "
-        f"ZERO: {hex(cpu.get_cpu_status_flag(cpu.ZERO_FLAG))}, "
-        f"NEG: {hex(cpu.get_cpu_status_flag(cpu.NEGATIVE_FLAG))} "
+        f"ZERO: {hex(cpu.get_cpu_status_flag(ZERO_FLAG))}, "
+        f"NEG: {hex(cpu.get_cpu_status_flag(NEGATIVE_FLAG))} "
         f"RW: {cpu.RW}")
 
 
 def pull_program_counter_byte_low_from_stack(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
-    sp = SPToAddress(cpu=cpu)
-    cpu.program_counter_low_byte = cpu.mem_space.read_byte(address=sp)
+    cpu.RW = RW_READ
+    sp = STACK_PAGE | cpu.SP
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        cpu.program_counter_low_byte = ram[sp]
+    else:
+        cpu.program_counter_low_byte = cpu.mem_space.read_byte(address=sp)
     cpu.AB = sp
 
     cpu.PC = (cpu.program_counter_high_byte << 8) + cpu.program_counter_low_byte
 
 
 def pull_program_counter_byte_high_from_stack(cpu: CPU6502):
-    cpu.RW = CPU6502.RW_READ
-    sp = SPToAddress(cpu=cpu)
-    cpu.program_counter_high_byte = cpu.mem_space.read_byte(address=sp)
+    cpu.RW = RW_READ
+    sp = STACK_PAGE | cpu.SP
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        cpu.program_counter_high_byte = ram[sp]
+    else:
+        cpu.program_counter_high_byte = cpu.mem_space.read_byte(address=sp)
     cpu.AB = sp
     cpu.PC = (cpu.program_counter_high_byte << 8) + cpu.program_counter_low_byte
 
 
 def increment_program_counter(cpu: CPU6502) -> None:
     cpu.PC += 1
-    cpu.PC &= ((1 << 16) - 1)
+    cpu.PC &= ADDR_MASK
 
 
 def push_program_counter_low_byte_to_stack(cpu: CPU6502) -> None:
-    sp = SPToAddress(cpu=cpu)
-    cpu.mem_space.write_byte(address=sp,
-                             byte=(cpu.PC >> 8) & cpu.byte_mask)
-    cpu.stack.append(hex(cpu.PC >> 8))
-    cpu.RW = CPU6502.RW_WRITE
+    sp = STACK_PAGE | cpu.SP
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and not cpu.mem_space.code_pages[1]:
+        ram[sp] = (cpu.PC >> 8) & BYTE_MASK
+    else:
+        cpu.mem_space.write_byte(address=sp,
+                                 byte=(cpu.PC >> 8) & BYTE_MASK)
+    cpu.RW = RW_WRITE
     cpu.AB = sp
 
 
 def push_program_counter_high_byte_to_stack(cpu: CPU6502) -> None:
-    cpu.mem_space.write_byte(address=SPToAddress(cpu=cpu), byte=cpu.PC & 0xFF)
-    cpu.stack.append(hex(cpu.PC & cpu.byte_mask))
-    cpu.RW = CPU6502.RW_WRITE
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and not cpu.mem_space.code_pages[1]:
+        ram[STACK_PAGE | cpu.SP] = cpu.PC & 0xFF
+    else:
+        cpu.mem_space.write_byte(address=STACK_PAGE | cpu.SP, byte=cpu.PC & 0xFF)
+    cpu.RW = RW_WRITE
 
 
 def push_proc_status_to_stack(cpu: CPU6502) -> None:
-    proc_status = cpu.SR | cpu.BREAK_FLAG | cpu.UNUSED_FLAG
-    cpu.mem_space.write_byte(address=SPToAddress(cpu=cpu), byte=proc_status)
-    cpu.RW = CPU6502.RW_WRITE
+    proc_status = cpu.SR | BREAK_FLAG | UNUSED_FLAG
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and not cpu.mem_space.code_pages[1]:
+        ram[STACK_PAGE | cpu.SP] = proc_status
+    else:
+        cpu.mem_space.write_byte(address=STACK_PAGE | cpu.SP, byte=proc_status)
+    cpu.RW = RW_WRITE
 
 
 def push_proc_status_after_irq_to_stack(cpu: CPU6502) -> None:
-    proc_status = cpu.SR | cpu.UNUSED_FLAG
-    cpu.mem_space.write_byte(address=SPToAddress(cpu=cpu), byte=proc_status)
+    proc_status = cpu.SR | UNUSED_FLAG
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and not cpu.mem_space.code_pages[1]:
+        ram[STACK_PAGE | cpu.SP] = proc_status
+    else:
+        cpu.mem_space.write_byte(address=STACK_PAGE | cpu.SP, byte=proc_status)
 
 
 def set_program_counter_to_reset_vector(cpu: CPU6502) -> None:
@@ -227,57 +843,77 @@ def set_program_counter_to_reset_vector(cpu: CPU6502) -> None:
 
 def set_program_counter_to_interrupt_vector(cpu: CPU6502) -> None:
     cpu.PC = read_word(cpu=cpu, address=cpu.interrupt_vector)
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
 
 
 def set_program_counter_to_nmi_vector(cpu: CPU6502) -> None:
     cpu.PC = read_word(cpu=cpu, address=cpu.NMI_vector)
 
 
+def count_interrupt(cpu: CPU6502) -> None:
+    cpu.interrupts_taken += 1
+
+
 def increment_stack_pointer(cpu: CPU6502) -> None:
     cpu.SP += 1  # 1 cycle
-    cpu.SP &= ((1 << 8) - 1)
+    cpu.SP &= BYTE_MASK
     cpu.AB = cpu.SP
 
 
 def decrement_stack_pointer(cpu: CPU6502) -> None:
     cpu.SP -= 1  # 1 cycle
-    cpu.SP &= ((1 << 8) - 1)
+    cpu.SP &= BYTE_MASK
     cpu.AB = cpu.SP
 
 
 def push_accumulator_to_stack(cpu: CPU6502) -> None:
-    sp = SPToAddress(cpu=cpu)
-    cpu.RW = CPU6502.RW_WRITE
+    sp = STACK_PAGE | cpu.SP
+    cpu.RW = RW_WRITE
     cpu.AB = sp
-    data = cpu.A & cpu.byte_mask
+    data = cpu.A & BYTE_MASK
     cpu.DB = data
-    cpu.mem_space.write_byte(address=sp, byte=data)
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and not cpu.mem_space.code_pages[1]:
+        ram[sp] = data
+    else:
+        cpu.mem_space.write_byte(address=sp, byte=data)
 
 
 def pull_accumulator_from_stack(cpu: CPU6502) -> None:
-    SP = SPToAddress(cpu=cpu)
-    cpu.RW = CPU6502.RW_READ
-    cpu.AB = SP
-    data = cpu.mem_space.read_byte(address=SPToAddress(cpu=cpu))
+    sp = STACK_PAGE | cpu.SP
+    cpu.RW = RW_READ
+    cpu.AB = sp
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        data = ram[sp]
+    else:
+        data = cpu.mem_space.read_byte(address=sp)
     cpu.DB = data
     cpu.A = data
 
 
 def push_status_register_to_stack(cpu: CPU6502) -> None:
-    SP = SPToAddress(cpu=cpu)
-    cpu.RW = CPU6502.RW_WRITE
-    cpu.AB = SP
-    data = (cpu.SR | cpu.BREAK_FLAG | cpu.UNUSED_FLAG) & cpu.byte_mask
+    sp = STACK_PAGE | cpu.SP
+    cpu.RW = RW_WRITE
+    cpu.AB = sp
+    data = (cpu.SR | BREAK_FLAG | UNUSED_FLAG) & BYTE_MASK
     cpu.DB = data
-    cpu.mem_space.write_byte(address=SP, byte=data)
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and not cpu.mem_space.code_pages[1]:
+        ram[sp] = data
+    else:
+        cpu.mem_space.write_byte(address=sp, byte=data)
 
 
 def pull_status_register_from_stack(cpu: CPU6502) -> None:
-    SP = SPToAddress(cpu=cpu)
-    cpu.RW = CPU6502.RW_READ
-    cpu.AB = SP
-    data = cpu.mem_space.read_byte(address=SP) | cpu.BREAK_FLAG | cpu.UNUSED_FLAG
+    sp = STACK_PAGE | cpu.SP
+    cpu.RW = RW_READ
+    cpu.AB = sp
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        data = ram[sp] | BREAK_FLAG | UNUSED_FLAG
+    else:
+        data = cpu.mem_space.read_byte(address=sp) | BREAK_FLAG | UNUSED_FLAG
     cpu.DB = data
     cpu.SR = data
 
@@ -295,10 +931,8 @@ def or_accumulator_and_temp_data(cpu: CPU6502) -> None:
 
 
 def bit_compare(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG | cpu.OVERFLOW_FLAG)
-    if (cpu.A & cpu.DB) == 0:
-        cpu.SR |= cpu.ZERO_FLAG
-    cpu.SR |= cpu.DB & (cpu.NEGATIVE_FLAG | cpu.OVERFLOW_FLAG)
+    cpu._sr = (cpu._sr & KEEP_OVERFLOW_FLAG) | (cpu.DB & OVERFLOW_FLAG)
+    cpu._nz = nz_codes[(cpu.DB & NEGATIVE_FLAG) | (0 if cpu.A & cpu.DB else ZERO_FLAG)]
 
 
 def rotate_temp_address_left(cpu: CPU6502) -> None:
@@ -308,19 +942,11 @@ def rotate_temp_address_left(cpu: CPU6502) -> None:
     sets the new value of the carry.
     """
 
-    existing_carry = cpu.get_cpu_status_flag(flag=cpu.CARRY_FLAG)
-
-    new_carry_bit = get_bit_value(value_in=cpu.DB, bit_number=7)
-    rotated_value = rol(cpu.DB, 1, 8)
-
-    if existing_carry == 1:
-        rotated_value = set_bit(value=rotated_value, bit_number=0)
-    else:
-        rotated_value = clear_bit(value=rotated_value, bit_number=0)
+    carry = cpu._sr & CARRY_FLAG
 
-    cpu.RW = CPU6502.RW_WRITE
-    cpu.DB = rotated_value
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=new_carry_bit)
+    cpu.RW = RW_WRITE
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.DB >> 7)
+    cpu.DB = ((cpu.DB << 1) & 0xFF) | carry
 
 
 def rotate_temp_address_right(cpu: CPU6502) -> None:
@@ -330,19 +956,11 @@ def rotate_temp_address_right(cpu: CPU6502) -> None:
     sets the new value of the carry.
     """
 
-    existing_carry = cpu.get_cpu_status_flag(flag=cpu.CARRY_FLAG)
+    carry = cpu._sr & CARRY_FLAG
 
-    new_carry_bit = get_bit_value(value_in=cpu.DB, bit_number=0)
-    rotated_value = ror(cpu.DB, 1, 8)
-
-    if existing_carry == 1:
-        rotated_value = set_bit(value=rotated_value, bit_number=7)
-    else:
-        rotated_value = clear_bit(value=rotated_value, bit_number=7)
-
-    cpu.RW = CPU6502.RW_WRITE
-    cpu.DB = rotated_value
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=new_carry_bit)
+    cpu.RW = RW_WRITE
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.DB & CARRY_FLAG)
+    cpu.DB = (cpu.DB >> 1) | (carry << 7)
 
 
 def rotate_accumulator_left(cpu: CPU6502) -> None:
@@ -352,20 +970,12 @@ def rotate_accumulator_left(cpu: CPU6502) -> None:
     sets the new value of the carry.
     """
 
-    existing_carry = cpu.get_cpu_status_flag(flag=cpu.CARRY_FLAG)
-
-    new_carry_bit = get_bit_value(value_in=cpu.A, bit_number=7)
-    rotated_value = rol(cpu.A, 1, 8)
+    carry = cpu._sr & CARRY_FLAG
 
-    if existing_carry == 1:
-        rotated_value = set_bit(value=rotated_value, bit_number=0)
-    else:
-        rotated_value = clear_bit(value=rotated_value, bit_number=0)
-
-    cpu.RW = CPU6502.RW_WRITE
-    cpu.DB = rotated_value
-    cpu.A = rotated_value
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=new_carry_bit)
+    cpu.RW = RW_WRITE
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.A >> 7)
+    cpu.DB = ((cpu.A << 1) & 0xFF) | carry
+    cpu.A = cpu.DB
 
 
 def rotate_accumulator_right(cpu: CPU6502) -> None:
@@ -375,68 +985,48 @@ def rotate_accumulator_right(cpu: CPU6502) -> None:
     sets the new value of the carry.
     """
 
-    existing_carry = cpu.get_cpu_status_flag(flag=cpu.CARRY_FLAG)
-
-    new_carry_bit = get_bit_value(value_in=cpu.A, bit_number=0)
-    rotated_value = ror(cpu.A, 1, 8)
+    carry = cpu._sr & CARRY_FLAG
 
-    if existing_carry == 1:
-        rotated_value = set_bit(value=rotated_value, bit_number=7)
-    else:
-        rotated_value = clear_bit(value=rotated_value, bit_number=7)
-
-    cpu.RW = CPU6502.RW_WRITE
-    cpu.DB = rotated_value
-    cpu.A = rotated_value
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=new_carry_bit)
+    cpu.RW = RW_WRITE
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.A & CARRY_FLAG)
+    cpu.DB = (cpu.A >> 1) | (carry << 7)
+    cpu.A = cpu.DB
 
 
 def logical_shift_accumulator_right(cpu: CPU6502) -> None:
-    new_carry_bit = get_bit_value(value_in=cpu.A, bit_number=0)
-    rotated = (cpu.A >> 1) & 0xFF
-    rotated = clear_bit(value=rotated, bit_number=7)
-    cpu.A = rotated
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=new_carry_bit)
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.A & CARRY_FLAG)
+    cpu.A = cpu.A >> 1
 
 
 def logical_shift_temp_data_right(cpu: CPU6502) -> None:
-    new_carry_bit = get_bit_value(value_in=cpu.DB, bit_number=0)
-    rotated = (cpu.DB >> 1) & 0xFF
-    rotated = clear_bit(value=rotated, bit_number=7)
-    cpu.DB = rotated  # bit 8 will now be zero
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=new_carry_bit)
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.DB & CARRY_FLAG)
+    cpu.DB = cpu.DB >> 1  # bit 8 will now be zero
 
 
 def arithmetic_shift_temp_data_left(cpu: CPU6502) -> None:
-    current_sign_bit = get_bit_value(value_in=cpu.DB, bit_number=7)
-    rotated = (cpu.DB << 1) & 0xFF
-    rotated = clear_bit(value=rotated, bit_number=0)
-    cpu.DB = rotated
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=current_sign_bit)
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.DB >> 7)
+    cpu.DB = (cpu.DB << 1) & 0xFF
 
 
 def arithmetic_shift_accumulator_left(cpu: CPU6502) -> None:
-    current_sign_bit = get_bit_value(value_in=cpu.A, bit_number=7)
-    rotated = (cpu.A << 1) & 0xFF
-    rotated = clear_bit(value=rotated, bit_number=0)
-    cpu.A = rotated
-    cpu.set_cpu_status_flag(flag=cpu.CARRY_FLAG, value=current_sign_bit)
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.A >> 7)
+    cpu.A = (cpu.A << 1) & 0xFF
 
 
 def branch_equal_to_zero(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.ZERO_FLAG:
+    if cpu._nz & LAZY_ZERO_MASK:
+        cpu.PC += 1
+    else:
         cpu.fetch_next_byte()
         branch_rel_addr(cpu=cpu)
-    else:
-        cpu.PC += 1
 
 
 def branch_not_equal_to_zero(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.ZERO_FLAG:
-        cpu.PC += 1
-    else:
+    if cpu._nz & LAZY_ZERO_MASK:
         cpu.fetch_next_byte()
         branch_rel_addr(cpu=cpu)
+    else:
+        cpu.PC += 1
 
 
 def read_operand_byte_to_temp_data(cpu: CPU6502) -> None:
@@ -451,12 +1041,21 @@ def set_program_counter_to_temp_address(cpu: CPU6502) -> None:
     cpu.PC = cpu.AB
 
 
+# The (zp,X) pointer is always read from the zero page
 def read_data_eff_address_low_byte(cpu: CPU6502) -> None:
-    cpu.ind_eff_addr_low_byte = cpu.mem_space.read_byte(address=cpu.AB)
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        cpu.ind_eff_addr_low_byte = ram[cpu.AB]
+    else:
+        cpu.ind_eff_addr_low_byte = cpu.mem_space.read_byte(address=cpu.AB)
 
 
 def read_data_eff_address_high_byte(cpu: CPU6502) -> None:
-    cpu.ind_eff_addr_high_byte = cpu.mem_space.read_byte(address=cpu.AB + 1)
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        cpu.ind_eff_addr_high_byte = ram[cpu.AB + 1]
+    else:
+        cpu.ind_eff_addr_high_byte = cpu.mem_space.read_byte(address=cpu.AB + 1)
 
 
 def construct_ind_address(cpu: CPU6502) -> None:
@@ -464,21 +1063,30 @@ def construct_ind_address(cpu: CPU6502) -> None:
 
 
 def WrapAt(cpu: CPU6502, addr):
-    wrap = lambda x: (x & cpu.addr_high_mask) + ((x + 1) & cpu.byte_mask)
+    ram = cpu.mem_space.direct_ram
+    if ram is not None and addr <= BYTE_MASK:
+        return ram[addr] | (ram[(addr + 1) & BYTE_MASK] << 8)
+    wrap = lambda x: (x & ADDR_HIGH_MASK) + ((x + 1) & BYTE_MASK)
     return cpu.mem_space.read_byte(address=addr) + (cpu.mem_space.read_byte(address=wrap(addr)) << 8)
 
 
 def ind_y_extra(cpu: CPU6502):
     a1 = WrapAt(cpu=cpu, addr=cpu.fetch_next_byte())
-    cpu.AB = (a1 + cpu.Y) & cpu.byte_mask
-    if (a1 & cpu.addr_high_mask) != (cpu.AB & cpu.addr_high_mask):
+    cpu.AB = (a1 + cpu.Y) & BYTE_MASK
+    if (a1 & ADDR_HIGH_MASK) != (cpu.AB & ADDR_HIGH_MASK):
         # self.excycles += 1
         pass
     cpu.DB = cpu.mem_space.read_byte(address=cpu.AB)
 
 
 def ind_y(cpu: CPU6502) -> None:
-    cpu.AB = (WrapAt(cpu=cpu, addr=cpu.fetch_next_byte()) + cpu.Y) & cpu.addr_mask
+    pointer = cpu.fetch_next_byte()
+    ram = cpu.mem_space.direct_ram
+    if ram is not None:
+        base = ram[pointer] | (ram[(pointer + 1) & BYTE_MASK] << 8)
+    else:
+        base = WrapAt(cpu=cpu, addr=pointer)
+    cpu.AB = (base + cpu.Y) & ADDR_MASK
     cpu.DB = cpu.mem_space.read_byte(address=cpu.AB)
 
 
@@ -496,7 +1104,7 @@ def add_X_to_address_without_carry(cpu: CPU6502):
 
 
 def add_X_to_address(cpu: CPU6502) -> None:
-    cpu.AB = (cpu.AB + cpu.X) & cpu.addr_mask
+    cpu.AB = (cpu.AB + cpu.X) & ADDR_MASK
 
 
 def add_Y_to_address_without_carry(cpu: CPU6502) -> None:
@@ -513,16 +1121,11 @@ def add_Y_to_address_without_carry(cpu: CPU6502) -> None:
 
 
 def add_Y_to_address(cpu: CPU6502) -> None:
-    copy_Y = copy(cpu.Y)
-
-    while copy_Y != 0:
-        c = cpu.AB & copy_Y
-        cpu.AB = cpu.AB ^ copy_Y
-        copy_Y = c << 1
+    cpu.AB = (cpu.AB + cpu.Y) & ADDR_MASK
 
 
 def read_operand_low_address_byte(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu.fetch_next_byte()
     cpu.AB = cpu.PC
     cpu._temp_address_low_byte = cpu.DB
@@ -530,7 +1133,7 @@ def read_operand_low_address_byte(cpu: CPU6502) -> None:
 
 
 def read_operand_high_address_byte(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu.fetch_next_byte()
     cpu.AB = cpu.PC
     cpu._temp_address_high_byte = cpu.DB
@@ -538,7 +1141,7 @@ def read_operand_high_address_byte(cpu: CPU6502) -> None:
 
 
 def read_zero_to_address_high_byte(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu._temp_address_high_byte = 0x00
     word = (cpu._temp_address_high_byte << 8) + cpu._temp_address_low_byte
     cpu.AB = word
@@ -549,39 +1152,39 @@ def save_temp_data_to_temp_address(cpu: CPU6502) -> None:
 
 
 def read_data_from_address(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu.DB = cpu.mem_space.read_byte(address=cpu.AB)
 
 
 def save_accumulator_register_to_memory_address(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_WRITE
+    cpu.RW = RW_WRITE
     cpu.DB = cpu.A
     cpu.mem_space.write_byte(address=cpu.AB, byte=cpu.DB)
 
 
 def save_temp_data_to_accumulator(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu.A = cpu.DB
 
 
 def save_temp_data_to_X_register(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu.X = cpu.DB
 
 
 def save_temp_data_to_Y_register(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_READ
+    cpu.RW = RW_READ
     cpu.Y = cpu.DB
 
 
 def save_X_register_to_memory_address(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_WRITE
+    cpu.RW = RW_WRITE
     cpu.DB = cpu.X
     cpu.mem_space.write_byte(address=cpu.AB, byte=cpu.DB)
 
 
 def save_Y_register_to_memory_address(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_WRITE
+    cpu.RW = RW_WRITE
     cpu.DB = cpu.Y
     cpu.mem_space.write_byte(address=cpu.AB, byte=cpu.DB)
 
@@ -611,14 +1214,8 @@ def transfer_X_register_to_stack_pointer(cpu: CPU6502) -> None:
 
 
 def increment_temp_data(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    tbyte = (cpu.DB + 1) & ((1 << 8) - 1)
-    if tbyte:
-        cpu.SR |= tbyte & cpu.NEGATIVE_FLAG
-    else:
-        cpu.SR |= cpu.ZERO_FLAG
-
-    cpu.DB = tbyte
+    cpu.DB = (cpu.DB + 1) & BYTE_MASK
+    cpu._nz = cpu.DB
 
 
 def increment_X_register(cpu: CPU6502) -> None:
@@ -636,14 +1233,8 @@ def increment_Y_register(cpu: CPU6502) -> None:
 
 
 def decrement_temp_data(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    tbyte = (cpu.DB - 1) & ((1 << 8) - 1)
-    if tbyte:
-        cpu.SR |= tbyte & cpu.NEGATIVE_FLAG
-    else:
-        cpu.SR |= cpu.ZERO_FLAG
-
-    cpu.DB = tbyte
+    cpu.DB = (cpu.DB - 1) & BYTE_MASK
+    cpu._nz = cpu.DB
 
 
 def decrement_X_register(cpu: CPU6502) -> None:
@@ -661,45 +1252,29 @@ def decrement_Y_register(cpu: CPU6502) -> None:
 
 
 def save_temp_data_to_address(cpu: CPU6502) -> None:
-    cpu.RW = CPU6502.RW_WRITE
+    cpu.RW = RW_WRITE
     cpu.mem_space.write_byte(address=cpu.AB, byte=cpu.DB)
 
 
 def check_temp_data_for_zero_and_neg(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.DB == 0:
-        cpu.SR |= CPU6502.ZERO_FLAG
-    else:
-        cpu.SR |= cpu.DB & cpu.NEGATIVE_FLAG
+    cpu._nz = cpu.DB
 
 
 def check_X_register_for_zero_and_neg(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.X == 0:
-        cpu.SR |= CPU6502.ZERO_FLAG
-    else:
-        cpu.SR |= cpu.X & cpu.NEGATIVE_FLAG
+    cpu._nz = cpu.X
 
 
 def check_Y_register_for_zero_and_neg(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.Y == 0:
-        cpu.SR |= CPU6502.ZERO_FLAG
-    else:
-        cpu.SR |= cpu.Y & cpu.NEGATIVE_FLAG
+    cpu._nz = cpu.Y
 
 
 def check_accumulator_for_zero_and_neg(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.A == 0:
-        cpu.SR |= CPU6502.ZERO_FLAG
-    else:
-        cpu.SR |= cpu.A & cpu.NEGATIVE_FLAG
+    cpu._nz = cpu.A
 
 
 # @return the stack pointer as a full 16-bit address (in the 1st page) */
 def SPToAddress(cpu: CPU6502) -> int:
-    return 0x100 | cpu.SP
+    return STACK_PAGE | cpu.SP
 
 
 def read_word(cpu: CPU6502, address):
@@ -709,179 +1284,81 @@ def read_word(cpu: CPU6502, address):
 
 
 def adc_calc(cpu: CPU6502) -> None:
-    data = cpu.DB
-
-    if cpu.SR & cpu.DEC_MODE_FLAG:
-        halfcarry = 0
-        decimalcarry = 0
-        adjust0 = 0
-        adjust1 = 0
-        nibble0 = (data & 0xf) + (cpu.A & 0xf) + (cpu.SR & cpu.CARRY_FLAG)
-        if nibble0 > 9:
-            adjust0 = 6
-            halfcarry = 1
-        nibble1 = ((data >> 4) & 0xf) + ((cpu.A >> 4) & 0xf) + halfcarry
-        if nibble1 > 9:
-            adjust1 = 6
-            decimalcarry = 1
-
-        # the ALU outputs are not decimally adjusted
-        nibble0 = nibble0 & 0xf
-        nibble1 = nibble1 & 0xf
-        aluresult = (nibble1 << 4) + nibble0
-
-        # the final A contents will be decimally adjusted
-        nibble0 = (nibble0 + adjust0) & 0xf
-        nibble1 = (nibble1 + adjust1) & 0xf
-        cpu.SR &= ~(cpu.CARRY_FLAG | cpu.OVERFLOW_FLAG | cpu.NEGATIVE_FLAG | cpu.ZERO_FLAG)
-        if aluresult == 0:
-            cpu.SR |= cpu.ZERO_FLAG
-        else:
-            cpu.SR |= aluresult & cpu.NEGATIVE_FLAG
-        if decimalcarry == 1:
-            cpu.SR |= cpu.CARRY_FLAG
-        if (~(cpu.A ^ data) & (cpu.A ^ aluresult)) & cpu.NEGATIVE_FLAG:
-            cpu.SR |= cpu.OVERFLOW_FLAG
-        cpu.A = (nibble1 << 4) + nibble0
+    index = ((cpu._sr & CARRY_FLAG) << 16) | (cpu.A << 8) | cpu.DB
+    if cpu._sr & DEC_MODE_FLAG:
+        entry = adc_decimal_table[index]
     else:
-        if cpu.SR & cpu.CARRY_FLAG:
-            tmp = 1
-        else:
-            tmp = 0
-        result = data + cpu.A + tmp
-        cpu.SR &= ~(cpu.CARRY_FLAG | cpu.OVERFLOW_FLAG | cpu.NEGATIVE_FLAG | cpu.ZERO_FLAG)
-        if (~(cpu.A ^ data) & (cpu.A ^ result)) & cpu.NEGATIVE_FLAG:
-            cpu.SR |= cpu.OVERFLOW_FLAG
-        data = result
-        if data > ((1 << 8) - 1):
-            cpu.SR |= cpu.CARRY_FLAG
-            data &= ((1 << 8) - 1)
-        if data == 0:
-            cpu.SR |= cpu.ZERO_FLAG
-        else:
-            cpu.SR |= data & cpu.NEGATIVE_FLAG
-        cpu.A = data
+        entry = adc_binary_table[index]
+    cpu._sr = (cpu._sr & KEEP_CV_FLAGS) | ((entry >> 8) & CV_FLAGS)
+    cpu._nz = nz_codes[entry >> 8]
+    cpu.A = entry & 0xFF
 
 
 def sbc_calc(cpu: CPU6502) -> None:
-    data = cpu.DB
-
-    if cpu.SR & cpu.DEC_MODE_FLAG:
-        halfcarry = 1
-        decimalcarry = 0
-        adjust0 = 0
-        adjust1 = 0
-
-        nibble0 = (cpu.A & 0xf) + (~data & 0xf) + (cpu.SR & cpu.CARRY_FLAG)
-        if nibble0 <= 0xf:
-            halfcarry = 0
-            adjust0 = 10
-        nibble1 = ((cpu.A >> 4) & 0xf) + ((~data >> 4) & 0xf) + halfcarry
-        if nibble1 <= 0xf:
-            adjust1 = 10 << 4
-
-        # the ALU outputs are not decimally adjusted
-        aluresult = cpu.A + (~data & ((1 << 8) - 1)) + (cpu.SR & cpu.CARRY_FLAG)
-
-        if aluresult > ((1 << 8) - 1):
-            decimalcarry = 1
-        aluresult &= ((1 << 8) - 1)
-
-        # but the final result will be adjusted
-        nibble0 = (aluresult + adjust0) & 0xf
-        nibble1 = ((aluresult + adjust1) >> 4) & 0xf
-
-        cpu.SR &= ~(cpu.CARRY_FLAG | cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG | cpu.OVERFLOW_FLAG)
-        if aluresult == 0:
-            cpu.SR |= cpu.ZERO_FLAG
-        else:
-            cpu.SR |= aluresult & cpu.NEGATIVE_FLAG
-        if decimalcarry == 1:
-            cpu.SR |= cpu.CARRY_FLAG
-        if ((cpu.A ^ data) & (cpu.A ^ aluresult)) & cpu.NEGATIVE_FLAG:
-            cpu.SR |= cpu.OVERFLOW_FLAG
-        cpu.A = (nibble1 << 4) + nibble0
+    index = ((cpu._sr & CARRY_FLAG) << 16) | (cpu.A << 8) | cpu.DB
+    if cpu._sr & DEC_MODE_FLAG:
+        entry = sbc_decimal_table[index]
     else:
-        result = cpu.A + (~data & ((1 << 8) - 1)) + (cpu.SR & cpu.CARRY_FLAG)
-        cpu.SR &= ~(cpu.CARRY_FLAG | cpu.ZERO_FLAG | cpu.OVERFLOW_FLAG | cpu.NEGATIVE_FLAG)
-        if ((cpu.A ^ data) & (cpu.A ^ result)) & cpu.NEGATIVE_FLAG:
-            cpu.SR |= cpu.OVERFLOW_FLAG
-        data = result & ((1 << 8) - 1)
-        if data == 0:
-            cpu.SR |= cpu.ZERO_FLAG
-        if result > ((1 << 8) - 1):
-            cpu.SR |= cpu.CARRY_FLAG
-        cpu.SR |= data & cpu.NEGATIVE_FLAG
-        cpu.A = data
+        entry = sbc_binary_table[index]
+    cpu._sr = (cpu._sr & KEEP_CV_FLAGS) | ((entry >> 8) & CV_FLAGS)
+    cpu._nz = nz_codes[entry >> 8]
+    cpu.A = entry & 0xFF
 
 
 def set_carry_flag(cpu: CPU6502) -> None:
-    cpu.SR |= CPU6502.CARRY_FLAG
+    cpu._sr |= CARRY_FLAG
 
 
 def clear_carry_flag(cpu: CPU6502) -> None:
-    cpu.SR &= ~CPU6502.CARRY_FLAG
+    cpu._sr &= ~CARRY_FLAG
 
 
 def set_decimal_flag(cpu: CPU6502) -> None:
-    cpu.SR |= CPU6502.DEC_MODE_FLAG
+    cpu._sr |= DEC_MODE_FLAG
 
 
 def clear_decimal_flag(cpu: CPU6502) -> None:
-    cpu.SR &= ~CPU6502.DEC_MODE_FLAG
+    cpu._sr &= ~DEC_MODE_FLAG
 
 
 def set_break_flag(cpu: CPU6502) -> None:
-    cpu.SR |= cpu.BREAK_FLAG
+    cpu._sr |= BREAK_FLAG
 
 
 def clear_break_flag(cpu: CPU6502) -> None:
-    cpu.SR &= ~CPU6502.BREAK_FLAG
+    cpu._sr &= ~BREAK_FLAG
 
 
 def set_interrupt_flag(cpu: CPU6502) -> None:
-    cpu.SR |= cpu.INT_DIS_FLAG
+    cpu._sr |= INT_DIS_FLAG
 
 
 def set_flags_after_interrupt(cpu: CPU6502) -> None:
-    cpu.SR &= ~cpu.BREAK_FLAG
-    cpu.SR |= cpu.INT_DIS_FLAG
+    cpu._sr &= ~BREAK_FLAG
+    cpu._sr |= INT_DIS_FLAG
 
 
 def clear_interrupt_flag(cpu: CPU6502) -> None:
-    cpu.SR &= ~CPU6502.INT_DIS_FLAG
+    cpu._sr &= ~INT_DIS_FLAG
 
 
 def clear_overflow_flag(cpu: CPU6502) -> None:
-    cpu.SR &= ~CPU6502.OVERFLOW_FLAG
+    cpu._sr &= ~OVERFLOW_FLAG
 
 
 def compare_temp_data_to_accumulator_register(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.CARRY_FLAG | cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.A == cpu.DB:
-        cpu.SR |= cpu.CARRY_FLAG | cpu.ZERO_FLAG
-    elif cpu.A > cpu.DB:
-        cpu.SR |= cpu.CARRY_FLAG
-    cpu.SR |= (cpu.A - cpu.DB) & cpu.NEGATIVE_FLAG
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.A >= cpu.DB)
+    cpu._nz = (cpu.A - cpu.DB) & 0xFF
 
 
 def compare_temp_data_to_X_register(cpu: CPU6502) -> None:
-
-    cpu.SR &= ~(cpu.CARRY_FLAG | cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.X == cpu.DB:
-        cpu.SR |= cpu.CARRY_FLAG | cpu.ZERO_FLAG
-    elif cpu.X > cpu.DB:
-        cpu.SR |= cpu.CARRY_FLAG
-    cpu.SR |= (cpu.X - cpu.DB) & cpu.NEGATIVE_FLAG
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.X >= cpu.DB)
+    cpu._nz = (cpu.X - cpu.DB) & 0xFF
 
 
 def compare_temp_data_to_Y_register(cpu: CPU6502) -> None:
-    cpu.SR &= ~(cpu.CARRY_FLAG | cpu.ZERO_FLAG | cpu.NEGATIVE_FLAG)
-    if cpu.Y == cpu.DB:
-        cpu.SR |= cpu.CARRY_FLAG | cpu.ZERO_FLAG
-    elif cpu.Y > cpu.DB:
-        cpu.SR |= cpu.CARRY_FLAG
-    cpu.SR |= (cpu.Y - cpu.DB) & cpu.NEGATIVE_FLAG
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (cpu.Y >= cpu.DB)
+    cpu._nz = (cpu.Y - cpu.DB) & 0xFF
 
 
 def dummy_op(cpu: CPU6502) -> None:
@@ -889,7 +1366,7 @@ def dummy_op(cpu: CPU6502) -> None:
 
 
 def branch_if_negative_set(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.NEGATIVE_FLAG:
+    if cpu._nz & LAZY_NEGATIVE_MASK:
         cpu.fetch_next_byte()
         branch_rel_addr(cpu=cpu)
     else:
@@ -897,7 +1374,7 @@ def branch_if_negative_set(cpu: CPU6502) -> None:
 
 
 def branch_if_negative_clear(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.NEGATIVE_FLAG:
+    if cpu._nz & LAZY_NEGATIVE_MASK:
         cpu.PC += 1
     else:
         cpu.fetch_next_byte()
@@ -905,7 +1382,7 @@ def branch_if_negative_clear(cpu: CPU6502) -> None:
 
 
 def branch_if_carry_set(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.CARRY_FLAG:
+    if cpu._sr & CARRY_FLAG:
         cpu.fetch_next_byte()
         branch_rel_addr(cpu=cpu)
     else:
@@ -913,7 +1390,7 @@ def branch_if_carry_set(cpu: CPU6502) -> None:
 
 
 def branch_if_carry_clear(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.CARRY_FLAG:
+    if cpu._sr & CARRY_FLAG:
         cpu.PC += 1
     else:
         cpu.fetch_next_byte()
@@ -921,7 +1398,7 @@ def branch_if_carry_clear(cpu: CPU6502) -> None:
 
 
 def branch_if_overflow_set(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.OVERFLOW_FLAG:
+    if cpu._sr & OVERFLOW_FLAG:
         cpu.fetch_next_byte()
         branch_rel_addr(cpu=cpu)
     else:
@@ -929,7 +1406,7 @@ def branch_if_overflow_set(cpu: CPU6502) -> None:
 
 
 def branch_if_overflow_clear(cpu: CPU6502) -> None:
-    if cpu.SR & cpu.OVERFLOW_FLAG:
+    if cpu._sr & OVERFLOW_FLAG:
         cpu.PC += 1
     else:
         cpu.fetch_next_byte()
@@ -941,17 +1418,118 @@ def branch_rel_addr(cpu: CPU6502) -> None:
     # addr = self.ImmediateByte()
     # cpu.PC += 1
 
-    if cpu.DB & cpu.NEGATIVE_FLAG:
-        cpu.DB = cpu.PC - (cpu.DB ^ ((1 << 8) - 1)) - 1
+    if cpu.DB & NEGATIVE_FLAG:
+        cpu.DB = cpu.PC - (cpu.DB ^ BYTE_MASK) - 1
     else:
         cpu.DB = cpu.PC + cpu.DB
 
-    # addrHighMask = (((1 << 8) - 1) << 8)
+    # addrHighMask = (BYTE_MASK << 8)
+
+    if (cpu.PC & ADDR_HIGH_MASK) != (cpu.DB & ADDR_HIGH_MASK):
+        cpu.inject_cycle(cycle_tasks=(dummy_op,))
+
+    cpu.PC = cpu.DB & ADDR_MASK
+
+
+# Undocumented NMOS opcodes
+
+# Chip-dependent constant ORed into A by the unstable ANE and LXA opcodes
+ANE_LXA_MAGIC_CONSTANT = 0xEE
+
+
+def jam(cpu: CPU6502) -> None:
+    cpu.jam()
+
+
+def save_accumulator_and_X_register_to_memory_address(cpu: CPU6502) -> None:
+    cpu.RW = RW_WRITE
+    cpu.DB = cpu.A & cpu.X
+    cpu.mem_space.write_byte(address=cpu.AB, byte=cpu.DB)
+
+
+def copy_negative_flag_to_carry_flag(cpu: CPU6502) -> None:
+    cpu._sr &= KEEP_CARRY_FLAG
+    if cpu._nz & LAZY_NEGATIVE_MASK:
+        cpu._sr |= CARRY_FLAG
+
+
+def arr_calc(cpu: CPU6502) -> None:
+    """AND with the operand, then ROR A with flags taken from the adder"""
+    sr = cpu._sr
+    anded = cpu.A & cpu.DB
+    rotated = (anded >> 1) | ((sr & CARRY_FLAG) << 7)
+
+    # N and Z follow the rotated value, before any decimal fix-up
+    cpu._nz = rotated
+    sr &= KEEP_CV_FLAGS
+    if sr & DEC_MODE_FLAG:
+        sr |= (anded ^ rotated) & OVERFLOW_FLAG
+        if (anded & 0x0F) + (anded & 0x01) > 5:
+            rotated = (rotated & 0xF0) | ((rotated + 6) & 0x0F)
+        if (anded >> 4) + ((anded >> 4) & 0x01) > 5:
+            rotated = (rotated + 0x60) & 0xFF
+            sr |= CARRY_FLAG
+    else:
+        sr |= ((rotated >> 6) & CARRY_FLAG) | ((rotated ^ (rotated << 1)) & OVERFLOW_FLAG)
+
+    cpu._sr = sr
+    cpu.A = rotated
+
+
+def ane_calc(cpu: CPU6502) -> None:
+    cpu.A = (cpu.A | ANE_LXA_MAGIC_CONSTANT) & cpu.X & cpu.DB
+
+
+def lxa_calc(cpu: CPU6502) -> None:
+    cpu.A = (cpu.A | ANE_LXA_MAGIC_CONSTANT) & cpu.DB
+    cpu.X = cpu.A
+
+
+def sbx_calc(cpu: CPU6502) -> None:
+    """X = (A AND X) - operand, flags as CMP"""
+    difference = (cpu.A & cpu.X) - cpu.DB
+    cpu._sr = (cpu._sr & KEEP_CARRY_FLAG) | (difference >= 0)
+    cpu.X = difference & BYTE_MASK
+    cpu._nz = cpu.X
+
+
+def las_calc(cpu: CPU6502) -> None:
+    cpu.SP = cpu.DB & cpu.SP
+    cpu.A = cpu.SP
+    cpu.X = cpu.SP
+
+
+def unstable_store(cpu: CPU6502, value: int, index: int) -> None:
+    """
+    SHA/SHX/SHY/TAS store value AND (high byte of the base address + 1). When
+    indexing crosses a page the stored value also replaces the high byte of
+    the effective address.
+    """
+    base = (cpu.AB - index) & ADDR_MASK
+    value &= ((base >> 8) + 1) & BYTE_MASK
+    if (base ^ cpu.AB) & ADDR_HIGH_MASK:
+        cpu.AB = (value << 8) | (cpu.AB & BYTE_MASK)
+
+    cpu.RW = RW_WRITE
+    cpu.DB = value
+    cpu.mem_space.write_byte(address=cpu.AB, byte=cpu.DB)
+
+
+def sha_store(cpu: CPU6502) -> None:
+    unstable_store(cpu=cpu, value=cpu.A & cpu.X, index=cpu.Y)
+
+
+def shx_store(cpu: CPU6502) -> None:
+    unstable_store(cpu=cpu, value=cpu.X, index=cpu.Y)
 
-    if (cpu.PC & cpu.addr_high_mask) != (cpu.DB & cpu.addr_high_mask):
-        cpu._instruction_tasks.append([dummy_op])
 
-    cpu.PC = cpu.DB & ((1 << 16) - 1)
+def shy_store(cpu: CPU6502) -> None:
+    unstable_store(cpu=cpu, value=cpu.Y, index=cpu.X)
+
+
+def tas_store(cpu: CPU6502) -> None:
+    cpu.SP = cpu.A & cpu.X
+    unstable_store(cpu=cpu, value=cpu.SP, index=cpu.Y)
 
 
 class imdict(dict):
@@ -2205,20 +2783,6 @@ ins_dict = imdict({
         ]
     },
 
-    0xe2: {
-        "syn": "NOP",
-        "instructions": [
-            [dummy_op]
-        ]
-    },
-
-    0xFC: {
-        "syn": "NOP",
-        "instructions": [
-            [dummy_op]
-        ]
-    },
-
     0x4C: {
         "syn": "JMP_ABS",
         "instructions": [
@@ -2596,7 +3160,1054 @@ ins_dict = imdict({
             [read_data_from_address, bit_compare]
         ]
     },
-})
+
+    # Undocumented NMOS opcodes
+
+    0x02: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x03: {
+        "syn": "SLO_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [dummy_op],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x04: {
+        "syn": "NOP_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address]
+        ]
+    },
+
+    0x07: {
+        "syn": "SLO_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x0B: {
+        "syn": "ANC_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data,
+             and_accumulator_and_temp_data,
+             check_accumulator_for_zero_and_neg,
+             copy_negative_flag_to_carry_flag]
+        ]
+    },
+
+    0x0C: {
+        "syn": "NOP_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address]
+        ]
+    },
+
+    0x0F: {
+        "syn": "SLO_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x12: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x13: {
+        "syn": "SLO_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [read_data_from_address],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x14: {
+        "syn": "NOP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address]
+        ]
+    },
+
+    0x17: {
+        "syn": "SLO_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x1A: {
+        "syn": "NOP",
+        "instructions": [
+            [dummy_op]
+        ]
+    },
+
+    0x1B: {
+        "syn": "SLO_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [read_data_from_address],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x1C: {
+        "syn": "NOP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address, read_data_from_address]
+        ]
+    },
+
+    0x1F: {
+        "syn": "SLO_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [read_data_from_address],
+            [arithmetic_shift_temp_data_left],
+            [save_temp_data_to_address, or_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x22: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x23: {
+        "syn": "RLA_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [dummy_op],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x27: {
+        "syn": "RLA_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x2B: {
+        "syn": "ANC_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data,
+             and_accumulator_and_temp_data,
+             check_accumulator_for_zero_and_neg,
+             copy_negative_flag_to_carry_flag]
+        ]
+    },
+
+    0x2F: {
+        "syn": "RLA_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x32: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x33: {
+        "syn": "RLA_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [read_data_from_address],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x34: {
+        "syn": "NOP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address]
+        ]
+    },
+
+    0x37: {
+        "syn": "RLA_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x3A: {
+        "syn": "NOP",
+        "instructions": [
+            [dummy_op]
+        ]
+    },
+
+    0x3B: {
+        "syn": "RLA_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [read_data_from_address],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x3C: {
+        "syn": "NOP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address, read_data_from_address]
+        ]
+    },
+
+    0x3F: {
+        "syn": "RLA_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [read_data_from_address],
+            [rotate_temp_address_left],
+            [save_temp_data_to_address, and_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x42: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x43: {
+        "syn": "SRE_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [dummy_op],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x44: {
+        "syn": "NOP_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address]
+        ]
+    },
+
+    0x47: {
+        "syn": "SRE_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x4B: {
+        "syn": "ALR_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data,
+             and_accumulator_and_temp_data,
+             logical_shift_accumulator_right,
+             check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x4F: {
+        "syn": "SRE_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x52: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x53: {
+        "syn": "SRE_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [read_data_from_address],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x54: {
+        "syn": "NOP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address]
+        ]
+    },
+
+    0x57: {
+        "syn": "SRE_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x5A: {
+        "syn": "NOP",
+        "instructions": [
+            [dummy_op]
+        ]
+    },
+
+    0x5B: {
+        "syn": "SRE_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [read_data_from_address],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x5C: {
+        "syn": "NOP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address, read_data_from_address]
+        ]
+    },
+
+    0x5F: {
+        "syn": "SRE_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [read_data_from_address],
+            [logical_shift_temp_data_right],
+            [save_temp_data_to_address, eor_accumulator_and_temp_data, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x62: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x63: {
+        "syn": "RRA_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [dummy_op],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x64: {
+        "syn": "NOP_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address]
+        ]
+    },
+
+    0x67: {
+        "syn": "RRA_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x6B: {
+        "syn": "ARR_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data, arr_calc]
+        ]
+    },
+
+    0x6F: {
+        "syn": "RRA_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x72: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x73: {
+        "syn": "RRA_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [read_data_from_address],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x74: {
+        "syn": "NOP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address]
+        ]
+    },
+
+    0x77: {
+        "syn": "RRA_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x7A: {
+        "syn": "NOP",
+        "instructions": [
+            [dummy_op]
+        ]
+    },
+
+    0x7B: {
+        "syn": "RRA_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [read_data_from_address],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x7C: {
+        "syn": "NOP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address, read_data_from_address]
+        ]
+    },
+
+    0x7F: {
+        "syn": "RRA_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [read_data_from_address],
+            [rotate_temp_address_right],
+            [save_temp_data_to_address, adc_calc]
+        ]
+    },
+
+    0x80: {
+        "syn": "NOP_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data]
+        ]
+    },
+
+    0x82: {
+        "syn": "NOP_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data]
+        ]
+    },
+
+    0x83: {
+        "syn": "SAX_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address],
+            [save_accumulator_and_X_register_to_memory_address]
+        ]
+    },
+
+    0x87: {
+        "syn": "SAX_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [save_accumulator_and_X_register_to_memory_address]
+        ]
+    },
+
+    0x89: {
+        "syn": "NOP_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data]
+        ]
+    },
+
+    0x8B: {
+        "syn": "ANE_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data, ane_calc, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0x8F: {
+        "syn": "SAX_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [save_accumulator_and_X_register_to_memory_address]
+        ]
+    },
+
+    0x92: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0x93: {
+        "syn": "SHA_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [sha_store]
+        ]
+    },
+
+    0x97: {
+        "syn": "SAX_ZERO_Y",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_Y_to_address_without_carry],
+            [save_accumulator_and_X_register_to_memory_address]
+        ]
+    },
+
+    0x9B: {
+        "syn": "TAS_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [tas_store]
+        ]
+    },
+
+    0x9C: {
+        "syn": "SHY_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [shy_store]
+        ]
+    },
+
+    0x9E: {
+        "syn": "SHX_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [shx_store]
+        ]
+    },
+
+    0x9F: {
+        "syn": "SHA_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [sha_store]
+        ]
+    },
+
+    0xA3: {
+        "syn": "LAX_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [save_temp_data_to_accumulator, save_temp_data_to_X_register, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xA7: {
+        "syn": "LAX_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte, read_data_from_address],
+            [save_temp_data_to_accumulator, save_temp_data_to_X_register, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xAB: {
+        "syn": "LXA_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data, lxa_calc, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xAF: {
+        "syn": "LAX_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address,
+             save_temp_data_to_accumulator,
+             save_temp_data_to_X_register,
+             check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xB2: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0xB3: {
+        "syn": "LAX_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [save_temp_data_to_accumulator, save_temp_data_to_X_register, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xB7: {
+        "syn": "LAX_ZERO_Y",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_Y_to_address_without_carry, read_data_from_address],
+            [save_temp_data_to_accumulator, save_temp_data_to_X_register, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xBB: {
+        "syn": "LAS_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address, read_data_from_address, las_calc, check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xBF: {
+        "syn": "LAX_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address,
+             read_data_from_address,
+             save_temp_data_to_accumulator,
+             save_temp_data_to_X_register,
+             check_accumulator_for_zero_and_neg]
+        ]
+    },
+
+    0xC2: {
+        "syn": "NOP_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data]
+        ]
+    },
+
+    0xC3: {
+        "syn": "DCP_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [dummy_op],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xC7: {
+        "syn": "DCP_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xCB: {
+        "syn": "SBX_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data, sbx_calc]
+        ]
+    },
+
+    0xCF: {
+        "syn": "DCP_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xD2: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0xD3: {
+        "syn": "DCP_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [read_data_from_address],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xD4: {
+        "syn": "NOP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address]
+        ]
+    },
+
+    0xD7: {
+        "syn": "DCP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xDA: {
+        "syn": "NOP",
+        "instructions": [
+            [dummy_op]
+        ]
+    },
+
+    0xDB: {
+        "syn": "DCP_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [read_data_from_address],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xDC: {
+        "syn": "NOP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address, read_data_from_address]
+        ]
+    },
+
+    0xDF: {
+        "syn": "DCP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [read_data_from_address],
+            [decrement_temp_data],
+            [save_temp_data_to_address, compare_temp_data_to_accumulator_register]
+        ]
+    },
+
+    0xE2: {
+        "syn": "NOP_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data]
+        ]
+    },
+
+    0xE3: {
+        "syn": "ISC_IND_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_eff_address_low_byte, read_data_eff_address_high_byte],
+            [construct_ind_address, read_data_from_address],
+            [dummy_op],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+
+    0xE7: {
+        "syn": "ISC_ZERO",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [read_data_from_address],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+
+    0xEB: {
+        "syn": "USBC_IMM",
+        "instructions": [
+            [read_operand_byte_to_temp_data, sbc_calc]
+        ]
+    },
+
+    0xEF: {
+        "syn": "ISC_ABS",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [read_data_from_address],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+
+    0xF2: {
+        "syn": "KIL",
+        "instructions": [
+            [jam]
+        ]
+    },
+
+    0xF3: {
+        "syn": "ISC_IND_Y",
+        "instructions": [
+            [ind_y],
+            [dummy_op],
+            [dummy_op],
+            [dummy_op],
+            [read_data_from_address],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+
+    0xF4: {
+        "syn": "NOP_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address]
+        ]
+    },
+
+    0xF7: {
+        "syn": "ISC_ZERO_X",
+        "instructions": [
+            [read_operand_low_address_byte, read_zero_to_address_high_byte],
+            [add_X_to_address_without_carry],
+            [read_data_from_address],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+
+    0xFA: {
+        "syn": "NOP",
+        "instructions": [
+            [dummy_op]
+        ]
+    },
+
+    0xFB: {
+        "syn": "ISC_ABS_Y",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_Y_to_address],
+            [read_data_from_address],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+
+    0xFC: {
+        "syn": "NOP_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address, read_data_from_address]
+        ]
+    },
+
+    0xFF: {
+        "syn": "ISC_ABS_X",
+        "instructions": [
+            [read_operand_low_address_byte],
+            [read_operand_high_address_byte],
+            [add_X_to_address],
+            [read_data_from_address],
+            [increment_temp_data],
+            [save_temp_data_to_address, sbc_calc]
+        ]
+    },
+})
+
+# Flat dispatch tables indexed by opcode; every one of the 256 opcodes is defined
+ins_table: List[dict] = [ins_dict[opcode] for opcode in range(256)]
+
+# Immutable per-opcode cycle lists for the tick engine
+tick_ins_table: List[Tuple[CycleTasks, ...]] = [
+    tuple(tuple(cycle_tasks) for cycle_tasks in instruction["instructions"]) for instruction in ins_table
+]
+
+irq_cycles: Tuple[CycleTasks, ...] = (
+    (push_program_counter_low_byte_to_stack, decrement_stack_pointer),
+    (push_program_counter_high_byte_to_stack, decrement_stack_pointer),
+    (push_proc_status_after_irq_to_stack, decrement_stack_pointer),
+    (set_program_counter_to_interrupt_vector,),  # WRONG this should take more cycles
+    (set_flags_after_interrupt, count_interrupt)
+)
+
+nmi_cycles: Tuple[CycleTasks, ...] = (
+    (push_program_counter_low_byte_to_stack, decrement_stack_pointer),
+    (push_program_counter_high_byte_to_stack, decrement_stack_pointer),
+    (push_proc_status_after_irq_to_stack, decrement_stack_pointer),
+    (set_program_counter_to_nmi_vector,),  # WRONG this should take more cycles
+    (set_flags_after_interrupt, count_interrupt)
+)
+
+fused_ins_table = build_fused_table(instructions=ins_dict, namespace=globals())
 
 
 def load_prog(cpu: CPU6502, program_code):
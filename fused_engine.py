@@ -0,0 +1,115 @@
+"""
+Instruction-granular execution engine.
+
+Each opcode's micro-op list from ins_dict is turned into a single generated
+Python function that performs every cycle of the instruction in one call and
+returns the number of cycles used, including the opcode fetch. Cycles that
+micro-ops inject (branch page crossings) are left queued on the CPU for the
+caller to run. The micro-op bodies are inlined where that is safe, so an
+instruction costs one Python call instead of one call per micro-op plus the
+tick() bookkeeping.
+"""
+import inspect
+import textwrap
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@lru_cache(maxsize=None)
+def _micro_op_body(micro_op: Callable) -> Optional[Tuple[str, ...]]:
+    try:
+        source = textwrap.dedent(inspect.getsource(micro_op))
+    except (OSError, TypeError):
+        return None
+
+    code = micro_op.__code__
+    if code.co_argcount != 1 or code.co_varnames[0] != "cpu" or "return" in source:
+        return None
+
+    lines = source.splitlines()
+    while lines and not lines[0].startswith("def "):
+        lines.pop(0)  # decorators
+    if not lines or not lines[0].rstrip().endswith(":"):
+        return None
+
+    body = textwrap.dedent("\n".join(lines[1:])).splitlines()
+    body = [line for line in body if line.strip() and not line.strip().startswith("#")]
+
+    # drop a leading docstring
+    if body and body[0].lstrip().startswith(('"""', "'''")):
+        quote = body[0].lstrip()[:3]
+        first = body.pop(0)
+        if first.count(quote) < 2:
+            while body and quote not in body[0]:
+                body.pop(0)
+            if body:
+                body.pop(0)
+
+    return tuple(body) or ("pass",)
+
+
+def can_inline(micro_ops: List[Callable]) -> bool:
+    # a local assigned in one body must not shadow a global read by another
+    local_names = set()
+    global_names = set()
+    for micro_op in micro_ops:
+        local_names.update(micro_op.__code__.co_varnames[1:])
+        global_names.update(micro_op.__code__.co_names)
+    return not (local_names & global_names)
+
+
+def instruction_micro_ops(instruction: Dict) -> List[Callable]:
+    return [micro_op for cycle in instruction["instructions"] for micro_op in cycle]
+
+
+def writes_memory(micro_ops: List[Callable]) -> bool:
+    """Whether any of the micro-ops can store to memory, and so rewrite code"""
+    return any("write_byte" in micro_op.__code__.co_names for micro_op in micro_ops)
+
+
+def instruction_cycles(instruction: Dict) -> int:
+    return len(instruction["instructions"]) + 1  # +1 for the opcode fetch
+
+
+def fused_body_lines(micro_ops: List[Callable], inline: bool = True) -> List[str]:
+    """
+    Python statements, unindented, that perform the given micro-ops on `cpu`
+    in order. The caller is responsible for checking can_inline() over
+    everything that ends up in the same function.
+    """
+    lines = []
+    for micro_op in micro_ops:
+        body = _micro_op_body(micro_op) if inline else None
+        if body is None:
+            lines.append(f"{micro_op.__name__}(cpu)")
+        else:
+            lines.extend(body)
+    return lines
+
+
+def generate_fused_source(opcode: int, instruction: Dict, inline: bool = True) -> str:
+    micro_ops = instruction_micro_ops(instruction=instruction)
+    inline = inline and can_inline(micro_ops)
+
+    lines = [f"def fused_{opcode:02X}(cpu):",
+             f"    # {instruction['syn']}"]
+    lines.extend("    " + line for line in fused_body_lines(micro_ops=micro_ops, inline=inline))
+    lines.append(f"    return {instruction_cycles(instruction=instruction)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def build_fused_table(instructions: Dict, namespace: Dict, inline: bool = True) -> List[Optional[Callable]]:
+    """
+    Compile one function per opcode. The namespace must provide the micro-op
+    functions and helpers referenced by the instruction table (normally the
+    globals of cpu6502). Unknown opcodes are left as None.
+    """
+    table: List[Optional[Callable]] = [None] * 256
+    for opcode, instruction in instructions.items():
+        source = generate_fused_source(opcode=opcode, instruction=instruction, inline=inline)
+        code = compile(source, f"<fused {instruction['syn']}>", "exec")
+        scope = {}
+        exec(code, namespace, scope)
+        table[opcode] = scope[f"fused_{opcode:02X}"]
+    return table
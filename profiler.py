@@ -0,0 +1,258 @@
+"""
+Guest hot-spot profile.
+
+A CycleProfiler keeps a cycle counter for every address. While one is
+attached to a CPU (CPU6502.start_profile()) the run loops add the cycles of
+each instruction to the counter of its PC; the translated engine adds a whole
+block's cycles to the block's first address. report() folds the busy
+addresses into routines, each address going to the nearest symbol at or below
+it, so names come from tables such as c64_jmptbl:
+
+    profiler = cpu.start_profile()
+    cpu.run(cycles=10_000_000)
+    print(profiler.report(symbols=merge_symbols(c64_jmptbl, diag_jmp_table, diag_jmp_table2)))
+
+A CallProfiler (CPU6502.start_call_profile()) keeps a shadow of the call
+stack from JSR, BRK and interrupts, and charges each routine, known by its
+entry address, the cycles spent in it with and without the routines it
+calls. Returns are recognised by the stack pointer rather than by matching
+each RTS to a JSR: RTS, RTI and TXS pop every frame whose caller's SP has
+been restored. A routine that pushes an address and RTSes to it (RTS as a
+jump) stays where it is, one that drops its return address and RTSes to its
+caller's caller closes both frames, and a stack reset unwinds everything
+above it. Costs can be written out as folded stacks for flame graph tools:
+
+    calls = cpu.start_call_profile()
+    cpu.run(cycles=10_000_000)
+    cpu.stop_call_profile().write_folded(file_name="c64.folded", symbols=symbols)
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ADDRESS_SPACE = 0x10000
+# code further than this past the nearest symbol is put down to its page instead
+DEFAULT_MAX_ROUTINE_SIZE = 0x400
+DEFAULT_REPORT_ROUTINES = 20
+
+OPCODE_BRK = 0x00
+OPCODE_JSR = 0x20
+OPCODE_RTI = 0x40
+OPCODE_RTS = 0x60
+OPCODE_TXS = 0x9A
+# the opcodes a CallProfiler has to see; anything else only matters if an interrupt came in
+CALL_OPCODES = frozenset((OPCODE_BRK, OPCODE_JSR, OPCODE_RTI, OPCODE_RTS, OPCODE_TXS))
+
+# above any SP, so the frame a profile starts in is never returned from
+ROOT_FRAME_SP = 0x100
+STACK_PAGE = 0x100
+
+
+def merge_symbols(*tables: Dict[int, str]) -> Dict[int, str]:
+    """One symbol table from several, names with their tabs and padding squeezed out; earlier tables win"""
+    symbols = {}
+    for table in reversed(tables):
+        for address, name in table.items():
+            symbols[address] = " ".join(name.split())
+    return symbols
+
+
+@dataclass
+class RoutineProfile:
+    address: int  # of the symbol, or of the page for code with no symbol near it
+    name: str
+    cycles: int
+    share: float  # of all the cycles profiled
+    hot_address: int  # the busiest address in the routine
+
+
+class CycleProfiler:
+
+    def __init__(self):
+        self.cycles: List[int] = [0] * ADDRESS_SPACE
+
+    def reset(self) -> None:
+        self.cycles[:] = [0] * ADDRESS_SPACE
+
+    @property
+    def total(self) -> int:
+        return sum(self.cycles)
+
+    def hot_addresses(self, count: int = DEFAULT_REPORT_ROUTINES) -> List[Tuple[int, int]]:
+        """The count busiest (address, cycles), busiest first"""
+        busy = [(address, cycles) for address, cycles in enumerate(self.cycles) if cycles]
+        busy.sort(key=lambda entry: entry[1], reverse=True)
+        return busy[:count]
+
+    def routines(self, symbols: Optional[Dict[int, str]] = None,
+                 max_routine_size: int = DEFAULT_MAX_ROUTINE_SIZE) -> List[RoutineProfile]:
+        """Every address that used any cycles, grouped into routines, busiest first"""
+        symbols = symbols or {}
+        symbol_addresses = sorted(symbols)
+        total = self.total
+
+        routines: Dict[int, RoutineProfile] = {}
+        for address, cycles in enumerate(self.cycles):
+            if not cycles:
+                continue
+
+            index = bisect_right(symbol_addresses, address) - 1
+            if index >= 0 and address - symbol_addresses[index] < max_routine_size:
+                start = symbol_addresses[index]
+                name = symbols[start]
+            else:
+                start = address & 0xFF00
+                name = f"${start:04X}-${start | 0xFF:04X}"
+
+            routine = routines.get(start)
+            if routine is None:
+                routines[start] = RoutineProfile(address=start, name=name, cycles=cycles, share=0.0,
+                                                 hot_address=address)
+            else:
+                if cycles > self.cycles[routine.hot_address]:
+                    routine.hot_address = address
+                routine.cycles += cycles
+
+        for routine in routines.values():
+            routine.share = routine.cycles / total
+        return sorted(routines.values(), key=lambda routine: routine.cycles, reverse=True)
+
+    def report(self, symbols: Optional[Dict[int, str]] = None, count: int = DEFAULT_REPORT_ROUTINES,
+               max_routine_size: int = DEFAULT_MAX_ROUTINE_SIZE) -> str:
+        """The count busiest routines as a table"""
+        lines = [f"{'cycles':>14}  {'share':>6}  {'start':>5}  {'hot':>5}  routine"]
+        for routine in self.routines(symbols=symbols, max_routine_size=max_routine_size)[:count]:
+            lines.append(f"{routine.cycles:>14,}  {routine.share:>6.1%}  ${routine.address:04X}  "
+                         f"${routine.hot_address:04X}  {routine.name}")
+        lines.append(f"{self.total:>14,}  total")
+        return "\n".join(lines)
+
+
+def symbol_name(address: int, symbols: Optional[Dict[int, str]] = None) -> str:
+    """The symbol at address, or the address in hex"""
+    if symbols and address in symbols:
+        return symbols[address]
+    return f"${address:04X}"
+
+
+@dataclass
+class CallFrame:
+    address: int  # of the routine
+    sp: int  # SP before the call, back to which the routine has returned
+    start: int  # cycle the call started on
+    children: int = 0  # cycles spent in the routines it has called
+
+
+@dataclass
+class RoutineCost:
+    address: int
+    calls: int = 0
+    inclusive: int = 0  # cycles in the routine and everything it called, recursion counted once
+    exclusive: int = 0  # cycles in the routine's own instructions
+
+
+class CallProfiler:
+
+    def __init__(self, pc: int, now: int, interrupts_taken: int, peek_byte: Callable[[int], int]):
+        self.peek_byte = peek_byte
+        self.interrupts_seen = interrupts_taken
+
+        self.stack: List[CallFrame] = []
+        self.costs: Dict[int, RoutineCost] = {}
+        # exclusive cycles by the addresses of the routines on the stack, outermost first
+        self.folded: Dict[Tuple[int, ...], int] = {}
+        self._on_stack: Dict[int, int] = {}
+        self._enter(address=pc, sp=ROOT_FRAME_SP, start=now)
+
+        # SP and cycle as the instruction being run started
+        self._sp = 0
+        self._start = now
+
+    def instruction_started(self, cpu, pc: int, opcode: int) -> None:
+        """The fused run loop's hooks"""
+        self._sp = cpu.SP
+        self._start = cpu.scheduler.now
+
+    def instruction_finished(self, cpu, pc: int, opcode: int, cycles: int) -> None:
+        if opcode in CALL_OPCODES or cpu.interrupts_taken != self.interrupts_seen:
+            self.instruction(opcode=opcode, sp=self._sp, start=self._start, end=cpu.scheduler.now, new_sp=cpu.SP,
+                             new_pc=cpu.PC, interrupts_taken=cpu.interrupts_taken)
+
+    def instruction(self, opcode: int, sp: int, start: int, end: int, new_sp: int, new_pc: int,
+                    interrupts_taken: int) -> None:
+        """
+        Account for an instruction that is in CALL_OPCODES or was followed by
+        an interrupt: opcode and sp as it started, new_sp and new_pc as it and
+        any interrupt left them, start and end the cycles either side.
+        """
+        handler = None
+        if interrupts_taken != self.interrupts_seen:
+            self.interrupts_seen = interrupts_taken
+            # the instruction left PC and SP as the interrupt found and pushed them
+            handler = new_pc
+            new_pc = self.peek_byte(STACK_PAGE | (new_sp + 2) & 0xFF) | \
+                self.peek_byte(STACK_PAGE | (new_sp + 3) & 0xFF) << 8
+            new_sp = (new_sp + 3) & 0xFF
+
+        if opcode == OPCODE_JSR or opcode == OPCODE_BRK:
+            self._enter(address=new_pc, sp=sp, start=start)
+        elif opcode in CALL_OPCODES:
+            # RTS, RTI and TXS: whatever SP now stands above has returned
+            while len(self.stack) > 1 and self.stack[-1].sp <= new_sp:
+                self._leave(end=end)
+
+        if handler is not None:
+            self._enter(address=handler, sp=new_sp, start=end)
+
+    def _enter(self, address: int, sp: int, start: int) -> None:
+        self.stack.append(CallFrame(address=address, sp=sp, start=start))
+        cost = self.costs.get(address)
+        if cost is None:
+            cost = self.costs[address] = RoutineCost(address=address)
+        cost.calls += 1
+        self._on_stack[address] = self._on_stack.get(address, 0) + 1
+
+    def _leave(self, end: int) -> None:
+        frame = self.stack[-1]
+        inclusive = end - frame.start
+        exclusive = inclusive - frame.children
+
+        path = tuple(caller.address for caller in self.stack)
+        self.folded[path] = self.folded.get(path, 0) + exclusive
+        self.stack.pop()
+
+        cost = self.costs[frame.address]
+        cost.exclusive += exclusive
+        self._on_stack[frame.address] -= 1
+        if not self._on_stack[frame.address]:
+            cost.inclusive += inclusive
+        if self.stack:
+            self.stack[-1].children += inclusive
+
+    def finish(self, end: int) -> None:
+        """Close every frame still open, the one the profile started in too"""
+        while self.stack:
+            self._leave(end=end)
+
+    def routines(self) -> List[RoutineCost]:
+        """Every routine entered, highest inclusive cost first. Open frames are not counted until finish()"""
+        return sorted(self.costs.values(), key=lambda cost: cost.inclusive, reverse=True)
+
+    def report(self, symbols: Optional[Dict[int, str]] = None, count: int = DEFAULT_REPORT_ROUTINES) -> str:
+        lines = [f"{'inclusive':>14}  {'exclusive':>14}  {'calls':>9}  {'start':>5}  routine"]
+        for cost in self.routines()[:count]:
+            lines.append(f"{cost.inclusive:>14,}  {cost.exclusive:>14,}  {cost.calls:>9,}  ${cost.address:04X}  "
+                         f"{symbol_name(address=cost.address, symbols=symbols)}")
+        return "\n".join(lines)
+
+    def folded_stacks(self, symbols: Optional[Dict[int, str]] = None) -> Iterator[str]:
+        """Lines of the folded stack format: routine names outermost first, separated by ';', then cycles"""
+        for path, cycles in self.folded.items():
+            if cycles:
+                names = (symbol_name(address=address, symbols=symbols).replace(";", ",") for address in path)
+                yield f"{';'.join(names)} {cycles}"
+
+    def write_folded(self, file_name: str, symbols: Optional[Dict[int, str]] = None) -> None:
+        with open(file_name, "w") as file:
+            for line in self.folded_stacks(symbols=symbols):
+                file.write(line + "\n")
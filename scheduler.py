@@ -0,0 +1,118 @@
+"""
+Cycle-stamped event scheduler.
+
+Devices do not get a call on every CPU cycle. Instead each one schedules a
+callback for the absolute cycle at which it next has something to do (a timer
+underflow, the start of a raster line, a sample boundary) and the CPU hands
+control over only when that cycle has been reached:
+
+    scheduler.schedule(cycle=scheduler.now + 63, callback=next_raster_line)
+
+The CPU advances now after every instruction (every cycle on the tick engine)
+and compares it against next_deadline, so a machine whose devices are idle pays
+one comparison per instruction. Deadlines are serviced at the first instruction
+boundary at or after the requested cycle; the translated engine checks at block
+boundaries. A callback receives the cycle it was scheduled for, which may be a
+few cycles behind now, and is free to schedule its next deadline from it.
+
+Events are kept in a heap of [cycle, sequence, callback] entries; cancelled
+entries stay in the heap with their callback cleared until they come due.
+"""
+import heapq
+import sys
+from typing import Callable, List, Optional
+
+NEVER = sys.maxsize
+
+EventCallback = Callable[[int], None]
+
+
+class EventScheduler:
+
+    def __init__(self):
+        self.now: int = 0
+        self.next_deadline: int = NEVER
+        self._events: List[list] = []
+        self._sequence: int = 0
+
+    def schedule(self, cycle: int, callback: EventCallback) -> list:
+        """
+        Call callback(cycle) once the clock reaches cycle. Returns a handle for
+        cancel(). Events due on the same cycle run in the order scheduled.
+        """
+        entry = [cycle, self._sequence, callback]
+        self._sequence += 1
+        heapq.heappush(self._events, entry)
+        if cycle < self.next_deadline:
+            self.next_deadline = cycle
+        return entry
+
+    def schedule_in(self, cycles: int, callback: EventCallback) -> list:
+        return self.schedule(cycle=self.now + cycles, callback=callback)
+
+    def cancel(self, entry: list) -> None:
+        entry[2] = None
+
+    def advance(self, cycles: int) -> None:
+        """Move the clock on and run whatever has come due"""
+        self.now += cycles
+        if self.now >= self.next_deadline:
+            self.run_due()
+
+    def run_due(self) -> None:
+        events = self._events
+        while events and events[0][0] <= self.now:
+            cycle, _, callback = heapq.heappop(events)
+            if callback is not None:
+                callback(cycle)
+
+        self.next_deadline = events[0][0] if events else NEVER
+
+    def pending(self) -> int:
+        """Number of events still to run, cancelled ones excluded"""
+        return sum(1 for entry in self._events if entry[2] is not None)
+
+    def clear(self) -> None:
+        self._events.clear()
+        self.next_deadline = NEVER
+
+
+class CatchUpDevice:
+    """
+    Base for devices that are synchronised lazily. Rather than running every
+    cycle, a device remembers the cycle it was last brought up to date and
+    catches up on the cycles since then only when someone looks at it: the
+    CPU reading or writing one of its registers, or one of its own deadlines
+    coming due. A device nobody touches costs nothing.
+    """
+
+    def __init__(self):
+        self.scheduler: Optional[EventScheduler] = None
+        self.last_synced_cycle: int = 0
+
+    def attach_scheduler(self, scheduler: EventScheduler) -> None:
+        self.scheduler = scheduler
+        self.last_synced_cycle = scheduler.now
+
+    def sync(self) -> None:
+        """Bring the device up to the scheduler's current cycle"""
+        if self.scheduler is None:
+            return
+
+        now = self.scheduler.now
+        elapsed = now - self.last_synced_cycle
+        if elapsed > 0:
+            self.last_synced_cycle = now
+            self.catch_up(cycles=elapsed)
+
+    def catch_up(self, cycles: int) -> None:
+        """Advance the device's state by the given number of cycles"""
+        pass
+
+    def schedule_deadline(self, cycle: int, callback: EventCallback) -> list:
+        """Schedule callback(cycle) with the device synchronised first, e.g. for an interrupt"""
+        def deadline(due_cycle: int) -> None:
+            self.sync()
+            callback(due_cycle)
+
+        return self.scheduler.schedule(cycle=cycle, callback=deadline)
@@ -1,8 +1,217 @@
+import mmap
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+IoReadHandler = Callable[[int], int]
+IoWriteHandler = Callable[[int, int], None]
+
+# Zero page and stack: the pages a decoder can expose as direct_ram
+DIRECT_RAM_PAGES = (0x00, 0x01)
+DIRECT_RAM_SIZE = 0x200
+
+
+def map_image(file_name: str) -> memoryview:
+    """
+    A ROM or program image as a read-only memoryview over a memory-mapped
+    file. Nothing is copied, and every emulator on the host that maps the
+    same image shares its page-cache pages.
+    """
+    with open(file_name, "rb") as file:
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return memoryview(b"")
+    return memoryview(mapping)
+
+
+@dataclass(eq=False)
+class Watchpoint:
+    """
+    Reads and/or writes of [start, end]. condition(address, value), if given,
+    decides whether an access counts; callback(watchpoint) is told of each
+    one that does. The last counted access is kept in address, value and
+    was_write.
+    """
+    start: int
+    end: int
+    on_read: bool = False
+    on_write: bool = True
+    condition: Optional[Callable[[int, int], bool]] = None
+    callback: Optional[Callable[["Watchpoint"], None]] = None
+    hits: int = 0
+    address: Optional[int] = None
+    value: Optional[int] = None
+    was_write: bool = False
+
+    def trigger(self, address: int, value: int, write: bool) -> None:
+        if self.condition is not None and not self.condition(address, value):
+            return
+
+        self.hits += 1
+        self.address = address
+        self.value = value
+        self.was_write = write
+        if self.callback is not None:
+            self.callback(self)
 
 
 class AddressDecoder(ABC):
 
+    def __init__(self):
+        # One flag per 256-byte page that holds translated code. A write to a
+        # flagged page calls code_invalidator(start, end) so the cache can drop
+        # the blocks it overlaps; writes anywhere else cost a single lookup.
+        self.code_pages = bytearray(256)
+        self.code_invalidator: Optional[Callable[[int, int], None]] = None
+
+        # Memory-mapped I/O, one entry per page: None where the whole page is
+        # plain memory, else the handler (or None) for each of its 256 bytes
+        self.page_read_handlers: List[Optional[List[Optional[IoReadHandler]]]] = [None] * 256
+        self.page_write_handlers: List[Optional[List[Optional[IoWriteHandler]]]] = [None] * 256
+
+        # Pages $00 and $01 as a buffer indexed by absolute address, for
+        # decoders where both are plain RAM. The CPU reads zero-page pointers
+        # and the stack from it, and writes the stack to it while page $01
+        # holds no translated code, without a read_byte/write_byte call.
+        # None sends those accesses through the decoder as usual.
+        self.direct_ram: Optional[bytearray] = None
+
+        # Watchpoints, and per page the ones covering it for reads and for
+        # writes. While there are none read_byte/write_byte are the decoder's
+        # own; with any set they are wrapped, and the wrappers look no further
+        # than the page's entry for an unwatched page.
+        self.watchpoints: List[Watchpoint] = []
+        self.page_read_watchpoints: List[Optional[List[Watchpoint]]] = [None] * 256
+        self.page_write_watchpoints: List[Optional[List[Watchpoint]]] = [None] * 256
+        self._read_byte_unwatched = self.read_byte
+        self._write_byte_unwatched = self.write_byte
+        self._suspended_direct_ram: Optional[bytearray] = None
+
+    def register_io_handler(self, start: int, end: int, read: Optional[IoReadHandler] = None,
+                            write: Optional[IoWriteHandler] = None, mirror: Optional[int] = None) -> None:
+        """
+        Send CPU reads of [start, end] to read(address) and writes to
+        write(address, byte); either may be None to leave that direction to
+        plain memory. With mirror, the registers repeat every mirror bytes
+        and the handlers are given the address of the first copy.
+        """
+        if mirror is not None:
+            read = self._mirrored_read(read=read, start=start, mirror=mirror)
+            write = self._mirrored_write(write=write, start=start, mirror=mirror)
+
+        for handlers, handler in ((self.page_read_handlers, read), (self.page_write_handlers, write)):
+            if handler is None:
+                continue
+            for address in range(start, end + 1):
+                page = handlers[address >> 8]
+                if page is None:
+                    page = handlers[address >> 8] = [None] * 256
+                page[address & 0xFF] = handler
+
+        if any(handlers[page] is not None for handlers in (self.page_read_handlers, self.page_write_handlers)
+               for page in DIRECT_RAM_PAGES):
+            self.direct_ram = None
+            self._suspended_direct_ram = None
+
+        self.io_handlers_changed()
+
+    @staticmethod
+    def _mirrored_read(read: Optional[IoReadHandler], start: int, mirror: int) -> Optional[IoReadHandler]:
+        if read is None:
+            return None
+        return lambda address: read(start + (address - start) % mirror)
+
+    @staticmethod
+    def _mirrored_write(write: Optional[IoWriteHandler], start: int, mirror: int) -> Optional[IoWriteHandler]:
+        if write is None:
+            return None
+        return lambda address, byte: write(start + (address - start) % mirror, byte)
+
+    def io_handlers_changed(self) -> None:
+        """Called after register_io_handler() for decoders that cache the handler tables"""
+        pass
+
+    def set_accessors(self, read_byte: IoReadHandler, write_byte: IoWriteHandler) -> None:
+        """Replace read_byte/write_byte on this instance, underneath any watchpoints"""
+        self._read_byte_unwatched = read_byte
+        self._write_byte_unwatched = write_byte
+        if not self.watchpoints:
+            self.read_byte = read_byte
+            self.write_byte = write_byte
+
+    def peek_byte(self, address) -> int:
+        """read_byte() without triggering watchpoints"""
+        return self._read_byte_unwatched(address=address)
+
+    def add_watchpoint(self, start: int, end: Optional[int] = None, read: bool = False, write: bool = True,
+                       condition: Optional[Callable[[int, int], bool]] = None,
+                       callback: Optional[Callable[[Watchpoint], None]] = None) -> Watchpoint:
+        """Watch CPU reads and/or writes of [start, end], or of start alone"""
+        watchpoint = Watchpoint(start=start, end=start if end is None else end, on_read=read, on_write=write,
+                                condition=condition, callback=callback)
+        self.watchpoints.append(watchpoint)
+        self._watchpoints_changed()
+        return watchpoint
+
+    def remove_watchpoint(self, watchpoint: Watchpoint) -> None:
+        self.watchpoints.remove(watchpoint)
+        self._watchpoints_changed()
+
+    def _watchpoints_changed(self) -> None:
+        for page in range(256):
+            self.page_read_watchpoints[page] = None
+            self.page_write_watchpoints[page] = None
+        for watchpoint in self.watchpoints:
+            for page in range(watchpoint.start >> 8, (watchpoint.end >> 8) + 1):
+                for watched, tables in ((watchpoint.on_read, self.page_read_watchpoints),
+                                        (watchpoint.on_write, self.page_write_watchpoints)):
+                    if watched:
+                        if tables[page] is None:
+                            tables[page] = []
+                        tables[page].append(watchpoint)
+
+        # the CPU bypasses read_byte/write_byte for direct_ram, so it is
+        # withdrawn while the zero page or stack is watched
+        watched_direct_ram = any(tables[page] is not None for tables in (self.page_read_watchpoints,
+                                                                         self.page_write_watchpoints)
+                                 for page in DIRECT_RAM_PAGES)
+        if watched_direct_ram and self.direct_ram is not None:
+            self._suspended_direct_ram = self.direct_ram
+            self.direct_ram = None
+        elif not watched_direct_ram and self._suspended_direct_ram is not None:
+            self.direct_ram = self._suspended_direct_ram
+            self._suspended_direct_ram = None
+
+        if self.watchpoints:
+            self.read_byte = self._read_byte_watched
+            self.write_byte = self._write_byte_watched
+        else:
+            self.read_byte = self._read_byte_unwatched
+            self.write_byte = self._write_byte_unwatched
+
+    def _read_byte_watched(self, address) -> int:
+        value = self._read_byte_unwatched(address=address)
+        watchpoints = self.page_read_watchpoints[address >> 8]
+        if watchpoints is not None:
+            for watchpoint in watchpoints:
+                if watchpoint.start <= address <= watchpoint.end:
+                    watchpoint.trigger(address=address, value=value, write=False)
+        return value
+
+    def _write_byte_watched(self, address, byte) -> None:
+        watchpoints = self.page_write_watchpoints[address >> 8]
+        if watchpoints is not None:
+            for watchpoint in watchpoints:
+                if watchpoint.start <= address <= watchpoint.end:
+                    watchpoint.trigger(address=address, value=byte, write=True)
+        self._write_byte_unwatched(address=address, byte=byte)
+
+    def invalidate_code(self, start: int, end: int) -> None:
+        """Tell the code cache that [start, end) may hold different bytes now"""
+        if self.code_invalidator is not None and any(self.code_pages[start >> 8:((end - 1) >> 8) + 1]):
+            self.code_invalidator(start, end)
+
     @abstractmethod
     def read_byte(self, address):
         pass
@@ -10,6 +219,22 @@ class AddressDecoder(ABC):
     @abstractmethod
     def write_byte(self, address, byte) -> None:
         pass
+
+    def read_block(self, start: int, end: int) -> bytes:
+        """Bytes [start, end) as the CPU would read them"""
+        return bytes(self.read_byte(address=address) for address in range(start, end))
+
+    def write_block(self, start: int, data) -> None:
+        """Write data from start as the CPU would"""
+        for offset, byte in enumerate(data):
+            self.write_byte(address=start + offset, byte=byte)
+
+    def view(self, start: int, end: int) -> memoryview:
+        """
+        A memoryview of [start, end). Memory spaces with a flat backing store
+        return a live, zero-copy view; this fallback returns a snapshot.
+        """
+        return memoryview(self.read_block(start=start, end=end))
     #
     # @abstractmethod
     # def write_word(self, start_address, word) -> None:
@@ -19,16 +244,58 @@ class AddressDecoder(ABC):
 class SimpleMemorySpace(AddressDecoder):
 
     def __init__(self, memspace_size, fill_vals=0x00):
-        self.memory_data = ([fill_vals] * memspace_size)
+        super().__init__()
+        self.memory_data = bytearray((fill_vals,)) * memspace_size
+        if memspace_size >= DIRECT_RAM_SIZE:
+            self.direct_ram = self.memory_data
 
     def set_data(self, start_address, data):
-        self.memory_data[start_address:start_address + len(data)] = data
+        self.write_block(start=start_address, data=data)
 
     def read_byte(self, address):
         return self.memory_data[address]
 
     def write_byte(self, address, byte) -> None:
-        self.memory_data[address] = byte
+        if self.code_pages[address >> 8] and self.memory_data[address] != byte:
+            self.memory_data[address] = byte
+            self.code_invalidator(address, address + 1)
+        else:
+            self.memory_data[address] = byte
+
+    def io_handlers_changed(self) -> None:
+        # The plain accessors stay in place until there is I/O to dispatch
+        self.set_accessors(read_byte=self._read_byte_with_io, write_byte=self._write_byte_with_io)
+
+    def _read_byte_with_io(self, address):
+        handlers = self.page_read_handlers[address >> 8]
+        if handlers is not None:
+            handler = handlers[address & 0xFF]
+            if handler is not None:
+                return handler(address)
+        return self.memory_data[address]
+
+    def _write_byte_with_io(self, address, byte) -> None:
+        handlers = self.page_write_handlers[address >> 8]
+        if handlers is not None:
+            handler = handlers[address & 0xFF]
+            if handler is not None:
+                handler(address, byte)
+                return
+        SimpleMemorySpace.write_byte(self, address=address, byte=byte)
+
+    def read_block(self, start: int, end: int) -> bytes:
+        return bytes(self.memory_data[start:end])
+
+    def write_block(self, start: int, data) -> None:
+        self.memory_data[start:start + len(data)] = data
+        self.invalidate_code(start=start, end=start + len(data))
+
+    def view(self, start: int, end: int) -> memoryview:
+        """
+        A live view of [start, end). Writes through it bypass the code cache;
+        call invalidate_code() afterwards if they may have changed code.
+        """
+        return memoryview(self.memory_data)[start:end]
 
     def write_word(self, start_address, word) -> None:
 
@@ -37,13 +304,8 @@ class SimpleMemorySpace(AddressDecoder):
 
         self.memory_data[start_address] = c
         self.memory_data[start_address+1] = f
+        self.invalidate_code(start=start_address, end=start_address + 2)
 
     def dump_memory(self, file_name: str = "memdump.bin"):
-
-        for i in range(len(self.memory_data)):
-            if self.memory_data[i] < 0:
-                self.memory_data[i] = 0
-
-        file = open(file_name, "wb")
-        file.write(bytearray(self.memory_data))
-        file.close()
+        with open(file_name, "wb") as file:
+            file.write(self.memory_data)
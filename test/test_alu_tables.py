@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from alu_tables import CARRY_FLAG, NEGATIVE_FLAG, NZ_FLAGS, OVERFLOW_FLAG, ZERO_FLAG, adc_binary_table, \
+    adc_decimal_table, check_against_decimal_test, nz_codes, nz_flags, sbc_binary_table, sbc_decimal_table, table_index
+from cpu6502 import CPU6502
+from simple_memory_space import SimpleMemorySpace
+
+DECIMAL_TEST_BIN = os.path.join(os.path.dirname(__file__), "6502_decimal_test.bin")
+
+
+def unpack(entry):
+    return entry & 0xFF, entry >> 8
+
+
+class AluTableTests(unittest.TestCase):
+
+    def test_nz_flags(self):
+        self.assertEqual(ZERO_FLAG, nz_flags[0x00])
+        self.assertEqual(0, nz_flags[0x7F])
+        self.assertEqual(NEGATIVE_FLAG, nz_flags[0x80])
+
+    def test_nz_codes_round_trip(self):
+        for status in range(256):
+            self.assertEqual(status & NZ_FLAGS, nz_flags[nz_codes[status]])
+
+    def test_lazy_status_register_round_trip(self):
+        cpu = CPU6502(mem_space=SimpleMemorySpace(memspace_size=1024 * 64))
+        for status in range(256):
+            cpu.SR = status
+            self.assertEqual(status, cpu.SR)
+
+    def test_adc_binary_overflow_and_carry(self):
+        self.assertEqual((0x80, NEGATIVE_FLAG | OVERFLOW_FLAG),
+                         unpack(adc_binary_table[table_index(a=0x7F, operand=0x00, carry=1)]))
+        self.assertEqual((0x00, ZERO_FLAG | CARRY_FLAG),
+                         unpack(adc_binary_table[table_index(a=0xFF, operand=0x01, carry=0)]))
+
+    def test_adc_decimal_wraps_at_99(self):
+        result, flags = unpack(adc_decimal_table[table_index(a=0x99, operand=0x01, carry=0)])
+        self.assertEqual(0x00, result)
+        self.assertEqual(CARRY_FLAG, flags & CARRY_FLAG)
+
+    def test_sbc_binary_borrow(self):
+        self.assertEqual((0xFF, NEGATIVE_FLAG),
+                         unpack(sbc_binary_table[table_index(a=0x00, operand=0x00, carry=0)]))
+
+    def test_sbc_decimal(self):
+        self.assertEqual((0x29, CARRY_FLAG),
+                         unpack(sbc_decimal_table[table_index(a=0x46, operand=0x17, carry=1)]))
+
+    def test_tables_pass_decimal_test_program(self):
+        with open(DECIMAL_TEST_BIN, "rb") as file:
+            program = file.read()
+        self.assertEqual(0, check_against_decimal_test(program=program))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from benchmark import WORKLOADS, compare_results, measure, screen_codes
+from cpu6502 import ENGINE_FUSED, ENGINE_TRANSLATED
+
+
+class BenchmarkTests(unittest.TestCase):
+
+    def test_capped_workload_is_incomplete(self):
+        result = measure(workload=WORKLOADS["decimal"], engine=ENGINE_FUSED, max_cycles=20_000)
+        self.assertFalse(result.completed)
+        self.assertGreaterEqual(result.cycles, 20_000)
+        self.assertGreater(result.instructions, 0)
+        self.assertAlmostEqual(result.cycles_per_second / 1e6, result.emulated_mhz, places=3)
+
+    def test_c64_boots_to_ready(self):
+        result = measure(workload=WORKLOADS["c64_boot"], engine=ENGINE_TRANSLATED)
+        self.assertTrue(result.completed)
+        self.assertGreater(result.cycles, 1_000_000)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            measure(workload=WORKLOADS["decimal"], engine="jit")
+
+    def test_screen_codes(self):
+        self.assertEqual(bytes((0x12, 0x05, 0x01, 0x04, 0x19, 0x2E)), screen_codes(text="READY."))
+
+    def test_compare_results(self):
+        def results(*runs):
+            return {"results": [dict(workload=workload, engine=ENGINE_FUSED, cycles=cycles, completed=True,
+                                     cycles_per_second=speed, emulated_mhz=speed / 1e6)
+                                for workload, cycles, speed in runs]}
+
+        before = results(("functional", 100, 1_000_000), ("decimal", 100, 2_000_000))
+        after = results(("functional", 100, 1_500_000), ("decimal", 90, 2_000_000), ("diag", 100, 1_000_000))
+        self.assertEqual([("functional", ENGINE_FUSED, 1.0, 1.5, 1.5, True),
+                          ("decimal", ENGINE_FUSED, 2.0, 2.0, 1.0, False)],
+                         compare_results(before=before, after=after))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+from cpu6502 import ENGINE_FUSED, ENGINE_TICK, ENGINE_TRANSLATED, STOP_BREAKPOINT, STOP_TRAP, \
+    STOP_WATCHPOINT
+from simple_memory_space import SimpleMemorySpace
+from test.test_translator import make_cpu
+
+ENGINES = (ENGINE_TICK, ENGINE_FUSED, ENGINE_TRANSLATED)
+
+
+class BreakpointTests(unittest.TestCase):
+
+    def test_breakpoint_stops_before_instruction_and_resumes(self):
+        results = []
+        for engine in ENGINES:
+            cpu = make_cpu()
+            # $100B DEX sits inside the loop block
+            breakpoint = cpu.add_breakpoint(address=0x100B)
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(STOP_BREAKPOINT, result.reason, engine)
+            self.assertIs(breakpoint, result.trigger, engine)
+            self.assertEqual(0x100B, cpu.PC, engine)
+            self.assertEqual(0x10, cpu.X, engine)
+
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(STOP_BREAKPOINT, result.reason, engine)
+            self.assertEqual(0x0F, cpu.X, engine)
+            self.assertEqual(2, breakpoint.hits, engine)
+            results.append((result.cycles, result.instructions))
+
+        self.assertEqual(1, len(set(results)), results)
+
+    def test_conditional_breakpoint(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            breakpoint = cpu.add_breakpoint(address=0x1005, condition=lambda cpu_: cpu_.X == 0x03)
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(STOP_BREAKPOINT, result.reason, engine)
+            self.assertEqual(0x03, cpu.X, engine)
+            self.assertEqual(1, breakpoint.hits, engine)
+
+    def test_removed_breakpoint_no_longer_stops(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            breakpoint = cpu.add_breakpoint(address=0x100B)
+            cpu.run(cycles=100_000, engine=engine)
+            cpu.remove_breakpoint(breakpoint=breakpoint)
+            self.assertEqual(STOP_TRAP, cpu.run(cycles=100_000, engine=engine).reason, engine)
+
+    def test_write_watchpoint(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            watchpoint = cpu.add_watchpoint(start=0x2105)
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(STOP_WATCHPOINT, result.reason, engine)
+            self.assertIs(watchpoint, result.trigger, engine)
+            self.assertEqual(0x2105, watchpoint.address, engine)
+            self.assertTrue(watchpoint.was_write, engine)
+            self.assertEqual(cpu.mem_space.read_byte(address=0x2105), watchpoint.value, engine)
+            # the translated engine finishes the block, up to the BNE
+            self.assertEqual(0x1004 if engine == ENGINE_TRANSLATED else 0x100B, cpu.PC, engine)
+
+    def test_read_watchpoint_with_condition(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            watchpoint = cpu.add_watchpoint(start=0x2000, end=0x201F, read=True, write=False,
+                                            condition=lambda address, value: value == 0x0C)
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(STOP_WATCHPOINT, result.reason, engine)
+            self.assertEqual(0x200C, watchpoint.address, engine)
+            self.assertFalse(watchpoint.was_write, engine)
+            self.assertEqual(1, watchpoint.hits, engine)
+
+    def test_stack_watchpoint_withdraws_direct_ram(self):
+        # $1000 PHA
+        # $1001 JMP $1001
+        cpu = make_cpu(program=(0x48, 0x4C, 0x01, 0x10))
+        memspace = cpu.mem_space
+        watchpoint = cpu.add_watchpoint(start=0x0100, end=0x01FF)
+        self.assertIsNone(memspace.direct_ram)
+
+        result = cpu.run(cycles=100)
+        self.assertEqual(STOP_WATCHPOINT, result.reason)
+        self.assertEqual(0x01FF, watchpoint.address)
+
+        cpu.remove_watchpoint(watchpoint=watchpoint)
+        self.assertIs(memspace.memory_data, memspace.direct_ram)
+        self.assertEqual(STOP_TRAP, cpu.run(cycles=100).reason)
+
+    def test_watchpoint_sits_on_top_of_io_handlers(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        watchpoint = memspace.add_watchpoint(start=0xC000, read=True, write=False)
+        memspace.register_io_handler(start=0xC000, end=0xC000, read=lambda address: 0x99)
+        self.assertEqual(0x99, memspace.read_byte(address=0xC000))
+        self.assertEqual(1, watchpoint.hits)
+        self.assertEqual(0x99, memspace.peek_byte(address=0xC000))
+        self.assertEqual(1, watchpoint.hits)
+
+        memspace.remove_watchpoint(watchpoint=watchpoint)
+        self.assertEqual(0x99, memspace.read_byte(address=0xC000))
+        self.assertEqual(1, watchpoint.hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import unittest
+
+from c64.c64_pla import C64PLA
+from c64.cia import CIA
+from c64.pla_logic import PLA_LOGIC_FILE, SOURCE_BASIC, SOURCE_IO, SOURCE_KERNAL, SOURCE_RAM, SOURCE_ROMH, \
+    load_bank_map
+from c64.sid import SID
+from c64.vic import PAL_CYCLES_PER_LINE, VIC
+from cpu6502 import CPU6502
+
+C64_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "c64")
+
+
+class C64PLATests(unittest.TestCase):
+
+    pla_logic_file = None
+
+    def setUp(self):
+        # the ROM paths in rom_memory_map are relative to the c64 directory
+        self.cwd = os.getcwd()
+        os.chdir(C64_DIRECTORY)
+        self.memspace = C64PLA(memspace_size=1024 * 64, verbose=False,
+                               vic=VIC(name="VIC"), cia1=CIA(name="CIA1"), cia2=CIA(name="CIA2"), sid=SID(name="SID"),
+                               pla_logic_file=self.pla_logic_file)
+        self.cpu = CPU6502(mem_space=self.memspace)
+        self.memspace.register_with_cpu(cpu=self.cpu)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def _rom(self, file_name):
+        with open(os.path.join(C64_DIRECTORY, "roms", file_name), "rb") as file:
+            return file.read()
+
+    def test_roms_are_read_from_mapped_images(self):
+        kernal = self._rom("kernal.rom")
+        basic = self._rom("basic.rom")
+        self.assertEqual(kernal, bytes(self.memspace.rom_images["kernal_rom"]))
+        self.assertEqual(kernal[0x1FFC], self.memspace.read_byte(address=0xFFFC))
+        self.assertEqual(basic[0x0000], self.memspace.read_byte(address=0xA000))
+
+    def test_banking_rom_out_exposes_ram(self):
+        self.memspace.write_byte(address=0x0001, byte=0b101)  # all RAM apart from I/O
+        self.memspace.write_byte(address=0xE000, byte=0x53)
+        self.assertEqual(0x53, self.memspace.read_byte(address=0xE000))
+
+        self.memspace.write_byte(address=0x0001, byte=0b111)
+        self.assertEqual(self._rom("kernal.rom")[0], self.memspace.read_byte(address=0xE000))
+
+    def _select_mode(self, mode):
+        self.memspace.write_byte(address=0x0001, byte=mode & 0b111)
+        self.memspace.GAME = (mode >> 3) & 1
+        self.memspace.EXROM = (mode >> 4) & 1
+        self.assertEqual(mode, self.memspace.bank_mode)
+
+    def test_page_tables_match_mem_select_in_every_mode(self):
+        self.assertEqual(32, len(self.memspace.bank_read_tables))
+        ram = self.memspace.memory_data_ram
+        addresses = [(page << 8) | 0x20 for page in range(256)]
+        # the I/O registers are the same storage in every mode, so read them once with I/O banked in
+        io_bytes = {address: self.memspace.read_byte(address=address)
+                    for address in addresses if 0xD000 <= address < 0xE000}
+
+        for mode in range(32):
+            self._select_mode(mode=mode)
+            for address in addresses:
+                page = address >> 8
+                target, _ = self.memspace.mem_select(address=address)
+                ram[address] = 0x11
+                if target is self.memspace.rom_pages:
+                    expected = self.memspace.rom_pages[page][0x20]
+                elif target is self.memspace.memory_data_io:
+                    expected = io_bytes[address]
+                else:
+                    expected = 0x11
+                self.assertEqual(expected, self.memspace.read_byte(address=address), (mode, hex(address)))
+
+                byte = next(byte for byte in (0xA5, 0x5A, 0x3C) if byte != expected)
+                self.memspace.write_byte(address=address, byte=byte)
+                self.assertEqual(byte if target is ram else 0x11, ram[address], (mode, hex(address)))
+                if target is self.memspace.memory_data_io:
+                    written = byte & 0x0F if 0xD800 <= address < 0xDC00 else byte
+                    self.assertEqual(written, self.memspace.read_byte(address=address), (mode, hex(address)))
+                    self.memspace.write_byte(address=address, byte=io_bytes[address])
+                else:
+                    self.assertEqual(byte if target is ram else expected, self.memspace.read_byte(address=address),
+                                     (mode, hex(address)))
+
+    def test_game_and_exrom_switch_tables(self):
+        self.assertEqual(0b11111, self.memspace.bank_mode)
+        self.memspace.GAME = 0
+        self.assertEqual(0b10111, self.memspace.bank_mode)
+        self.memspace.EXROM = 0
+        self.memspace.write_byte(address=0x0001, byte=0b011)
+        self.assertEqual(0b00011, self.memspace.bank_mode)
+        self.assertIs(self.memspace.bank_read_tables[0b00011], self.memspace.read_pages)
+
+    def test_vic_registers_are_mirrored(self):
+        self.memspace.write_byte(address=0xD020, byte=0x06)
+        self.assertEqual(0x06, self.memspace.read_byte(address=0xD060))
+        self.assertEqual(0x06, self.memspace.read_byte(address=0xD3E0))
+
+    def test_raster_compare_survives_the_raster_counter(self):
+        self.memspace.write_byte(address=0xD012, byte=0x37)
+        self.memspace.write_byte(address=0xD011, byte=0x9B)
+        self.cpu.scheduler.advance(cycles=0x42 * PAL_CYCLES_PER_LINE)
+
+        self.assertEqual(0x42, self.memspace.read_byte(address=0xD012))
+        self.assertEqual(0x1B, self.memspace.read_byte(address=0xD011))
+        self.assertEqual(0x137, self.memspace.vic.raster_compare)
+        self.assertEqual(0x37, self.memspace.read_io_register(address=0xD012))
+
+    def test_colour_ram_holds_nibbles(self):
+        self.memspace.write_byte(address=0xD800, byte=0xF5)
+        self.assertEqual(0x05, self.memspace.read_byte(address=0xD800))
+        self.assertEqual(bytes((0x05,)), bytes(self.memspace.colour_ram_view(start=0xD800, end=0xD801)))
+
+    def test_stores_are_sized_to_their_regions(self):
+        self.assertEqual(0x10000, len(self.memspace.memory_data_ram))
+        self.assertEqual(0x1000, len(self.memspace.memory_data_io))
+        self.assertEqual(0x400, len(self.memspace.colour_ram))
+
+        self.memspace.write_byte(address=0xD021, byte=0x0E)
+        self.assertEqual(0x0E, self.memspace.read_io_register(address=0xD021))
+        self.memspace.write_byte(address=0xD016, byte=0x10)
+        self.assertEqual(0x10, self.memspace.vic.register(address=0xD016))
+
+    def test_registered_handler_replaces_chip_while_io_is_banked_in(self):
+        self.memspace.register_io_handler(start=0xDC00, end=0xDCFF, read=lambda address: 0xA5, mirror=0x10)
+        self.assertEqual(0xA5, self.memspace.read_byte(address=0xDC0D))
+
+        self.memspace.write_byte(address=0x0001, byte=0b011)  # character ROM instead of I/O
+        self.assertEqual(self._rom("char.rom")[0xC0D], self.memspace.read_byte(address=0xDC0D))
+
+
+class PLADrivenC64PLATests(C64PLATests):
+    pla_logic_file = PLA_LOGIC_FILE
+
+    def test_page_tables_match_mem_select_in_every_mode(self):
+        self.skipTest("banking comes from the truth table, which differs from the chain in cartridge modes")
+
+    def test_default_memory_map(self):
+        bank_map = load_bank_map(file_name=PLA_LOGIC_FILE)
+        reads = [read for read, write in bank_map[0b11111]]
+        self.assertEqual([SOURCE_RAM] * 10 + [SOURCE_BASIC] * 2 + [SOURCE_RAM, SOURCE_IO] + [SOURCE_KERNAL] * 2, reads)
+        writes = [write for read, write in bank_map[0b11111]]
+        self.assertEqual([SOURCE_RAM] * 13 + [SOURCE_IO] + [SOURCE_RAM] * 2, writes)
+
+    def test_writes_under_rom_go_to_ram(self):
+        self.memspace.write_byte(address=0xE000, byte=0x53)
+        self.assertEqual(self._rom("kernal.rom")[0], self.memspace.read_byte(address=0xE000))
+
+        self.memspace.write_byte(address=0x0001, byte=0b101)
+        self.assertEqual(0x53, self.memspace.read_byte(address=0xE000))
+
+    def test_ultimax_cartridge(self):
+        self.memspace.map_cartridge(low=memoryview(b"\x11" * 0x2000), high=memoryview(b"\x22" * 0x2000))
+        self.memspace.GAME = 0
+        self.assertEqual(0x11, self.memspace.read_byte(address=0x8000))
+        self.assertEqual(0x22, self.memspace.read_byte(address=0xFFFC))
+        self.assertIs(self.memspace.open_bus_page, self.memspace.read_pages[0x10])
+        self.assertEqual(SOURCE_ROMH, load_bank_map(file_name=PLA_LOGIC_FILE)[0b10111][0xE][0])
+
+    def test_ultimax_switch_drops_blocks_it_hides(self):
+        # $2000 INX
+        # $2001 JMP $2000
+        for offset, byte in enumerate((0xE8, 0x4C, 0x00, 0x20)):
+            self.memspace.write_byte(address=0x2000 + offset, byte=byte)
+        self.cpu.PC = 0x2000
+        self.cpu.step_block()
+        self.assertIn(0x2000, self.cpu.translator.blocks)
+
+        self.memspace.GAME = 0  # $1000-$7FFF is open bus in Ultimax mode
+        self.assertNotIn(0x2000, self.cpu.translator.blocks)
+        self.assertEqual(self.memspace.peek_byte(address=0x2000), self.memspace.read_byte(address=0x2000))
+        self.assertNotEqual(0xE8, self.memspace.read_byte(address=0x2000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from cpu6502 import CPU_STATE_RECORD
+from test.test_translator import make_cpu
+
+
+class CPUStateTests(unittest.TestCase):
+
+    def test_cpu_has_no_instance_dict(self):
+        cpu = make_cpu()
+        self.assertFalse(hasattr(cpu, "__dict__"))
+        with self.assertRaises(AttributeError):
+            cpu.not_a_register = 1
+
+    def test_export_import_round_trip(self):
+        cpu = make_cpu()
+        for _ in range(10):
+            cpu.step()
+        record = cpu.export_state()
+        self.assertEqual(CPU_STATE_RECORD.size, len(record))
+
+        other = make_cpu()
+        other.import_state(record)
+        for register in ("A", "X", "Y", "PC", "SP", "SR", "DB", "AB"):
+            self.assertEqual(getattr(cpu, register), getattr(other, register), register)
+        self.assertEqual(record, other.export_state())
+
+    def test_lockstep_records_match_between_engines(self):
+        tick_cpu = make_cpu()
+        fused_cpu = make_cpu()
+        for _ in range(50):
+            tick_cpu.tick_complete()
+            fused_cpu.step()
+            self.assertEqual(tick_cpu.export_state(), fused_cpu.export_state())
+
+    def test_import_resumes_execution(self):
+        cpu = make_cpu()
+        cpu.run_until(pc=0x100B)
+        record = cpu.export_state()
+        cpu.run(cycles=1000)
+
+        cpu.import_state(record)
+        self.assertEqual(0x100B, cpu.PC)
+        cpu.run(cycles=1000)
+        self.assertEqual(0x1011, cpu.PC)
+
+    def test_export_mid_instruction_raises(self):
+        cpu = make_cpu()
+        cpu.tick()
+        with self.assertRaises(RuntimeError):
+            cpu.export_state()
+
+    def test_import_rejects_other_versions(self):
+        record = bytearray(make_cpu().export_state())
+        record[0] = 0xFF
+        cpu = make_cpu()
+        cpu.run_until(pc=0x100B)
+        before = cpu.export_state()
+        with self.assertRaises(ValueError):
+            cpu.import_state(bytes(record))
+        self.assertEqual(before, cpu.export_state())
+
+    def test_import_drops_queued_interrupt(self):
+        cpu = make_cpu()
+        cpu.run_until(pc=0x100B)
+        record = cpu.export_state()
+        sp = cpu.SP
+        cpu.irq()
+
+        cpu.import_state(record)
+        cpu.step()
+        self.assertEqual(sp, cpu.SP)
+        self.assertEqual(0, cpu._injected_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
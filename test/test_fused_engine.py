@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from cpu6502 import CPU6502, CPUJammed, ins_dict
+from simple_memory_space import SimpleMemorySpace
+from test import test_stolen_tests
+
+
+def fused_step(self, cpu: CPU6502):
+    return cpu.step()
+
+
+class FusedCommon6502Tests(test_stolen_tests.Common6502Tests):
+    step = fused_step
+
+
+class FusedMPUTests(test_stolen_tests.MPUTests):
+    step = fused_step
+
+
+class FusedEngineEquivalenceTests(unittest.TestCase):
+    """The fused engine must leave the CPU exactly where tick_complete() does"""
+
+    def _make_pair(self, seed: int, opcode: int):
+        rng = random.Random(seed)
+        memory = list(rng.randbytes(0x10000))
+        registers = [rng.randrange(256) for _ in range(5)]
+        cpus = []
+        for _ in range(2):
+            memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+            memspace.set_data(start_address=0, data=memory)
+            memspace.write_byte(address=0x1000, byte=opcode)
+            cpu = CPU6502(mem_space=memspace)
+            cpu.PC = 0x1000
+            cpu.A, cpu.X, cpu.Y, cpu.SP, cpu.SR = registers
+            cpus.append(cpu)
+        return cpus
+
+    def test_every_opcode_matches_tick_engine(self):
+        for opcode in ins_dict:
+            for seed in range(4):
+                tick_cpu, fused_cpu = self._make_pair(seed=seed, opcode=opcode)
+                name = ins_dict[opcode]["syn"]
+
+                if name == "KIL":
+                    self.assertRaises(CPUJammed, tick_cpu.tick_complete)
+                    self.assertRaises(CPUJammed, fused_cpu.step)
+                    self.assertEqual(tick_cpu.PC, fused_cpu.PC)
+                    continue
+
+                tick_cycles = tick_cpu.tick_complete()
+                fused_cycles = fused_cpu.step()
+
+                self.assertEqual(tick_cycles, fused_cycles, name)
+                for register in ("A", "X", "Y", "PC", "SP", "SR"):
+                    self.assertEqual(getattr(tick_cpu, register), getattr(fused_cpu, register),
+                                     f"{name} {register}")
+                self.assertEqual(tick_cpu.mem_space.memory_data, fused_cpu.mem_space.memory_data, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
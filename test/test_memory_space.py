@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+
+from simple_memory_space import SimpleMemorySpace, map_image
+
+
+class SimpleMemorySpaceTests(unittest.TestCase):
+
+    def test_memory_is_a_bytearray(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64, fill_vals=0xEA)
+        self.assertIsInstance(memspace.memory_data, bytearray)
+        self.assertEqual(0x10000, len(memspace.memory_data))
+        self.assertEqual(0xEA, memspace.read_byte(address=0xFFFF))
+
+    def test_write_and_read_block(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        memspace.write_block(start=0x1000, data=b"\x01\x02\x03")
+        memspace.write_block(start=0x1003, data=[0x04, 0x05])
+        self.assertEqual(b"\x00\x01\x02\x03\x04\x05\x00", memspace.read_block(start=0x0FFF, end=0x1006))
+
+    def test_view_is_live_and_zero_copy(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        view = memspace.view(start=0x0400, end=0x0800)
+        self.assertEqual(0x400, len(view))
+
+        memspace.write_byte(address=0x0401, byte=0x55)
+        self.assertEqual(0x55, view[1])
+        view[2] = 0xAA
+        self.assertEqual(0xAA, memspace.read_byte(address=0x0402))
+
+    def test_write_block_invalidates_translated_code(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        invalidated = []
+        memspace.code_invalidator = lambda start, end: invalidated.append((start, end))
+        memspace.code_pages[0x20] = 1
+
+        memspace.write_block(start=0x1000, data=b"\xEA" * 4)
+        memspace.write_block(start=0x20F0, data=b"\xEA" * 4)
+        self.assertEqual([(0x20F0, 0x20F4)], invalidated)
+
+    def test_dump_memory_writes_whole_buffer(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        memspace.write_block(start=0xFFFC, data=b"\x00\x10")
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "memdump.bin")
+            memspace.dump_memory(file_name=file_name)
+            with open(file_name, "rb") as file:
+                self.assertEqual(bytes(memspace.memory_data), file.read())
+
+    def test_io_handlers_with_mirroring(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        self.assertEqual(SimpleMemorySpace.read_byte, type(memspace).read_byte)
+        registers = {}
+        memspace.register_io_handler(start=0xC000, end=0xC0FF, read=lambda address: address & 0xFF,
+                                     write=registers.__setitem__, mirror=0x10)
+
+        self.assertEqual(0x03, memspace.read_byte(address=0xC003))
+        self.assertEqual(0x03, memspace.read_byte(address=0xC0F3))
+        memspace.write_byte(address=0xC0F3, byte=0x42)
+        self.assertEqual({0xC003: 0x42}, registers)
+        self.assertEqual(0x00, memspace.memory_data[0xC0F3])
+
+        # plain memory either side
+        memspace.write_byte(address=0xC100, byte=0x55)
+        self.assertEqual(0x55, memspace.read_byte(address=0xC100))
+        self.assertEqual(0x00, memspace.read_byte(address=0xBFFF))
+
+    def test_read_only_io_handler_leaves_writes_to_memory(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        memspace.register_io_handler(start=0xC010, end=0xC010, read=lambda address: 0x80)
+        memspace.write_byte(address=0xC010, byte=0x12)
+        self.assertEqual(0x12, memspace.memory_data[0xC010])
+        self.assertEqual(0x80, memspace.read_byte(address=0xC010))
+
+    def test_direct_ram_is_withdrawn_by_zero_page_and_stack_io(self):
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        self.assertIs(memspace.memory_data, memspace.direct_ram)
+
+        memspace.register_io_handler(start=0xC000, end=0xC0FF, read=lambda address: 0x00)
+        self.assertIs(memspace.memory_data, memspace.direct_ram)
+
+        memspace.register_io_handler(start=0x01FF, end=0x01FF, write=lambda address, byte: None)
+        self.assertIsNone(memspace.direct_ram)
+
+    def test_stack_goes_through_io_handlers_without_direct_ram(self):
+        from cpu6502 import CPU6502
+
+        memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+        pushed = []
+        memspace.register_io_handler(start=0x0100, end=0x01FF, write=lambda address, byte: pushed.append(byte))
+        cpu = CPU6502(mem_space=memspace)
+        cpu.PC = 0x1000
+        cpu.A = 0x42
+        memspace.set_data(start_address=0x1000, data=(0x48,))  # PHA
+        cpu.step()
+        self.assertEqual([0x42], pushed)
+        self.assertEqual(0x00, memspace.memory_data[0x01FF])
+
+
+class MapImageTests(unittest.TestCase):
+
+    def test_image_is_a_read_only_view_of_the_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "image.bin")
+            with open(file_name, "wb") as file:
+                file.write(bytes(range(256)) * 4)
+
+            image = map_image(file_name=file_name)
+            self.assertTrue(image.readonly)
+            self.assertEqual(1024, len(image))
+            self.assertEqual(0x7F, image[0x27F])
+            with self.assertRaises(TypeError):
+                image[0] = 1
+
+            memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+            memspace.write_block(start=0x0200, data=image)
+            self.assertEqual(bytes(image), memspace.read_block(start=0x0200, end=0x0600))
+            image.release()
+
+    def test_empty_image(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "empty.bin")
+            open(file_name, "wb").close()
+            self.assertEqual(0, len(map_image(file_name=file_name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
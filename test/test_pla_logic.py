@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from c64.pla_logic import PLA_A15, PLA_BASIC, PLA_LOGIC_FILE, TRUTH_TABLE_INPUTS, generate_truth_table, \
+    input_signal, pla_index, write_truth_table
+
+
+class PLALogicTests(unittest.TestCase):
+
+    def test_input_signal_rows(self):
+        rows = input_signal(PLA_A15).rows
+        for row in (0, 0x3F, 0x40, 0x7F, 0x80, 0xFFFF):
+            self.assertEqual(bool(row & PLA_A15), bool(rows >> row & 1), hex(row))
+        self.assertEqual(0, (~input_signal(PLA_A15)).rows & rows)
+
+    def test_generated_table_matches_checked_in_file(self):
+        table = generate_truth_table()
+        self.assertEqual(TRUTH_TABLE_INPUTS + 1, len(table))
+        with open(PLA_LOGIC_FILE, "rb") as file:
+            self.assertEqual(file.read(), table)
+
+    def test_table_file_does_not_depend_on_the_working_directory(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                self.assertFalse(write_truth_table())
+                self.assertEqual([], os.listdir(directory))
+            finally:
+                os.chdir(cwd)
+
+    def test_table_is_only_rewritten_when_equations_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, os.path.basename(PLA_LOGIC_FILE))
+            self.assertTrue(write_truth_table(file_name=file_name))
+            self.assertFalse(write_truth_table(file_name=file_name))
+
+            with open(file_name + ".sha256", "w") as file:
+                file.write("stale\n")
+            self.assertTrue(write_truth_table(file_name=file_name))
+
+            with open(file_name, "rb") as file:
+                table = file.read()
+            # BASIC_ is low (selected) for a CPU read of $A000 in the default bank mode
+            self.assertEqual(0, table[pla_index(bank_mode=0b11111, address=0xA000, read=True)] & PLA_BASIC)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+
+from c64.c64_diag_jumptable import diag_jmp_table, diag_jmp_table2
+from c64.c64_kernal_jumptable import c64_jmptbl
+from cpu6502 import ENGINE_FUSED, ENGINE_TICK, ENGINE_TRANSLATED
+from profiler import CycleProfiler, merge_symbols
+from test.test_translator import make_cpu
+
+
+class CycleProfilerTests(unittest.TestCase):
+
+    def _profile(self, engine):
+        cpu = make_cpu()
+        profiler = cpu.start_profile()
+        result = cpu.run(cycles=100_000, engine=engine)
+        self.assertIs(profiler, cpu.stop_profile())
+        self.assertEqual(result.cycles, profiler.total, engine)
+        return profiler
+
+    def test_cycles_counted_per_instruction(self):
+        fused = self._profile(engine=ENGINE_FUSED)
+        self.assertEqual(fused.cycles, self._profile(engine=ENGINE_TICK).cycles)
+
+        stepped = [0] * 0x10000
+        cpu = make_cpu()
+        while cpu.PC != 0x1011:
+            pc = cpu.PC
+            stepped[pc] += cpu.step()
+        stepped[0x1011] += cpu.step()
+        self.assertEqual(stepped, fused.cycles)
+        self.assertEqual(2, fused.cycles[0x1000])  # LDX #$10, once
+        self.assertEqual((0x1005, fused.cycles[0x1005]), fused.hot_addresses(count=1)[0])
+
+    def test_translated_engine_counts_whole_blocks(self):
+        translated = self._profile(engine=ENGINE_TRANSLATED)
+        busy = {address for address, cycles in enumerate(translated.cycles) if cycles}
+        self.assertEqual({0x1000, 0x1004, 0x100E}, busy)
+
+    def test_routines_grouped_by_symbol(self):
+        profiler = CycleProfiler()
+        profiler.cycles[0x1000] = 10
+        profiler.cycles[0x1004] = 30
+        profiler.cycles[0x1008] = 40
+        profiler.cycles[0x3000] = 20
+
+        routines = profiler.routines(symbols={0x1000: "setup", 0x1004: "loop"})
+        self.assertEqual(["loop", "$3000-$30FF", "setup"], [routine.name for routine in routines])
+        self.assertEqual((0x1004, 70, 0x1008), (routines[0].address, routines[0].cycles, routines[0].hot_address))
+        self.assertAlmostEqual(0.7, routines[0].share)
+        self.assertIn("loop", profiler.report(symbols={0x1000: "setup", 0x1004: "loop"}, count=1))
+
+    def test_merge_symbols_tidies_names(self):
+        symbols = merge_symbols(c64_jmptbl, diag_jmp_table, diag_jmp_table2)
+        self.assertEqual("rnd Perform [rnd]", symbols[0xe097])
+        self.assertEqual("do RAM TEST2", symbols[0x8528])
+        self.assertEqual("sound test", symbols[0x9299])
+        self.assertEqual("first", merge_symbols({1: "first"}, {1: "second"})[1])
+
+
+# $1000 JSR $1010    main: calls a, then b, then c
+# $1003 JSR $1020
+# $1006 JSR $1030
+# $1009 JMP $1009
+# $1010 JSR $1020    a: calls b
+# $1013 RTS
+# $1020 LDA #$10     b: RTSes to $102A, then returns
+# $1022 PHA
+# $1023 LDA #$29
+# $1025 PHA
+# $1026 RTS
+# $1027 NOP
+# $1028 NOP
+# $1029 NOP
+# $102A RTS
+# $1030 JSR $1040    c: calls d, which returns straight to main
+# $1033 RTS
+# $1040 PLA          d: drops its return address
+# $1041 PLA
+# $1042 RTS
+# $1050 RTI          the IRQ handler
+CALL_PROGRAM = {
+    0x1000: (0x20, 0x10, 0x10, 0x20, 0x20, 0x10, 0x20, 0x30, 0x10, 0x4C, 0x09, 0x10),
+    0x1010: (0x20, 0x20, 0x10, 0x60),
+    0x1020: (0xA9, 0x10, 0x48, 0xA9, 0x29, 0x48, 0x60, 0xEA, 0xEA, 0xEA, 0x60),
+    0x1030: (0x20, 0x40, 0x10, 0x60),
+    0x1040: (0x68, 0x68, 0x60),
+    0x1050: (0x40,),
+    0xFFFE: (0x50, 0x10),
+}
+
+
+class CallProfilerTests(unittest.TestCase):
+
+    def _profile(self, engine=ENGINE_FUSED, irq_at=None, external_device=None):
+        cpu = make_cpu(program=())
+        for address, code in CALL_PROGRAM.items():
+            cpu.mem_space.set_data(start_address=address, data=code)
+        if external_device is not None:
+            cpu.register_external_device(external_device=external_device)
+        if irq_at is not None:
+            cpu.scheduler.schedule(cycle=irq_at, callback=lambda cycle: cpu.irq())
+        calls = cpu.start_call_profile()
+        result = cpu.run(cycles=100_000, engine=engine)
+        self.assertEqual(1, len(calls.stack), "only main is left running")
+        self.assertIs(calls, cpu.stop_call_profile())
+        return result, calls
+
+    def test_costs_follow_calls_and_stack_tricks(self):
+        result, calls = self._profile()
+        costs = calls.costs
+        self.assertEqual({0x1000: 1, 0x1010: 1, 0x1020: 2, 0x1030: 1, 0x1040: 1},
+                         {address: cost.calls for address, cost in costs.items()})
+
+        self.assertEqual(result.cycles, costs[0x1000].inclusive)
+        self.assertEqual(result.cycles, sum(cost.exclusive for cost in costs.values()))
+        self.assertEqual(costs[0x1020].exclusive, costs[0x1020].inclusive)  # b calls nothing
+        self.assertEqual(costs[0x1010].inclusive, costs[0x1010].exclusive + costs[0x1020].inclusive // 2)
+        self.assertEqual(costs[0x1030].inclusive, costs[0x1030].exclusive + costs[0x1040].inclusive)
+        self.assertEqual(0x1000, calls.routines()[0].address)
+
+    def test_folded_stacks(self):
+        result, calls = self._profile()
+        symbols = {0x1000: "main", 0x1010: "a", 0x1020: "b;c"}
+        folded = dict(line.rsplit(" ", 1) for line in calls.folded_stacks(symbols=symbols))
+        self.assertEqual({"main", "main;a", "main;a;b,c", "main;b,c", "main;$1030", "main;$1030;$1040"},
+                         set(folded))
+        self.assertEqual(result.cycles, sum(int(cycles) for cycles in folded.values()))
+        self.assertIn("main", calls.report(symbols=symbols))
+
+    def test_interrupt_is_a_call(self):
+        # taken after JSR $1020, and so inside b, which is found on the stack
+        _, calls = self._profile(irq_at=5)
+        self.assertEqual(1, calls.costs[0x1050].calls)
+        self.assertIn((0x1000, 0x1010, 0x1020, 0x1050), calls.folded)
+        self.assertEqual(2, calls.costs[0x1020].calls)
+
+        _, stepped = self._profile(irq_at=5, external_device=type("Device", (), {"tick": lambda self: None})())
+        self.assertEqual(calls.folded, stepped.folded)
+
+    def test_engine_makes_no_difference(self):
+        _, fused = self._profile(engine=ENGINE_FUSED)
+        _, translated = self._profile(engine=ENGINE_TRANSLATED)
+        self.assertEqual(fused.folded, translated.folded)
+
+
+if __name__ == '__main__':
+    unittest.main()
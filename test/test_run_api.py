@@ -0,0 +1,61 @@
+import unittest
+
+from cpu6502 import ENGINE_FUSED, ENGINE_TICK, ENGINE_TRANSLATED, STOP_CYCLES, STOP_PC, STOP_TRAP
+from test.test_translator import make_cpu
+
+ENGINES = (ENGINE_TICK, ENGINE_FUSED, ENGINE_TRANSLATED)
+
+
+class RunApiTests(unittest.TestCase):
+
+    def test_run_stops_on_trap(self):
+        results = []
+        for engine in ENGINES:
+            cpu = make_cpu()
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(STOP_TRAP, result.reason, engine)
+            self.assertEqual(0x1011, cpu.PC, engine)
+            self.assertEqual(0x88, cpu.mem_space.read_byte(address=0x2200), engine)
+            results.append((result.cycles, result.instructions))
+
+        self.assertEqual(1, len(set(results)), results)
+
+    def test_run_without_trap_detection_uses_cycle_budget(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            result = cpu.run(cycles=1000, engine=engine, stop_on_trap=False)
+            self.assertEqual(STOP_CYCLES, result.reason, engine)
+            self.assertGreaterEqual(result.cycles, 1000, engine)
+            self.assertLess(result.cycles, 1000 + 50, engine)
+
+    def test_run_until_stops_before_pc(self):
+        results = []
+        for engine in ENGINES:
+            cpu = make_cpu()
+            # $100B DEX sits inside the loop block
+            result = cpu.run_until(pc=0x100B, engine=engine)
+            self.assertEqual(STOP_PC, result.reason, engine)
+            self.assertEqual(0x100B, cpu.PC, engine)
+            self.assertEqual(0x10, cpu.X, engine)
+            results.append((result.cycles, result.instructions))
+
+        self.assertEqual(1, len(set(results)), results)
+
+    def test_run_until_respects_max_cycles(self):
+        cpu = make_cpu()
+        result = cpu.run_until(pc=0x3000, max_cycles=100)
+        self.assertEqual(STOP_CYCLES, result.reason)
+
+    def test_run_frames(self):
+        cpu = make_cpu()
+        result = cpu.run_frames(frames=2, cycles_per_frame=500, stop_on_trap=False)
+        self.assertEqual(STOP_CYCLES, result.reason)
+        self.assertGreaterEqual(result.cycles, 1000)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            make_cpu().run(cycles=10, engine="jit")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+
+from cpu6502 import ENGINE_FUSED, ENGINE_TICK, ENGINE_TRANSLATED
+from c64.vic import PAL_CYCLES_PER_LINE, VIC, VIC_REGISTERS_SIZE
+from scheduler import NEVER, CatchUpDevice, EventScheduler
+from test.test_translator import make_cpu
+
+ENGINES = (ENGINE_TICK, ENGINE_FUSED, ENGINE_TRANSLATED)
+
+
+class EventSchedulerTests(unittest.TestCase):
+
+    def test_events_run_in_cycle_order(self):
+        scheduler = EventScheduler()
+        fired = []
+        scheduler.schedule(cycle=30, callback=lambda cycle: fired.append(("b", cycle)))
+        scheduler.schedule(cycle=10, callback=lambda cycle: fired.append(("a", cycle)))
+        scheduler.schedule(cycle=30, callback=lambda cycle: fired.append(("c", cycle)))
+        self.assertEqual(10, scheduler.next_deadline)
+
+        scheduler.advance(cycles=9)
+        self.assertEqual([], fired)
+        scheduler.advance(cycles=25)
+        self.assertEqual([("a", 10), ("b", 30), ("c", 30)], fired)
+        self.assertEqual(NEVER, scheduler.next_deadline)
+
+    def test_cancelled_event_does_not_run(self):
+        scheduler = EventScheduler()
+        fired = []
+        entry = scheduler.schedule(cycle=5, callback=fired.append)
+        scheduler.cancel(entry=entry)
+        self.assertEqual(0, scheduler.pending())
+        scheduler.advance(cycles=10)
+        self.assertEqual([], fired)
+
+    def test_periodic_event_reschedules_itself(self):
+        scheduler = EventScheduler()
+        fired = []
+
+        def raster_line(cycle):
+            fired.append(cycle)
+            scheduler.schedule(cycle=cycle + 63, callback=raster_line)
+
+        scheduler.schedule(cycle=63, callback=raster_line)
+        scheduler.advance(cycles=200)
+        self.assertEqual([63, 126, 189], fired)
+        self.assertEqual(252, scheduler.next_deadline)
+
+
+class CPUSchedulerTests(unittest.TestCase):
+
+    def test_clock_follows_executed_cycles(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            result = cpu.run(cycles=100_000, engine=engine)
+            self.assertEqual(result.cycles, cpu.scheduler.now, engine)
+
+    def test_deadline_is_serviced_at_next_instruction_boundary(self):
+        for engine in ENGINES:
+            cpu = make_cpu()
+            fired = []
+            cpu.scheduler.schedule(cycle=100, callback=lambda cycle: fired.append(cpu.scheduler.now))
+            cpu.run(cycles=1000, engine=engine, stop_on_trap=False)
+            self.assertEqual(1, len(fired), engine)
+            self.assertGreaterEqual(fired[0], 100, engine)
+
+    def test_event_can_interrupt_the_cpu(self):
+        cpu = make_cpu()
+        cpu.mem_space.set_data(start_address=0xFFFE, data=(0x00, 0x30))
+        cpu.mem_space.set_data(start_address=0x3000, data=(0x4C, 0x00, 0x30))  # JMP $3000
+        cpu.scheduler.schedule(cycle=50, callback=lambda cycle: cpu.irq())
+        cpu.run(cycles=1000, engine=ENGINE_FUSED)
+        self.assertEqual(0x3000, cpu.PC)
+
+
+class CountingDevice(CatchUpDevice):
+
+    def __init__(self):
+        super().__init__()
+        self.catch_ups = []
+
+    def catch_up(self, cycles: int) -> None:
+        self.catch_ups.append(cycles)
+
+
+class CatchUpDeviceTests(unittest.TestCase):
+
+    def test_device_catches_up_only_when_synced(self):
+        scheduler = EventScheduler()
+        device = CountingDevice()
+        device.attach_scheduler(scheduler=scheduler)
+
+        scheduler.advance(cycles=1000)
+        self.assertEqual([], device.catch_ups)
+        device.sync()
+        device.sync()
+        scheduler.advance(cycles=10)
+        device.sync()
+        self.assertEqual([1000, 10], device.catch_ups)
+        self.assertEqual(1010, device.last_synced_cycle)
+
+    def test_deadline_syncs_device_first(self):
+        scheduler = EventScheduler()
+        device = CountingDevice()
+        device.attach_scheduler(scheduler=scheduler)
+        seen = []
+        device.schedule_deadline(cycle=50, callback=lambda cycle: seen.append(list(device.catch_ups)))
+        scheduler.advance(cycles=52)
+        self.assertEqual([[52]], seen)
+
+    def test_vic_raster_counter_follows_the_clock(self):
+        scheduler = EventScheduler()
+        registers = bytearray(VIC_REGISTERS_SIZE)
+        vic = VIC(name="VIC")
+        vic.registers = registers
+        vic.attach_scheduler(scheduler=scheduler)
+
+        scheduler.advance(cycles=300 * PAL_CYCLES_PER_LINE + 5)
+        vic.sync()
+        self.assertEqual(300, vic.raster_line)
+        self.assertEqual(300 & 0xFF, vic.read_byte(address=0xD012))
+        self.assertEqual(0x80, vic.read_byte(address=0xD011) & 0x80)
+        self.assertEqual(bytes(VIC_REGISTERS_SIZE), bytes(registers))
+
+        scheduler.advance(cycles=12 * PAL_CYCLES_PER_LINE)
+        vic.sync()
+        self.assertEqual(0, vic.raster_line)
+        self.assertEqual(0x00, vic.read_byte(address=0xD011) & 0x80)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,18 +3,11 @@
 from address_bus import AddressBus
 from cpu6502 import CPU6502
 
-from simple_memory_space import SimpleMemorySpace
-
-
-def read_binary_file(file_name: str):
-    file = open(file_name, "rb")
-    binary_data = file.read()
-    file.close()
-    return binary_data
+from simple_memory_space import SimpleMemorySpace, map_image
 
 
 def test_decimal_PROG():
-    program = read_binary_file(file_name="./6502_decimal_test.bin")
+    program = map_image(file_name="./6502_decimal_test.bin")
 
     address_bus = AddressBus()
     memspace = SimpleMemorySpace(memspace_size=1024 * 64, fill_vals=0x00)
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from test.test_translator import make_cpu
+from trace_compare import compare_trace_files, compare_traces, format_record, parse_text_record
+from trace_recorder import TRACE_RECORD, TraceRecord
+
+
+class TraceCompareTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _record(self, name, data=tuple(range(0x20)), cycles=100_000):
+        file_name = os.path.join(self.directory.name, name)
+        cpu = make_cpu(data=data)
+        recorder = cpu.start_trace(file_name=file_name, chunk_records=8, ring_chunks=32)
+        cpu.run(cycles=cycles)
+        cpu.stop_trace()
+        return file_name, recorder.records()
+
+    def test_identical_traces_match(self):
+        ours, _ = self._record("ours.trace.gz")
+        reference, _ = self._record("reference.trace.gz")
+        self.assertIsNone(compare_trace_files(ours=ours, reference=reference, chunk_records=4))
+
+    def test_reports_first_divergence_with_context(self):
+        ours, records = self._record("ours.trace.gz")
+        changed = list(range(0x20))
+        changed[0x0C] = 0x80  # read by the fifth pass round the loop
+        reference, _ = self._record("reference.trace.gz", data=changed)
+
+        divergence = compare_trace_files(ours=ours, reference=reference, chunk_records=4, context=3)
+        self.assertIsNotNone(divergence)
+        # ADC $2000,X with X=$0C, then STA $2100,X is the first to show the new A and flags
+        index = next(i for i, record in enumerate(records) if record.pc == 0x1008 and record.x == 0x0C)
+        self.assertEqual(index, divergence.index)
+        self.assertEqual(["a", "sr"], divergence.fields)
+        self.assertEqual(records[index], divergence.ours)
+        self.assertEqual([pair[0] for pair in divergence.context], records[index - 3:index])
+        self.assertIn("a", divergence.format())
+
+    def test_shorter_trace_is_a_divergence(self):
+        ours, records = self._record("ours.trace.gz")
+        reference, _ = self._record("reference.trace.gz", cycles=50)
+
+        divergence = compare_trace_files(ours=ours, reference=reference, chunk_records=4)
+        self.assertEqual(["length"], divergence.fields)
+        self.assertEqual(records[divergence.index], divergence.ours)
+        self.assertIsNone(divergence.reference)
+        self.assertIn("end of trace", divergence.format())
+
+    def test_trace_cut_off_mid_record(self):
+        records = b"".join(TRACE_RECORD.pack(cycle, 0x1000 + cycle, 0xEA, 0, 0, 0, 0xFF, 0, 0) for cycle in range(3))
+        cut = records[:TRACE_RECORD.size * 2 + 17]
+
+        divergence = compare_traces(ours=[cut], reference=[cut])
+        self.assertEqual((2, ["length"]), (divergence.index, divergence.fields))
+        divergence = compare_traces(ours=[records], reference=[cut], chunk_records=2)
+        self.assertEqual((2, ["length"]), (divergence.index, divergence.fields))
+        self.assertEqual(0x1002, divergence.ours.pc)
+        self.assertIsNone(divergence.reference)
+
+    def test_text_log_against_recording(self):
+        ours, records = self._record("ours.trace.gz")
+        reference = os.path.join(self.directory.name, "reference.log")
+        with open(reference, "w") as file:
+            file.write("nestest style log\n")
+            for record in records:
+                # the reference shows B and the unused bit set and counts cycles from 7
+                file.write(f"{record.pc:04X}  {record.opcode:02X}        A:{record.a:02X} X:{record.x:02X} "
+                           f"Y:{record.y:02X} P:{record.sr | 0x30:02X} SP:{record.sp:02X} CYC:{record.cycle + 7}\n")
+
+        self.assertIsNone(compare_trace_files(ours=ours, reference=reference, chunk_records=4))
+        self.assertIsNotNone(compare_trace_files(ours=ours, reference=reference, chunk_records=4,
+                                                 fields=("pc", "cycle")))
+
+    def test_sync_pc_skips_to_common_starting_point(self):
+        ours, records = self._record("ours.trace.gz")
+        reference = os.path.join(self.directory.name, "reference.log")
+        with open(reference, "w") as file:
+            file.write("F000  EA  A:00 X:00 Y:00 P:24 SP:FD\n")
+            for record in records:
+                file.write(f"{record.pc:04X}  {record.opcode:02X}  A:{record.a:02X} X:{record.x:02X} "
+                           f"Y:{record.y:02X} P:{record.sr:02X} SP:{record.sp:02X}\n")
+
+        self.assertIsNotNone(compare_trace_files(ours=ours, reference=reference))
+        self.assertIsNone(compare_trace_files(ours=ours, reference=reference, sync_pc=0x1000))
+
+    def test_parse_text_record(self):
+        record = parse_text_record("C000  4C F5 C5  JMP $C5F5   A:01 X:02 Y:03 P:24 SP:FD PPU:  0, 21 CYC:7")
+        self.assertEqual(TraceRecord(cycle=7, pc=0xC000, opcode=0x4C, a=1, x=2, y=3, sp=0xFD, sr=0x24, address=0),
+                         record)
+        self.assertIsNone(parse_text_record("; a comment"))
+        self.assertIn("C000  4C", format_record(record))
+
+
+if __name__ == '__main__':
+    unittest.main()
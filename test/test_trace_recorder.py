@@ -0,0 +1,91 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from cpu6502 import ENGINE_FUSED, ENGINE_TRANSLATED, STOP_TRAP
+from test.test_translator import make_cpu
+from trace_recorder import TraceRecord, TraceRecorder, read_trace
+
+
+class TraceRecorderTests(unittest.TestCase):
+
+    def test_records_registers_before_and_address_after_each_instruction(self):
+        cpu = make_cpu()
+        recorder = cpu.start_trace()
+        result = cpu.run(cycles=100_000, engine=ENGINE_TRANSLATED)
+
+        self.assertEqual(STOP_TRAP, result.reason)
+        self.assertEqual(result.instructions, recorder.record_count)
+        records = recorder.records()
+        # LDX #$10 leaves the address bus alone
+        self.assertEqual(TraceRecord(cycle=0, pc=0x1000, opcode=0xA2, a=0, x=0, y=0, sp=0xFF, sr=0, address=0),
+                         records[0])
+        self.assertEqual((0x1002, 0x10), (records[1].pc, records[1].x))
+
+        # the first STA $2100,X
+        store = records[4]
+        self.assertEqual((0x1008, 0x9D, 0x2110), (store.pc, store.opcode, store.address))
+        self.assertEqual(sum(record.cycle < store.cycle for record in records), 4)
+
+    def test_traced_run_matches_untraced(self):
+        plain = make_cpu()
+        expected = plain.run(cycles=100_000, engine=ENGINE_FUSED)
+
+        traced = make_cpu()
+        traced.start_trace()
+        self.assertEqual(expected, traced.run(cycles=100_000, engine=ENGINE_FUSED))
+        self.assertEqual(plain.mem_space.memory_data, traced.mem_space.memory_data)
+
+    def test_opcode_is_fetched_once_on_the_stepped_path(self):
+        hits = []
+        for trace in (False, True):
+            cpu = make_cpu()
+            cpu.register_external_device(external_device=type("Device", (), {"tick": lambda self: None})())
+            watchpoint = cpu.mem_space.add_watchpoint(start=0x1000, read=True, write=False)
+            if trace:
+                cpu.start_trace()
+            cpu.run(cycles=2)  # LDX #$10
+            hits.append(watchpoint.hits)
+        self.assertEqual([1, 1], hits)
+
+    def test_ring_keeps_the_latest_records(self):
+        cpu = make_cpu()
+        recorder = cpu.start_trace(chunk_records=4, ring_chunks=2)
+        self.assertEqual(8, recorder.capacity)
+
+        everything = TraceRecorder(chunk_records=64, ring_chunks=4)
+        result = cpu.run(cycles=100_000)
+        cpu.trace_recorder = everything
+        cpu.PC = 0x1000
+        cpu.run(cycles=100_000)
+
+        self.assertEqual(result.instructions, recorder.record_count)
+        self.assertEqual([record.pc for record in everything.records()[-8:]],
+                         [record.pc for record in recorder.records()])
+
+    def test_trace_is_streamed_to_a_compressed_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "sum.trace.gz")
+            cpu = make_cpu()
+            recorder = cpu.start_trace(file_name=file_name, chunk_records=16, ring_chunks=2)
+            result = cpu.run(cycles=100_000)
+            cpu.stop_trace()
+            self.assertIsNone(cpu.trace_recorder)
+
+            records = list(read_trace(file_name=file_name, chunk_records=5))
+            self.assertEqual(result.instructions, len(records))
+            self.assertEqual(recorder.records(), records[-recorder.capacity:])
+            self.assertEqual(0x1011, records[-1].pc)
+
+    def test_read_trace_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "not.trace.gz")
+            with gzip.open(file_name, "wb") as file:
+                file.write(b"PK\x03\x04 not a trace")
+            with self.assertRaises(ValueError):
+                list(read_trace(file_name=file_name))
+
+
+if __name__ == '__main__':
+    unittest.main()
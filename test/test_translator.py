@@ -0,0 +1,149 @@
+import unittest
+
+from cpu6502 import CPU6502, CPUJammed, ENGINE_TRANSLATED
+from simple_memory_space import SimpleMemorySpace
+from translator import instruction_length
+
+
+# $1000 LDX #$10
+# $1002 LDA #$00
+# $1004 CLC
+# $1005 ADC $2000,X
+# $1008 STA $2100,X
+# $100B DEX
+# $100C BNE $1004
+# $100E STA $2200
+# $1011 JMP $1011
+SUM_PROGRAM = (0xA2, 0x10, 0xA9, 0x00, 0x18, 0x7D, 0x00, 0x20, 0x9D, 0x00, 0x21,
+               0xCA, 0xD0, 0xF6, 0x8D, 0x00, 0x22, 0x4C, 0x11, 0x10)
+
+SUM_DATA = tuple(range(0x20))
+
+
+def make_cpu(program=SUM_PROGRAM, data=SUM_DATA) -> CPU6502:
+    """A CPU with program at $1000, about to run it, and data at $2000"""
+    memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+    memspace.set_data(start_address=0x1000, data=program)
+    memspace.set_data(start_address=0x2000, data=data)
+    cpu = CPU6502(mem_space=memspace)
+    cpu.PC = 0x1000
+    return cpu
+
+
+class BlockTranslatorTests(unittest.TestCase):
+
+    def test_instruction_lengths(self):
+        self.assertEqual(1, instruction_length(syn="DEX"))
+        self.assertEqual(1, instruction_length(syn="ASL_ACC"))
+        self.assertEqual(2, instruction_length(syn="LDA_IMM"))
+        self.assertEqual(2, instruction_length(syn="CMP_IND_X"))
+        self.assertEqual(2, instruction_length(syn="BNE"))
+        self.assertEqual(3, instruction_length(syn="JMP_IND"))
+        self.assertEqual(3, instruction_length(syn="STA_ABS_Y"))
+        self.assertEqual(3, instruction_length(syn="JSR"))
+
+    def test_block_ends_after_branch(self):
+        cpu = make_cpu()
+        cpu.step_block()
+        block = cpu.translator.blocks[0x1000]
+        self.assertEqual(7, block.instruction_count)
+        self.assertEqual(0x100E, block.end)
+        self.assertEqual(0x1004, cpu.PC)
+
+    def test_loop_matches_fused_engine(self):
+        fused_cpu = make_cpu()
+        fused_cycles = 0
+        while fused_cpu.PC != 0x1011:
+            fused_cycles += fused_cpu.step()
+        fused_cycles += fused_cpu.step()  # the JMP shares a block with the final STA
+
+        block_cpu = make_cpu()
+        block_cycles = 0
+        while block_cpu.PC != 0x1011:
+            block_cycles += block_cpu.step_block()
+
+        self.assertEqual(fused_cycles, block_cycles)
+        for register in ("A", "X", "Y", "PC", "SP", "SR"):
+            self.assertEqual(getattr(fused_cpu, register), getattr(block_cpu, register), register)
+        self.assertEqual(fused_cpu.mem_space.memory_data, block_cpu.mem_space.memory_data)
+        self.assertEqual({0x1000, 0x1004, 0x100E}, set(block_cpu.translator.blocks))
+
+    def test_invalidate_drops_overlapping_blocks_only(self):
+        cpu = make_cpu()
+        while cpu.PC != 0x1011:
+            cpu.step_block()
+
+        cpu.translator.invalidate(start=0x1006, end=0x1007)
+        self.assertEqual({0x100E}, set(cpu.translator.blocks))
+
+    def test_write_to_translated_code_invalidates_block(self):
+        cpu = make_cpu()
+        cpu.step_block()
+        self.assertEqual(1, cpu.mem_space.code_pages[0x10])
+
+        cpu.mem_space.write_byte(address=0x1003, byte=0x05)  # LDA #$05
+        self.assertNotIn(0x1000, cpu.translator.blocks)
+        self.assertEqual(0, cpu.mem_space.code_pages[0x10])
+
+    def test_write_elsewhere_keeps_blocks(self):
+        cpu = make_cpu()
+        cpu.step_block()
+        cpu.mem_space.write_byte(address=0x1003, byte=0x00)  # same value
+        cpu.mem_space.write_byte(address=0x2100, byte=0x55)
+        self.assertIn(0x1000, cpu.translator.blocks)
+
+    def test_self_modifying_code(self):
+        # $1000 LDA #$E8     (INX)
+        # $1002 STA $1008
+        # $1005 JMP $1008
+        # $1008 NOP          (patched to INX)
+        # $1009 JMP $1009
+        cpu = make_cpu(program=(0xA9, 0xE8, 0x8D, 0x08, 0x10, 0x4C, 0x08, 0x10,
+                                      0xEA, 0x4C, 0x09, 0x10))
+        cpu.PC = 0x1008
+        cpu.step_block()
+        self.assertIn(0x1008, cpu.translator.blocks)
+
+        cpu.PC = 0x1000
+        cpu.step_block()
+        self.assertNotIn(0x1008, cpu.translator.blocks)
+        cpu.step_block()
+        self.assertEqual(0x01, cpu.X)
+        self.assertEqual(0x1009, cpu.PC)
+
+    def test_store_over_the_next_instruction_in_the_same_block(self):
+        # $1000 LDA #$E8     (INX)
+        # $1002 STA $1005
+        # $1005 NOP          (patched to INX)
+        # $1006 JMP $1006
+        cpu = make_cpu(program=(0xA9, 0xE8, 0x8D, 0x05, 0x10, 0xEA, 0x4C, 0x06, 0x10))
+        result = cpu.run_until(pc=0x1006, engine=ENGINE_TRANSLATED)
+        self.assertEqual(0x01, cpu.X)
+        self.assertEqual(3, result.instructions)
+        self.assertEqual(2 + 4 + 2, result.cycles)
+
+    def test_push_onto_translated_code_invalidates_block(self):
+        # $0100 LDX #$06
+        # $0102 TXS
+        # $0103 LDA #$E8
+        # $0105 PHA          (overwrites the NOP)
+        # $0106 NOP
+        # $0107 JMP $0107
+        cpu = make_cpu(program=())
+        cpu.mem_space.set_data(start_address=0x0100, data=(0xA2, 0x06, 0x9A, 0xA9, 0xE8, 0x48,
+                                                           0xEA, 0x4C, 0x07, 0x01))
+        cpu.PC = 0x0100
+        cpu.step_block()
+        self.assertEqual(0xE8, cpu.mem_space.memory_data[0x0106])
+        self.assertNotIn(0x0100, cpu.translator.blocks)
+
+    def test_jam_ends_block(self):
+        cpu = make_cpu(program=(0xEA, 0x02, 0xEA))
+        with self.assertRaises(CPUJammed):
+            cpu.step_block()
+        self.assertEqual(0x1001, cpu.PC)
+        self.assertEqual(0x1002, cpu.translator.blocks[0x1000].end)
+
+
+if __name__ == '__main__':
+    unittest.main()
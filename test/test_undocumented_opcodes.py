@@ -0,0 +1,222 @@
+import unittest
+
+from cpu6502 import CPU6502, CPUJammed, ENGINE_FUSED, ENGINE_TICK, ENGINE_TRANSLATED, ins_table
+from simple_memory_space import SimpleMemorySpace
+
+
+class UndocumentedOpcodeTests(unittest.TestCase):
+    """NMOS 6510 undocumented opcodes"""
+
+    def setUp(self):
+        self.memspace = SimpleMemorySpace(memspace_size=1024 * 64)
+
+    def step(self, cpu: CPU6502):
+        return cpu.tick_complete()
+
+    def _write(self, memspace, start_address, bytes):
+        for i in range(len(bytes)):
+            memspace.memory_data[start_address + i] = bytes[i]
+
+    def test_every_opcode_is_defined(self):
+        self.assertEqual(256, len(ins_table))
+        self.assertTrue(all(instruction is not None for instruction in ins_table))
+
+    # LAX
+
+    def test_lax_zero_loads_accumulator_and_x(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        # $0000 LAX $10
+        self._write(mpu.mem_space, 0x0000, (0xA7, 0x10))
+        mpu.mem_space.memory_data[0x0010] = 0x80
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x0002, mpu.PC)
+        self.assertEqual(0x80, mpu.A)
+        self.assertEqual(0x80, mpu.X)
+        self.assertEqual(mpu.NEGATIVE_FLAG, mpu.SR & mpu.NEGATIVE_FLAG)
+        self.assertEqual(3, cycles)
+
+    # SAX
+
+    def test_sax_absolute_stores_a_and_x(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0xF0
+        mpu.X = 0x3C
+        mpu.SR = 0x00
+        # $0000 SAX $ABCD
+        self._write(mpu.mem_space, 0x0000, (0x8F, 0xCD, 0xAB))
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x0003, mpu.PC)
+        self.assertEqual(0x30, mpu.mem_space.memory_data[0xABCD])
+        self.assertEqual(0x00, mpu.SR)
+        self.assertEqual(4, cycles)
+
+    # DCP
+
+    def test_dcp_zero_decrements_then_compares(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0x41
+        # $0000 DCP $10
+        self._write(mpu.mem_space, 0x0000, (0xC7, 0x10))
+        mpu.mem_space.memory_data[0x0010] = 0x42
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x41, mpu.mem_space.memory_data[0x0010])
+        self.assertEqual(mpu.ZERO_FLAG | mpu.CARRY_FLAG, mpu.SR & (mpu.ZERO_FLAG | mpu.CARRY_FLAG))
+        self.assertEqual(5, cycles)
+
+    # ISC
+
+    def test_isc_absolute_x_increments_then_subtracts(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0x10
+        mpu.X = 0x01
+        mpu.SR = mpu.CARRY_FLAG
+        # $0000 ISC $ABCD,X
+        self._write(mpu.mem_space, 0x0000, (0xFF, 0xCD, 0xAB))
+        mpu.mem_space.memory_data[0xABCE] = 0x04
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x05, mpu.mem_space.memory_data[0xABCE])
+        self.assertEqual(0x0B, mpu.A)
+        self.assertEqual(mpu.CARRY_FLAG, mpu.SR & mpu.CARRY_FLAG)
+        self.assertEqual(7, cycles)
+
+    # SLO / RLA / SRE / RRA
+
+    def test_slo_ind_x_shifts_then_ors(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0x01
+        mpu.X = 0x02
+        # $0000 SLO ($10,X)
+        self._write(mpu.mem_space, 0x0000, (0x03, 0x10))
+        self._write(mpu.mem_space, 0x0012, (0xCD, 0xAB))
+        mpu.mem_space.memory_data[0xABCD] = 0x81
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x02, mpu.mem_space.memory_data[0xABCD])
+        self.assertEqual(0x03, mpu.A)
+        self.assertEqual(mpu.CARRY_FLAG, mpu.SR & mpu.CARRY_FLAG)
+        self.assertEqual(8, cycles)
+
+    def test_rla_zero_rotates_then_ands(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0x0F
+        mpu.SR = mpu.CARRY_FLAG
+        # $0000 RLA $10
+        self._write(mpu.mem_space, 0x0000, (0x27, 0x10))
+        mpu.mem_space.memory_data[0x0010] = 0x83
+        self.step(cpu=mpu)
+        self.assertEqual(0x07, mpu.mem_space.memory_data[0x0010])
+        self.assertEqual(0x07, mpu.A)
+        self.assertEqual(mpu.CARRY_FLAG, mpu.SR & mpu.CARRY_FLAG)
+
+    def test_sre_absolute_y_shifts_then_eors(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0xFF
+        mpu.Y = 0x10
+        # $0000 SRE $ABC0,Y
+        self._write(mpu.mem_space, 0x0000, (0x5B, 0xC0, 0xAB))
+        mpu.mem_space.memory_data[0xABD0] = 0x03
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x01, mpu.mem_space.memory_data[0xABD0])
+        self.assertEqual(0xFE, mpu.A)
+        self.assertEqual(mpu.CARRY_FLAG, mpu.SR & mpu.CARRY_FLAG)
+        self.assertEqual(7, cycles)
+
+    def test_rra_zero_x_rotates_then_adds_with_carry(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0x10
+        mpu.X = 0x01
+        mpu.SR = 0x00
+        # $0000 RRA $10,X
+        self._write(mpu.mem_space, 0x0000, (0x77, 0x10))
+        mpu.mem_space.memory_data[0x0011] = 0x03
+        cycles = self.step(cpu=mpu)
+        self.assertEqual(0x01, mpu.mem_space.memory_data[0x0011])
+        self.assertEqual(0x12, mpu.A)  # 0x10 + 0x01 + carry out of the rotate
+        self.assertEqual(6, cycles)
+
+    # Immediate
+
+    def test_anc_copies_negative_into_carry(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0xFF
+        # $0000 ANC #$80
+        self._write(mpu.mem_space, 0x0000, (0x0B, 0x80))
+        self.step(cpu=mpu)
+        self.assertEqual(0x80, mpu.A)
+        self.assertEqual(mpu.CARRY_FLAG | mpu.NEGATIVE_FLAG, mpu.SR & (mpu.CARRY_FLAG | mpu.NEGATIVE_FLAG))
+
+    def test_sbx_subtracts_from_a_and_x(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0x0F
+        mpu.X = 0x07
+        # $0000 SBX #$08
+        self._write(mpu.mem_space, 0x0000, (0xCB, 0x08))
+        self.step(cpu=mpu)
+        self.assertEqual(0xFF, mpu.X)
+        self.assertEqual(0x0F, mpu.A)
+        self.assertEqual(0, mpu.SR & mpu.CARRY_FLAG)
+        self.assertEqual(mpu.NEGATIVE_FLAG, mpu.SR & mpu.NEGATIVE_FLAG)
+
+    def test_arr_binary_sets_carry_and_overflow_from_bits_6_and_5(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.A = 0xFF
+        mpu.SR = mpu.CARRY_FLAG
+        # $0000 ARR #$80
+        self._write(mpu.mem_space, 0x0000, (0x6B, 0x80))
+        self.step(cpu=mpu)
+        self.assertEqual(0xC0, mpu.A)
+        self.assertEqual(mpu.CARRY_FLAG | mpu.NEGATIVE_FLAG | mpu.OVERFLOW_FLAG,
+                         mpu.SR & (mpu.CARRY_FLAG | mpu.NEGATIVE_FLAG | mpu.OVERFLOW_FLAG))
+
+    # NOP variants
+
+    def test_nop_variants_skip_their_operands(self):
+        for opcode, length, expected_cycles in ((0x1A, 1, 2), (0x80, 2, 2), (0x04, 2, 3),
+                                                (0x14, 2, 4), (0x0C, 3, 4), (0xFC, 3, 4)):
+            mpu = CPU6502(mem_space=SimpleMemorySpace(memspace_size=1024 * 64))
+            mpu.PC = 0x1000
+            self._write(mpu.mem_space, 0x1000, (opcode, 0x10, 0x20))
+            cycles = self.step(cpu=mpu)
+            self.assertEqual(0x1000 + length, mpu.PC, hex(opcode))
+            self.assertEqual(expected_cycles, cycles, hex(opcode))
+            self.assertEqual(0x00, mpu.A)
+
+    # KIL
+
+    def test_kil_jams_cpu_until_reset(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.PC = 0x1000
+        self._write(mpu.mem_space, 0x1000, (0x02,))
+        with self.assertRaises(CPUJammed) as context:
+            self.step(cpu=mpu)
+        self.assertEqual(0x1000, context.exception.address)
+        self.assertEqual(0x02, context.exception.opcode)
+        self.assertTrue(mpu.jammed)
+        self.assertEqual(0x1000, mpu.PC)
+
+        with self.assertRaises(CPUJammed):
+            mpu.step()
+
+        mpu.reset(initial_program_counter=0x2000)
+        self.assertFalse(mpu.jammed)
+
+    def test_jammed_cpu_does_not_resume_on_interrupt_or_new_pc(self):
+        mpu = CPU6502(mem_space=self.memspace)
+        mpu.PC = 0x1000
+        self._write(mpu.mem_space, 0x1000, (0x02,))
+        self._write(mpu.mem_space, 0x2000, (0xEA, 0xEA))
+        with self.assertRaises(CPUJammed):
+            self.step(cpu=mpu)
+
+        mpu.irq()
+        mpu.PC = 0x2000
+        for resume in (mpu.tick, mpu.step, mpu.step_block, lambda: mpu.run(cycles=10, engine=ENGINE_FUSED),
+                       lambda: mpu.run(cycles=10, engine=ENGINE_TICK),
+                       lambda: mpu.run(cycles=10, engine=ENGINE_TRANSLATED)):
+            with self.assertRaises(CPUJammed) as context:
+                resume()
+            self.assertEqual(0x2000, context.exception.address)
+            self.assertEqual(0x2000, mpu.PC)
+
+
+if __name__ == '__main__':
+    unittest.main()
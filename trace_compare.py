@@ -0,0 +1,269 @@
+"""
+Streaming comparison of two instruction traces.
+
+Either side can be a trace recorded by CPU6502.start_trace() or a text log
+from another emulator, one instruction per line in the usual nestest style:
+
+    C000  4C F5 C5  JMP $C5F5     A:00 X:00 Y:00 P:24 SP:FD CYC:7
+
+(PC and opcode first, then any of A:, X:, Y:, P:, SP: and CYC:; lines that do
+not start with an address are skipped). Both are turned into TRACE_RECORD
+bytes and read in chunks of chunk_records instructions, with the fields not
+being compared cleared and SR reduced to the flags the chip actually holds.
+Masked chunks are compared as byte strings, so a matching stretch is passed
+over without unpacking a record; only a chunk that differs is unpacked and
+compared record by record. At most two chunks per side are held at once, so
+traces of any length compare in bounded memory. A trace that ends part way
+through a record diverges at that record.
+
+    python trace_compare.py ours.trace.gz reference.log --sync-pc 0400
+"""
+import argparse
+import gzip
+import itertools
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from trace_recorder import TRACE_FILE_MAGIC, TRACE_RECORD, TraceRecord
+
+DEFAULT_COMPARE_FIELDS = ("pc", "opcode", "a", "x", "y", "sp", "sr")
+DEFAULT_CHUNK_RECORDS = 1 << 16
+DEFAULT_CONTEXT = 8
+
+# B and the unused bit only exist on the stack, so logs disagree about them
+SR_COMPARE_MASK = 0xCF
+
+
+def _field_layout() -> dict:
+    layout = {}
+    offset = 0
+    for name, code in zip(TraceRecord._fields, TRACE_RECORD.format.lstrip("<")):
+        size = struct.calcsize("<" + code)
+        layout[name] = (offset, size)
+        offset += size
+    return layout
+
+
+FIELD_LAYOUT = _field_layout()
+_SR_MASK_TABLE = bytes(value & SR_COMPARE_MASK for value in range(256))
+
+_TEXT_LINE = re.compile(r"^\s*([0-9A-Fa-f]{4})\b[\s:]+([0-9A-Fa-f]{2})\b")
+_TEXT_REGISTER = re.compile(r"\b(A|X|Y|P|SP|S|CYC):\s*([0-9A-Fa-f]+)")
+_TEXT_FIELDS = {"A": "a", "X": "x", "Y": "y", "P": "sr", "SP": "sp", "S": "sp"}
+
+
+def parse_text_record(line: str) -> Optional[TraceRecord]:
+    """A record from one line of a text log, None if the line holds no instruction"""
+    match = _TEXT_LINE.match(line)
+    if match is None:
+        return None
+
+    values = dict(cycle=0, pc=int(match.group(1), 16), opcode=int(match.group(2), 16),
+                  a=0, x=0, y=0, sp=0, sr=0, address=0)
+    for name, value in _TEXT_REGISTER.findall(line[match.end():]):
+        if name == "CYC":
+            values["cycle"] = int(value)
+        else:
+            values[_TEXT_FIELDS[name]] = int(value, 16) & 0xFF
+    return TraceRecord(**values)
+
+
+def _is_binary_trace(file_name: str) -> bool:
+    try:
+        with gzip.open(file_name, "rb") as file:
+            return file.read(len(TRACE_FILE_MAGIC)) == TRACE_FILE_MAGIC
+    except OSError:
+        return False
+
+
+def binary_trace_bytes(file_name: str, read_size: int) -> Iterator[bytes]:
+    """The TRACE_RECORD bytes of a recorded trace, in pieces of about read_size"""
+    with gzip.open(file_name, "rb") as file:
+        file.read(len(TRACE_FILE_MAGIC))
+        while True:
+            data = file.read(read_size)
+            if not data:
+                break
+            yield data
+
+
+def text_trace_bytes(file_name: str, read_size: int) -> Iterator[bytes]:
+    """A text log turned into TRACE_RECORD bytes, in pieces of about read_size"""
+    opener = gzip.open if file_name.endswith(".gz") else open
+    records_per_piece = max(1, read_size // TRACE_RECORD.size)
+    with opener(file_name, "rt") as file:
+        records = (parse_text_record(line=line) for line in file)
+        records = (record for record in records if record is not None)
+        while True:
+            piece = b"".join(TRACE_RECORD.pack(*record) for record in itertools.islice(records, records_per_piece))
+            if not piece:
+                break
+            yield piece
+
+
+def trace_bytes(file_name: str, read_size: int) -> Iterator[bytes]:
+    if _is_binary_trace(file_name=file_name):
+        return binary_trace_bytes(file_name=file_name, read_size=read_size)
+    return text_trace_bytes(file_name=file_name, read_size=read_size)
+
+
+def rechunk(pieces: Iterable[bytes], chunk_size: int) -> Iterator[bytearray]:
+    """pieces cut into chunk_size chunks (the last may be short)"""
+    pending = bytearray()
+    for piece in pieces:
+        pending += piece
+        while len(pending) >= chunk_size:
+            yield pending[:chunk_size]
+            del pending[:chunk_size]
+    if pending:
+        yield pending
+
+
+def skip_to_pc(pieces: Iterable[bytes], pc: int) -> Iterator[bytes]:
+    """pieces from the first record with the given PC on"""
+    pieces = iter(pieces)
+    record_size = TRACE_RECORD.size
+    offset, size = FIELD_LAYOUT["pc"]
+    wanted = pc.to_bytes(size, "little")
+    pending = b""
+    for piece in pieces:
+        data = pending + piece
+        whole = len(data) - len(data) % record_size
+        for start in range(0, whole, record_size):
+            if data[start + offset:start + offset + size] == wanted:
+                yield data[start:]
+                yield from pieces
+                return
+        pending = data[whole:]
+
+
+def mask_chunk(chunk: bytearray, fields: Sequence[str]) -> bytearray:
+    """
+    Clear the fields that are not compared and the SR bits the chip does not
+    hold, in place. Any partial record at the end is left alone.
+    """
+    record_size = TRACE_RECORD.size
+    count = len(chunk) // record_size
+    whole = count * record_size
+    for name, (offset, size) in FIELD_LAYOUT.items():
+        if name not in fields:
+            for byte in range(offset, offset + size):
+                chunk[byte:whole:record_size] = bytes(count)
+    if "sr" in fields:
+        offset, _ = FIELD_LAYOUT["sr"]
+        chunk[offset:whole:record_size] = chunk[offset:whole:record_size].translate(_SR_MASK_TABLE)
+    return chunk
+
+
+@dataclass
+class TraceDivergence:
+    index: int  # of the instruction, counting from 0 after any sync
+    ours: Optional[TraceRecord]  # None where that trace ended first
+    reference: Optional[TraceRecord]
+    fields: List[str]
+    context: List[Tuple[TraceRecord, TraceRecord]] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [f"Traces diverge at instruction {self.index}: {', '.join(self.fields)}"]
+        for offset, (ours, reference) in enumerate(self.context, start=self.index - len(self.context)):
+            lines.append(f"  {offset:>10}  {format_record(ours)}")
+        lines.append(f"> {self.index:>10}  {format_record(self.ours)}")
+        lines.append(f"< {self.index:>10}  {format_record(self.reference)}")
+        return "\n".join(lines)
+
+
+def format_record(record: Optional[TraceRecord]) -> str:
+    if record is None:
+        return "(end of trace)"
+    return (f"{record.pc:04X}  {record.opcode:02X}  A:{record.a:02X} X:{record.x:02X} Y:{record.y:02X} "
+            f"P:{record.sr:02X} SP:{record.sp:02X}  @{record.address:04X}  CYC:{record.cycle}")
+
+
+def _records(chunk: bytes) -> List[TraceRecord]:
+    """The whole records in chunk"""
+    whole = len(chunk) - len(chunk) % TRACE_RECORD.size
+    return [TraceRecord._make(fields) for fields in TRACE_RECORD.iter_unpack(chunk[:whole])]
+
+
+def compare_traces(ours: Iterable[bytes], reference: Iterable[bytes], fields: Sequence[str] = DEFAULT_COMPARE_FIELDS,
+                   chunk_records: int = DEFAULT_CHUNK_RECORDS,
+                   context: int = DEFAULT_CONTEXT) -> Optional[TraceDivergence]:
+    """
+    The first instruction at which two streams of TRACE_RECORD bytes differ
+    in any of fields, or None if they match throughout. The records shown
+    for the divergence and its context are the unmasked ones.
+    """
+    chunk_size = chunk_records * TRACE_RECORD.size
+    ours_chunks = rechunk(pieces=ours, chunk_size=chunk_size)
+    reference_chunks = rechunk(pieces=reference, chunk_size=chunk_size)
+
+    previous = (bytearray(), bytearray())
+    first_index = 0
+    for ours_chunk, reference_chunk in itertools.zip_longest(ours_chunks, reference_chunks, fillvalue=bytearray()):
+        ours_masked = mask_chunk(chunk=bytearray(ours_chunk), fields=fields)
+        reference_masked = mask_chunk(chunk=bytearray(reference_chunk), fields=fields)
+        if ours_masked != reference_masked or len(ours_chunk) % TRACE_RECORD.size:
+            return _divergence(chunks=(ours_chunk, reference_chunk), masked=(ours_masked, reference_masked),
+                               previous=previous, first_index=first_index, fields=fields, context=context)
+
+        previous = (ours_chunk, reference_chunk)
+        first_index += len(ours_chunk) // TRACE_RECORD.size
+
+    return None
+
+
+def _divergence(chunks, masked, previous, first_index: int, fields: Sequence[str],
+                context: int) -> TraceDivergence:
+    ours_masked, reference_masked = (_records(chunk) for chunk in masked)
+    offset = 0
+    while offset < len(ours_masked) and offset < len(reference_masked) and \
+            ours_masked[offset] == reference_masked[offset]:
+        offset += 1
+
+    ours_records, reference_records = (_records(chunk) for chunk in chunks)
+    if offset < len(ours_masked) and offset < len(reference_masked):
+        differing = [name for name in fields
+                     if getattr(ours_masked[offset], name) != getattr(reference_masked[offset], name)]
+    else:
+        # one trace ended, or was cut off part way through this record
+        differing = ["length"]
+
+    # the context may reach back into the previous chunk
+    before = list(zip(_records(previous[0]) + ours_records[:offset],
+                      _records(previous[1]) + reference_records[:offset]))[-context:] if context else []
+
+    return TraceDivergence(index=first_index + offset,
+                           ours=ours_records[offset] if offset < len(ours_records) else None,
+                           reference=reference_records[offset] if offset < len(reference_records) else None,
+                           fields=differing, context=before)
+
+
+def compare_trace_files(ours: str, reference: str, fields: Sequence[str] = DEFAULT_COMPARE_FIELDS,
+                        sync_pc: Optional[int] = None, chunk_records: int = DEFAULT_CHUNK_RECORDS,
+                        context: int = DEFAULT_CONTEXT) -> Optional[TraceDivergence]:
+    """compare_traces() over two files, recorded or text, each started at sync_pc if given"""
+    read_size = chunk_records * TRACE_RECORD.size
+    streams = [trace_bytes(file_name=file_name, read_size=read_size) for file_name in (ours, reference)]
+    if sync_pc is not None:
+        streams = [skip_to_pc(pieces=stream, pc=sync_pc) for stream in streams]
+    return compare_traces(ours=streams[0], reference=streams[1], fields=fields, chunk_records=chunk_records,
+                          context=context)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find where two instruction traces part company")
+    parser.add_argument("ours")
+    parser.add_argument("reference")
+    parser.add_argument("--fields", default=",".join(DEFAULT_COMPARE_FIELDS),
+                        help=f"comma separated, from {', '.join(TraceRecord._fields)}")
+    parser.add_argument("--sync-pc", type=lambda value: int(value, 16), default=None,
+                        help="start both traces at the first instruction at this address (hex)")
+    parser.add_argument("--context", type=int, default=DEFAULT_CONTEXT)
+    arguments = parser.parse_args()
+
+    divergence = compare_trace_files(ours=arguments.ours, reference=arguments.reference,
+                                     fields=arguments.fields.split(","), sync_pc=arguments.sync_pc,
+                                     context=arguments.context)
+    print("Traces match" if divergence is None else divergence.format())
@@ -0,0 +1,189 @@
+"""
+Binary instruction trace.
+
+Every instruction is recorded as one fixed-width TRACE_RECORD: the cycle it
+started on, PC, opcode, A, X, Y, SP and SR as they were before it ran, and the
+address bus as it left it (the effective address of a memory instruction):
+
+    cycle   PC  op  A   X   Y   SP  SR  address
+    <Q      H   B   B   B   B   B   B   H
+
+Records go into a preallocated ring buffer, split into chunks. When a chunk
+fills it is handed to the TraceWriter, if there is one, and the ring moves on
+to the next, so the last capacity records are always in memory for a look
+after the fact. The writer streams chunks into a gzip file from a background
+thread; read_trace() reads such a file back a chunk at a time.
+"""
+import gzip
+import queue
+import struct
+import threading
+from typing import Iterator, List, NamedTuple, Optional
+
+TRACE_RECORD = struct.Struct("<QHBBBBBBH")
+TRACE_ADDRESS_OFFSET = TRACE_RECORD.size - 2  # of the address field, last in a record
+TRACE_FILE_MAGIC = b"6502TRC\x01"
+TRACE_COMPRESS_LEVEL = 1
+
+DEFAULT_CHUNK_RECORDS = 4096
+DEFAULT_RING_CHUNKS = 16
+DEFAULT_WRITER_QUEUE_CHUNKS = 8
+
+
+class TraceRecord(NamedTuple):
+    cycle: int
+    pc: int
+    opcode: int
+    a: int
+    x: int
+    y: int
+    sp: int
+    sr: int
+    address: int
+
+
+class TraceWriter:
+    """
+    Writes chunks of records to a gzip file on a thread of its own. The
+    queue is bounded, so a writer that falls behind holds the emulator up
+    rather than dropping records or piling them up in memory.
+    """
+
+    def __init__(self, file_name: str, compresslevel: int = TRACE_COMPRESS_LEVEL,
+                 queue_chunks: int = DEFAULT_WRITER_QUEUE_CHUNKS):
+        self.file_name = file_name
+        self.file = gzip.open(file_name, "wb", compresslevel=compresslevel)
+        self.file.write(TRACE_FILE_MAGIC)
+        self.error: Optional[BaseException] = None
+        self._chunks: queue.Queue = queue.Queue(maxsize=queue_chunks)
+        self._thread = threading.Thread(target=self._write_chunks, name=f"trace writer {file_name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, chunk: bytes) -> None:
+        self._chunks.put(chunk)
+
+    def _write_chunks(self) -> None:
+        while True:
+            chunk = self._chunks.get()
+            if chunk is None:
+                break
+            if self.error is None:
+                try:
+                    self.file.write(chunk)
+                except OSError as error:
+                    # keep draining so submit() never blocks on a dead writer
+                    self.error = error
+
+        try:
+            self.file.close()
+        except OSError as error:
+            self.error = self.error or error
+
+    def close(self) -> None:
+        """Write out everything submitted and close the file"""
+        self._chunks.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+class TraceRecorder:
+
+    def __init__(self, chunk_records: int = DEFAULT_CHUNK_RECORDS, ring_chunks: int = DEFAULT_RING_CHUNKS,
+                 writer: Optional[TraceWriter] = None):
+        self.chunk_size = chunk_records * TRACE_RECORD.size
+        self.buffer = bytearray(self.chunk_size * ring_chunks)
+        self.writer = writer
+
+        # Records are written at offset, and chunk_filled() called on
+        # reaching chunk_end; submitted is where the writer has had up to
+        self.offset = 0
+        self.chunk_end = self.chunk_size
+        self.submitted = 0
+        self.chunks_filled = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.buffer) // TRACE_RECORD.size
+
+    @property
+    def record_count(self) -> int:
+        """Records made since the recorder was created"""
+        chunk_start = self.chunk_end - self.chunk_size
+        return (self.chunks_filled * self.chunk_size + self.offset - chunk_start) // TRACE_RECORD.size
+
+    def record(self, cycle: int, pc: int, opcode: int, a: int, x: int, y: int, sp: int, sr: int,
+               address: int) -> None:
+        TRACE_RECORD.pack_into(self.buffer, self.offset, cycle, pc, opcode, a, x, y, sp, sr, address)
+        self.offset += TRACE_RECORD.size
+        if self.offset == self.chunk_end:
+            self.chunk_filled()
+
+    def instruction_started(self, cpu, pc: int, opcode: int) -> None:
+        """The fused run loop's hook: record the registers as the instruction starts..."""
+        TRACE_RECORD.pack_into(self.buffer, self.offset, cpu.scheduler.now, pc, opcode,
+                               cpu.A, cpu.X, cpu.Y, cpu.SP, cpu.SR, 0)
+
+    def instruction_finished(self, cpu, pc: int, opcode: int, cycles: int) -> None:
+        """...and the address bus as it ends"""
+        address = cpu.AB
+        offset = self.offset + TRACE_ADDRESS_OFFSET
+        self.buffer[offset] = address & 0xFF
+        self.buffer[offset + 1] = (address >> 8) & 0xFF
+        self.offset += TRACE_RECORD.size
+        if self.offset == self.chunk_end:
+            self.chunk_filled()
+
+    def chunk_filled(self) -> None:
+        """Pass the full chunk on and move to the next"""
+        self._submit(end=self.chunk_end)
+        self.chunks_filled += 1
+
+        self.offset = self.chunk_end % len(self.buffer)
+        self.chunk_end = self.offset + self.chunk_size
+        self.submitted = self.offset
+
+    def _submit(self, end: int) -> None:
+        if self.writer is not None and end > self.submitted:
+            self.writer.submit(bytes(self.buffer[self.submitted:end]))
+        self.submitted = end
+
+    def flush(self) -> None:
+        """Pass on the records of the chunk being filled"""
+        self._submit(end=self.offset)
+
+    def close(self) -> None:
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+    def records(self) -> List[TraceRecord]:
+        """The records still in the ring, oldest first"""
+        if self.chunks_filled * self.chunk_size >= len(self.buffer):
+            # once round, every slot holds a record and the oldest is the next to be overwritten
+            data = self.buffer[self.offset:] + self.buffer[:self.offset]
+        else:
+            data = self.buffer[:self.offset]
+        return [TraceRecord._make(fields) for fields in TRACE_RECORD.iter_unpack(data)]
+
+
+def read_trace(file_name: str, chunk_records: int = DEFAULT_CHUNK_RECORDS) -> Iterator[TraceRecord]:
+    """The records of a file written by TraceWriter, streamed"""
+    with gzip.open(file_name, "rb") as file:
+        if file.read(len(TRACE_FILE_MAGIC)) != TRACE_FILE_MAGIC:
+            raise ValueError(f"[{file_name}] is not a trace file")
+
+        chunk_size = chunk_records * TRACE_RECORD.size
+        pending = b""
+        while True:
+            data = file.read(chunk_size)
+            if not data:
+                break
+            data = pending + data
+            whole = len(data) - len(data) % TRACE_RECORD.size
+            pending = data[whole:]
+            for fields in TRACE_RECORD.iter_unpack(data[:whole]):
+                yield TraceRecord._make(fields)
+
+        if pending:
+            raise ValueError(f"[{file_name}] ends part way through a record")
@@ -0,0 +1,189 @@
+"""
+Basic-block translation cache.
+
+Starting at a given address, straight-line 6502 code is decoded up to and
+including the first instruction that can change the flow of control (branch,
+jump, call, return, BRK) and emitted as a single Python function built from
+the fused micro-op bodies. The function is compiled once and cached by start
+address, so a hot loop costs one call per block with no opcode fetch or
+dispatch in between. It returns the block's cycle total, a constant worked out
+at translation time; page-crossing branch penalties are left queued on the
+CPU as usual.
+
+Every page a block touches is flagged in the memory space's code_pages, and
+the memory space calls back into invalidate() when one of those pages is
+written, so self-modifying code and freshly loaded programs are picked up
+without any cost to writes elsewhere. Operands are still fetched from memory
+as the block runs. After each instruction that can store, the block checks it
+is still cached; if the store dropped it, the block returns there, cutting its
+instruction count, so the rest is translated afresh from the rewritten bytes.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+
+from fused_engine import can_inline, fused_body_lines, instruction_cycles, instruction_micro_ops, writes_memory
+from simple_memory_space import AddressDecoder
+
+MAX_BLOCK_INSTRUCTIONS = 32
+
+block_ending_instructions = {
+    "BCC", "BCS", "BEQ", "BMI", "BNE", "BPL", "BVC", "BVS",
+    "JMP_ABS", "JMP_IND", "JSR", "RTS", "RTI", "BRK", "KIL"
+}
+
+two_byte_modes = {"IMM", "ZERO", "ZERO_X", "ZERO_Y", "IND_X", "IND_Y"}
+three_byte_modes = {"ABS", "ABS_X", "ABS_Y", "IND"}
+
+
+def instruction_length(syn: str) -> int:
+    """
+    Bytes taken by an instruction, opcode included, as executed by the
+    micro-op tables in cpu6502.
+    """
+    if syn in ("BCC", "BCS", "BEQ", "BMI", "BNE", "BPL", "BVC", "BVS", "BRK"):
+        return 2
+    if syn == "JSR":
+        return 3
+
+    mode = syn.split("_", 1)[1] if "_" in syn else ""
+    if mode in two_byte_modes:
+        return 2
+    if mode in three_byte_modes:
+        return 3
+    return 1
+
+
+@dataclass
+class TranslatedBlock:
+    start: int
+    end: int  # one past the last byte of the block
+    last_instruction: int
+    instruction_count: int
+    function: Callable
+    source: str
+
+
+class BlockTranslator:
+
+    def __init__(self, mem_space: AddressDecoder, instructions: Dict, namespace: Dict,
+                 max_block_instructions: int = MAX_BLOCK_INSTRUCTIONS):
+        self.mem_space = mem_space
+        self.instructions = instructions
+        self.namespace = namespace
+        self.max_block_instructions = max_block_instructions
+        self.blocks: Dict[int, TranslatedBlock] = {}
+        self.page_blocks: List[Set[int]] = [set() for _ in range(256)]
+        # Addresses that must start a block of their own (run_until targets)
+        self.stop_addresses: Set[int] = set()
+
+        self.mem_space.code_invalidator = self.invalidate
+
+    def lookup(self, address: int) -> Optional[TranslatedBlock]:
+        block = self.blocks.get(address)
+        if block is None:
+            block = self.translate(address=address)
+            if block is not None:
+                self._add_block(block=block)
+        return block
+
+    def _add_block(self, block: TranslatedBlock) -> None:
+        self.blocks[block.start] = block
+        for page in range(block.start >> 8, ((block.end - 1) >> 8) + 1):
+            self.page_blocks[page].add(block.start)
+            self.mem_space.code_pages[page] = 1
+
+    def decode_block(self, address: int) -> List[int]:
+        """Addresses of the instructions making up the block starting at address"""
+        instruction_addresses = []
+        pc = address
+        while len(instruction_addresses) < self.max_block_instructions:
+            if instruction_addresses and pc in self.stop_addresses:
+                break
+
+            instruction = self.instructions.get(self.mem_space.peek_byte(address=pc))
+            if instruction is None:
+                break
+
+            instruction_addresses.append(pc)
+            pc += instruction_length(syn=instruction["syn"])
+
+            if instruction["syn"] in block_ending_instructions or pc > 0xFFFF:
+                break
+
+        return instruction_addresses
+
+    def generate_source(self, address: int, instruction_addresses: List[int]) -> str:
+        opcodes = [self.mem_space.peek_byte(address=pc) for pc in instruction_addresses]
+        micro_ops = [instruction_micro_ops(instruction=self.instructions[opcode]) for opcode in opcodes]
+        inline = can_inline([micro_op for ops in micro_ops for micro_op in ops])
+
+        # translate() binds the cache and the block's own TranslatedBlock as the defaults
+        lines = [f"def block_{address:04X}(cpu, translated_blocks=None, translated_block=None):"]
+        cycles = 0
+        for index, (pc, opcode, ops) in enumerate(zip(instruction_addresses, opcodes, micro_ops)):
+            cycles += instruction_cycles(instruction=self.instructions[opcode])
+            lines.append(f"    # {pc:04X} {self.instructions[opcode]['syn']}")
+            lines.append(f"    cpu.PC = {pc + 1:#06x}")
+            lines.extend("    " + line for line in fused_body_lines(micro_ops=ops, inline=inline))
+            if index < len(opcodes) - 1 and writes_memory(micro_ops=ops):
+                # the store rewrote this block: stop here, PC is already on the next instruction
+                lines.append(f"    if {address:#06x} not in translated_blocks:")
+                lines.append(f"        translated_block.instruction_count = {index + 1}")
+                lines.append(f"        translated_block.last_instruction = {pc:#06x}")
+                lines.append(f"        cpu.current_instruction = ins_dict[{opcode:#04x}]")
+                lines.append(f"        return {cycles}")
+        lines.append(f"    cpu.current_instruction = ins_dict[{opcodes[-1]:#04x}]")
+        lines.append(f"    return {cycles}")
+
+        return "\n".join(lines) + "\n"
+
+    def translate(self, address: int) -> Optional[TranslatedBlock]:
+        instruction_addresses = self.decode_block(address=address)
+        if not instruction_addresses:
+            return None
+
+        source = self.generate_source(address=address, instruction_addresses=instruction_addresses)
+        scope = {}
+        exec(compile(source, f"<block {address:04X}>", "exec"), self.namespace, scope)
+
+        function = scope[f"block_{address:04X}"]
+        last = instruction_addresses[-1]
+        last_instruction = self.instructions[self.mem_space.peek_byte(address=last)]
+
+        block = TranslatedBlock(start=address,
+                                end=min(last + instruction_length(syn=last_instruction["syn"]), 0x10000),
+                                last_instruction=last,
+                                instruction_count=len(instruction_addresses),
+                                function=function,
+                                source=source)
+        function.__defaults__ = (self.blocks, block)
+        return block
+
+    def invalidate(self, start: int, end: int) -> None:
+        """Drop every block overlapping [start, end)"""
+        stale = set()
+        for page in range(start >> 8, ((end - 1) >> 8) + 1):
+            for address in self.page_blocks[page]:
+                block = self.blocks[address]
+                if block.start < end and start < block.end:
+                    stale.add(address)
+
+        for address in stale:
+            block = self.blocks.pop(address)
+            for page in range(block.start >> 8, ((block.end - 1) >> 8) + 1):
+                self.page_blocks[page].discard(address)
+                if not self.page_blocks[page]:
+                    self.mem_space.code_pages[page] = 0
+
+    def add_stop_address(self, address: int) -> None:
+        self.stop_addresses.add(address)
+        self.invalidate(start=address, end=address + 1)
+
+    def remove_stop_address(self, address: int) -> None:
+        self.stop_addresses.discard(address)
+
+    def flush(self) -> None:
+        self.blocks.clear()
+        for page in range(256):
+            self.page_blocks[page].clear()
+            self.mem_space.code_pages[page] = 0